@@ -2,10 +2,25 @@
 Flask API 服务器
 提供游泳成绩爬取 API
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from scraper import SwimmingArchiveScraper
+from results_store import ResultsStore
+from snapshot import ResultsSnapshot
+from http_cache import HttpCache
+from parse_cache import ParsedTableCache
+from name_index import NameIndex
+from singleflight import SingleFlight, CoalescedTimeout
+from crawl_scheduler import CrawlScheduler
+from refresher import BackgroundRefresher
+from response_cache import ResponseCache
+from standards import StandardsTable, normalize_gender, DEFAULT_PATH as DEFAULT_STANDARDS_PATH
+import metrics
+import functools
 import os
+import json
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,16 +28,360 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
-scraper = SwimmingArchiveScraper()
+# 磁盘 HTTP 缓存，HTTP_CACHE_DIR 为空时禁用
+http_cache = None
+if os.getenv('HTTP_CACHE_DIR', '.http_cache'):
+    http_cache = HttpCache(
+        os.getenv('HTTP_CACHE_DIR', '.http_cache'),
+        ttl=float(os.getenv('HTTP_CACHE_TTL', 3600)),
+        max_bytes=int(os.getenv('HTTP_CACHE_MAX_MB', 128)) * 1024 * 1024,
+    )
+
+# 解析结果缓存：进程内 LRU，设置 PARSE_CACHE_DIR 时启用磁盘二级缓存（多个 worker 共享）
+parse_cache = ParsedTableCache(
+    max_entries=int(os.getenv('PARSE_CACHE_ENTRIES', 512)),
+    cache_dir=os.getenv('PARSE_CACHE_DIR') or None,
+    max_disk_entries=int(os.getenv('PARSE_CACHE_DISK_ENTRIES', 4096)),
+    max_disk_bytes=int(os.getenv('PARSE_CACHE_DISK_MAX_MB', 256)) * 1024 * 1024,
+)
+
+# 爬取调度器：每个主机每秒最多 CRAWL_RATE 个请求，并发在 1 到 SCRAPER_PER_HOST_LIMIT 之间自适应，失败时退避重试
+crawl_scheduler = CrawlScheduler(
+    rate=float(os.getenv('CRAWL_RATE', 5)),
+    burst=float(os.getenv('CRAWL_BURST', 5)),
+    max_concurrency=int(os.getenv('SCRAPER_PER_HOST_LIMIT', 4)),
+    max_attempts=int(os.getenv('CRAWL_MAX_ATTEMPTS', 3)),
+)
+
+# 后台刷新：实时爬取结果缓存 REFRESH_TTL 秒后由后台按热度重新爬取，请求不等待上游；REFRESH_TTL=0 时禁用
+REFRESH_TTL = float(os.getenv('REFRESH_TTL', 900))
+refresher = BackgroundRefresher(
+    fresh_ttl=REFRESH_TTL,
+    budget=int(os.getenv('REFRESH_BUDGET', 30)),
+    budget_window=float(os.getenv('REFRESH_BUDGET_WINDOW', 60)),
+    max_entries=int(os.getenv('REFRESH_MAX_ENTRIES', 1000)),
+    half_life=float(os.getenv('REFRESH_HALF_LIFE', 3600)),
+) if REFRESH_TTL > 0 else None
+
+# 流式提取：超过 STREAM_THRESHOLD_KB（或大小未知）的结果页面边下载边提取，内存占用与页面大小无关；为空时禁用
+STREAM_THRESHOLD_KB = os.getenv('STREAM_THRESHOLD_KB')
+
+scraper = SwimmingArchiveScraper(
+    max_workers=int(os.getenv('SCRAPER_MAX_WORKERS', 8)),
+    per_host_limit=int(os.getenv('SCRAPER_PER_HOST_LIMIT', 4)),
+    deadline=float(os.getenv('SEARCH_DEADLINE', 20)),
+    http_cache=http_cache,
+    parse_cache=parse_cache,
+    parser_engine=os.getenv('PARSER_ENGINE', 'bs4'),
+    scheduler=crawl_scheduler,
+    refresher=refresher,
+    stream_threshold=int(STREAM_THRESHOLD_KB) * 1024 if STREAM_THRESHOLD_KB else None,
+)
+# 本地成绩索引（由 ingest_results.py 填充）；索引为空时退回实时爬取
+results_store = ResultsStore(os.getenv('RESULTS_DB_PATH', 'results.db'))
+# 设置 RESULTS_SNAPSHOT_PATH 时查询走 mmap 列式快照（snapshot.py build 生成），PB 变更订阅仍读 SQLite
+RESULTS_SNAPSHOT_PATH = os.getenv('RESULTS_SNAPSHOT_PATH')
+results_index = ResultsSnapshot(RESULTS_SNAPSHOT_PATH) if RESULTS_SNAPSHOT_PATH else results_store
+# 实时爬取时最多遍历的页面数，控制无索引时的请求延迟
+LIVE_SEARCH_MAX_PAGES = int(os.getenv('LIVE_SEARCH_MAX_PAGES', 50))
+# ASA 达标标准和奥克兰纪录，启动时载入为查找表
+standards_table = StandardsTable.load(os.getenv('STANDARDS_PATH') or DEFAULT_STANDARDS_PATH)
+# 批量 PB 查询一次最多的运动员数
+MAX_BATCH_ATHLETES = int(os.getenv('MAX_BATCH_ATHLETES', 100))
+# 流式搜索的心跳间隔（秒）
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv('STREAM_HEARTBEAT_INTERVAL', 5))
+
+
+# 实时爬取的请求合并；等待其他请求的爬取结果最多 COALESCE_TIMEOUT 秒
+search_flight = SingleFlight()
+COALESCE_TIMEOUT = float(os.getenv('COALESCE_TIMEOUT', 30))
+
+# API 响应缓存：缓存序列化后的 JSON，带 ETag / 304 和压缩；RESPONSE_CACHE_ENTRIES=0 时只做 ETag 和压缩
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', 1024)),
+    max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_MB', 64)) * 1024 * 1024,
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', 60)),
+    max_age=int(os.getenv('RESPONSE_MAX_AGE', 0)),
+    compress_min_bytes=int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024)),
+)
+
+# Server-Timing 响应头：SERVER_TIMING=true 时所有响应都带，否则只在请求头 X-Server-Timing: 1 时带
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False').lower() == 'true'
+# 采样分析器接口的令牌，为空时禁用 /api/debug/profiler
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+
+
+def cache_metrics():
+    """HTTP 缓存与解析缓存的命中统计，供 /api/metrics 使用"""
+    values = {}
+    if http_cache:
+        stats = http_cache.stats()
+        for result in ('hits', 'misses', 'revalidations'):
+            values[('http', result)] = stats[result]
+    stats = parse_cache.stats()
+    for result in ('memory_hits', 'disk_hits', 'misses'):
+        values[('parse', result)] = stats[result]
+    return values
+
+
+metrics.registry.gauge_callback('cache_requests_total', 'Cache lookups by cache and result',
+                                cache_metrics, labels=('cache', 'result'), metric_type='counter')
+metrics.registry.gauge_callback('http_cache_bytes_saved_total', 'Bytes not downloaded thanks to the HTTP cache',
+                                lambda: http_cache.stats()['bytes_saved'] if http_cache else None,
+                                metric_type='counter')
+metrics.registry.gauge_callback('search_coalescing_total', 'Live lookups by coalescing role',
+                                lambda: {(role,): value for role, value in search_flight.stats().items()
+                                         if role != 'in_flight'},
+                                labels=('role',), metric_type='counter')
+metrics.registry.gauge_callback('crawl_effective_rps', 'Requests per second actually sent to each host',
+                                lambda: {(host, ): stats['effective_rps'] or 0
+                                         for host, stats in crawl_scheduler.stats()['hosts'].items()},
+                                labels=('host',))
+metrics.registry.gauge_callback('crawl_concurrency_limit', 'Adaptive concurrency limit per host',
+                                lambda: {(host, ): stats['concurrency_limit']
+                                         for host, stats in crawl_scheduler.stats()['hosts'].items()},
+                                labels=('host',))
+metrics.registry.gauge_callback('refresh_cache_requests_total', 'Live lookups served by the refresh cache by result',
+                                lambda: {(result,): refresher.stats()[result] for result in ('fresh', 'stale', 'miss')}
+                                if refresher else None,
+                                labels=('result',), metric_type='counter')
+metrics.registry.gauge_callback('background_refreshes_total', 'Background refreshes by outcome',
+                                lambda: {(outcome,): refresher.stats()[key] for outcome, key in
+                                         (('ok', 'refreshed'), ('error', 'refresh_errors'),
+                                          ('over_budget', 'budget_exhausted'))} if refresher else None,
+                                labels=('outcome',), metric_type='counter')
+metrics.registry.gauge_callback('refresh_cache_entries', 'Entries kept warm by the background refresher',
+                                lambda: refresher.stats()['entries'] if refresher else None)
+metrics.registry.gauge_callback('response_cache_requests_total', 'API response cache lookups by result',
+                                lambda: {(result,): response_cache.stats()[result]
+                                         for result in ('hits', 'misses', 'not_modified')},
+                                labels=('result',), metric_type='counter')
+metrics.registry.gauge_callback('response_bytes_saved_total', 'Response bytes not sent thanks to 304s and compression',
+                                lambda: {(reason,): value for reason, value in response_cache.stats()['bytes_saved'].items()},
+                                labels=('reason',), metric_type='counter')
+metrics.registry.gauge_callback('response_cache_bytes', 'Bytes held by the API response cache',
+                                lambda: response_cache.stats()['bytes'])
+metrics.registry.gauge_callback('search_in_flight', 'Live lookups currently running',
+                                lambda: search_flight.stats()['in_flight'])
+
+
+@app.before_request
+def start_timing():
+    g.request_started = time.perf_counter()
+    g.timing_token = metrics.start_request_timing()
+
+
+@app.after_request
+def finish_timing(response):
+    """记录请求耗时，按需添加 Server-Timing 响应头"""
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    timings = metrics.finish_request_timing(g.pop('timing_token', None))
+    metrics.REQUEST_SECONDS.observe(elapsed, request.endpoint or 'unknown', str(response.status_code))
+    if SERVER_TIMING or request.headers.get('X-Server-Timing') == '1':
+        response.headers['Server-Timing'] = metrics.server_timing_header(timings, elapsed)
+    return response
+
+
+def data_version():
+    """缓存响应对应的数据版本：索引有新数据时旧响应失效（实时爬取的响应只受 TTL 限制）"""
+    return results_index.last_ingested_at()
+
+
+def cached_response(view):
+    """缓存视图返回的 dict 的序列化结果，按请求处理 ETag / 304 和压缩
+
+    视图返回 Response 或 (响应, 状态码)（错误、流式输出）时原样返回，不缓存；部分结果不缓存。
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = response_cache.make_key(request.path, request.args)
+        version = data_version()
+        entry = response_cache.get(key, version)
+        if entry is None:
+            result = view(*args, **kwargs)
+            if not isinstance(result, dict):
+                return result
+            with metrics.stage('serialize'):
+                entry = response_cache.put(key, result, version, store=not result.get('partial'))
+        with metrics.stage('encode'):
+            status, body, headers = response_cache.render(
+                entry, request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match'))
+        return Response(body, status=status, headers=headers, mimetype='application/json')
+    return wrapper
+
+
+# 运动员姓名模糊索引，根据本地成绩索引构建；设置 NAME_INDEX_PATH 时持久化到磁盘
+NAME_INDEX_PATH = os.getenv('NAME_INDEX_PATH') or None
+name_index = None
+name_index_lock = threading.Lock()
+
+
+def get_name_index():
+    """返回最新的姓名索引；成绩索引有新数据时重新构建"""
+    global name_index
+    last_ingested_at = results_index.last_ingested_at() or 0
+    if name_index is not None and name_index.built_at >= last_ingested_at:
+        return name_index
+
+    with name_index_lock:
+        if name_index is not None and name_index.built_at >= last_ingested_at:
+            return name_index
+        if NAME_INDEX_PATH and os.path.exists(NAME_INDEX_PATH):
+            loaded = NameIndex.load(NAME_INDEX_PATH)
+            if loaded.built_at >= last_ingested_at:
+                name_index = loaded
+                return name_index
+        name_index = NameIndex.build(results_index.athletes())
+        if NAME_INDEX_PATH:
+            name_index.save(NAME_INDEX_PATH)
+        return name_index
+
+
+def live_lookup(key, load):
+    """实时爬取，相同 key 的并发请求合并为一次爬取
+
+    启用后台刷新时直接返回缓存的报告，过期的由后台重新爬取。
+    返回 (报告, 新鲜度)；新鲜度为 {'fetched_at', 'stale'}，未使用缓存时为空
+    """
+    def coalesced():
+        return search_flight.do(key, load, timeout=COALESCE_TIMEOUT)[0]
+
+    if refresher is None:
+        return coalesced(), {}
+    with metrics.stage('refresh_cache'):
+        report, fetched_at, stale = refresher.get(key, coalesced)
+    if report['skipped_pages']:
+        # 截止时间内没有爬完：先返回部分结果，由后台尽快补全
+        refresher.mark_stale(key)
+    return report, {'fetched_at': fetched_at, 'stale': stale}
+
+
+def find_results(athlete_name, club):
+    """优先查询本地索引，索引为空时实时爬取
+
+    返回 (成绩列表, 被跳过的页面列表, 新鲜度)；实时爬取到达截止时间时返回部分结果
+    """
+    if results_index.has_data():
+        with metrics.stage('index'):
+            return results_index.search(athlete_name, club), [], {}
+
+    key = (athlete_name.lower().strip(), (club or '').lower().strip())
+    report, freshness = live_lookup(
+        key, lambda: scraper.search_athlete_detailed(athlete_name, club, max_pages=LIVE_SEARCH_MAX_PAGES))
+    return report['results'], report['skipped_pages'], freshness
+
+
+def find_personal_bests(athlete_name, club):
+    """获取运动员 PB，返回 (PB 列表, 被跳过的页面列表, 新鲜度)"""
+    if results_index.has_data():
+        # PB 表随导入增量维护：扫描不重复姓名做子串匹配，再按 PB 主键查找
+        with metrics.stage('index'):
+            return results_index.personal_bests(athlete_name, club), [], {}
+    results, skipped_pages, freshness = find_results(athlete_name, club)
+    return scraper.reduce_personal_bests(results), skipped_pages, freshness
+
+
+def find_personal_bests_batch(athletes):
+    """批量获取 PB，athletes 为去重后的 (姓名, 俱乐部) 列表
+
+    返回 (与 athletes 对应的 PB 列表, 被跳过的页面列表, 新鲜度)
+    """
+    if results_index.has_data():
+        with metrics.stage('index'):
+            return [results_index.personal_bests(name, club) for name, club in athletes], [], {}
+
+    # 实时爬取：所有运动员共用一次页面遍历；相同的运动员集合只爬取一次
+    key = ('batch',) + tuple(athletes)
+    report, freshness = live_lookup(
+        key, lambda: scraper.search_athletes_detailed(athletes, max_pages=LIVE_SEARCH_MAX_PAGES))
+    pbs = [scraper.reduce_personal_bests(results) for results in report['results']]
+    return pbs, report['skipped_pages'], freshness
+
+
+def stream_results(athlete_name, club):
+    """以 NDJSON 逐条输出搜索结果：start / result / progress / heartbeat / summary"""
+    if results_index.has_data():
+        started = time.monotonic()
+        results = results_index.search(athlete_name, club)
+        events = [{'type': 'start', 'pages_total': 0}]
+        events.extend({'type': 'result', 'result': result} for result in results)
+        events.append({
+            'type': 'summary',
+            'count': len(results),
+            'pages_total': 0,
+            'pages_fetched': 0,
+            'skipped_pages': [],
+            'failed_pages': [],
+            'elapsed': round(time.monotonic() - started, 3),
+        })
+    else:
+        events = scraper.iter_search_athlete(
+            athlete_name, club,
+            max_pages=LIVE_SEARCH_MAX_PAGES,
+            heartbeat_interval=STREAM_HEARTBEAT_INTERVAL,
+        )
+
+    def generate():
+        try:
+            for event in events:
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
 
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """健康检查端点"""
-    return jsonify({'status': 'ok', 'message': 'Swimming Archive API is running'})
+    return jsonify({
+        'status': 'ok',
+        'message': 'Swimming Archive API is running',
+        'http_cache': http_cache.stats() if http_cache else None,
+        'parse_cache': parse_cache.stats(),
+        'coalescing': search_flight.stats(),
+        'crawl': crawl_scheduler.stats(),
+        'refresh': refresher.stats() if refresher else None,
+        'response_cache': response_cache.stats()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus 格式的运行指标"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/debug/profiler', methods=['GET', 'POST'])
+def profiler_control():
+    """采样分析器：POST {"enabled": true, "interval": 0.01} 开关，GET 返回状态，GET ?format=collapsed 返回调用栈"""
+    if not PROFILER_TOKEN or request.headers.get('X-Profiler-Token') != PROFILER_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('enabled'):
+            try:
+                interval = float(data.get('interval', 0.01))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'interval must be a number'}), 400
+            metrics.profiler.start(interval, reset=bool(data.get('reset', True)))
+        else:
+            metrics.profiler.stop()
+        return jsonify({'success': True, 'profiler': metrics.profiler.stats()})
+
+    if request.args.get('format') == 'collapsed':
+        return Response(metrics.profiler.collapsed(), mimetype='text/plain')
+    return jsonify({'success': True, 'profiler': metrics.profiler.stats()})
 
 
 @app.route('/api/search', methods=['GET'])
+@cached_response
 def search_athlete():
     """搜索运动员成绩"""
     athlete_name = request.args.get('name', '').strip()
@@ -31,13 +390,59 @@ def search_athlete():
     if not athlete_name:
         return jsonify({'error': 'Athlete name is required'}), 400
     
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return stream_results(athlete_name, club)
+    
     try:
-        results = scraper.search_athlete(athlete_name, club)
-        return jsonify({
+        if request.args.get('fuzzy', '').lower() in ('1', 'true') and results_index.has_data():
+            # 模糊匹配：先从姓名索引取候选运动员，再按姓名精确查询
+            candidates = get_name_index().search(athlete_name, club)
+            names = list(dict.fromkeys(candidate['name_norm'] for candidate in candidates))
+            results, skipped_pages, freshness = results_index.search_by_names(names, club), [], {}
+        else:
+            results, skipped_pages, freshness = find_results(athlete_name, club)
+        return {
             'success': True,
             'count': len(results),
-            'results': results
-        })
+            'results': results,
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages,
+            **freshness
+        }
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/athletes', methods=['GET'])
+@cached_response
+def search_athletes():
+    """模糊查找运动员，返回按相似度排序的候选"""
+    query = request.args.get('q', '').strip()
+    club = request.args.get('club', '').strip() or None
+    
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    
+    try:
+        limit = min(int(request.args.get('limit', 10)), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    try:
+        candidates = get_name_index().search(query, club, limit=limit)
+        return {
+            'success': True,
+            'count': len(candidates),
+            'athletes': candidates
+        }
     except Exception as e:
         return jsonify({
             'success': False,
@@ -46,6 +451,7 @@ def search_athlete():
 
 
 @app.route('/api/personal-bests', methods=['GET'])
+@cached_response
 def get_personal_bests():
     """获取运动员个人最佳成绩"""
     athlete_name = request.args.get('name', '').strip()
@@ -55,11 +461,144 @@ def get_personal_bests():
         return jsonify({'error': 'Athlete name is required'}), 400
     
     try:
-        pbs = scraper.get_personal_bests(athlete_name, club)
-        return jsonify({
+        pbs, skipped_pages, freshness = find_personal_bests(athlete_name, club)
+        return {
             'success': True,
             'count': len(pbs),
-            'personal_bests': pbs
+            'personal_bests': pbs,
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages,
+            **freshness
+        }
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/personal-bests/standards', methods=['GET'])
+@cached_response
+def compare_personal_bests():
+    """把运动员全部 PB 与适用的达标标准和纪录比较，只返回比较结果"""
+    athlete_name = request.args.get('name', '').strip()
+    club = request.args.get('club', '').strip() or None
+    gender = normalize_gender(request.args.get('gender'))
+    
+    if not athlete_name:
+        return jsonify({'error': 'Athlete name is required'}), 400
+    if gender is None:
+        return jsonify({'error': 'gender must be one of M, F, Male, Female, Boys, Girls'}), 400
+    try:
+        age = int(request.args.get('age', ''))
+    except ValueError:
+        return jsonify({'error': 'age must be an integer'}), 400
+    
+    try:
+        pbs, skipped_pages, freshness = find_personal_bests(athlete_name, club)
+        with metrics.stage('compare'):
+            events = standards_table.compare(pbs, gender, age)
+        return {
+            'success': True,
+            'gender': gender,
+            'age': age,
+            'count': len(events),
+            'events': events,
+            'achieved': sum(1 for event in events for comparison in event['comparisons'] if comparison['achieved']),
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages,
+            **freshness
+        }
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/personal-bests/batch', methods=['POST'])
+def get_personal_bests_batch():
+    """批量获取整个队伍的 PB：所有运动员共用一次页面遍历"""
+    data = request.get_json(silent=True) or {}
+    athletes = data.get('athletes')
+    if not isinstance(athletes, list) or not athletes:
+        return jsonify({'error': 'athletes must be a non-empty list'}), 400
+    if len(athletes) > MAX_BATCH_ATHLETES:
+        return jsonify({'error': f'At most {MAX_BATCH_ATHLETES} athletes per request'}), 400
+    
+    requested = []
+    for athlete in athletes:
+        if not isinstance(athlete, dict) or not str(athlete.get('name') or '').strip():
+            return jsonify({'error': 'Each athlete needs a name'}), 400
+        requested.append((str(athlete['name']).strip(), str(athlete.get('club') or '').strip() or None))
+    
+    # 大小写不同的重复运动员只查询一次
+    unique = {}
+    for name, club in requested:
+        unique.setdefault((name.lower(), (club or '').lower()), (name, club))
+    keys = sorted(unique)
+    
+    try:
+        pbs_list, skipped_pages, freshness = find_personal_bests_batch([unique[key] for key in keys])
+        pbs_by_key = dict(zip(keys, pbs_list))
+        results = []
+        for name, club in requested:
+            pbs = pbs_by_key[(name.lower(), (club or '').lower())]
+            results.append({
+                'name': name,
+                'club': club,
+                'count': len(pbs),
+                'personal_bests': pbs
+            })
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'athletes': results,
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages,
+            **freshness
+        })
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/personal-bests/changes', methods=['GET'])
+def get_personal_best_changes():
+    """获取某个时间之后更新过的 PB，供前端轮询"""
+    athlete_name = request.args.get('name', '').strip() or None
+    club = request.args.get('club', '').strip() or None
+    
+    try:
+        since = float(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be a Unix timestamp'}), 400
+    
+    try:
+        # next_since 为本次返回的最大更新时间，客户端下次轮询时作为 since 使用
+        changes, next_since = results_store.personal_bests_changed_since(since, athlete_name, club)
+        return jsonify({
+            'success': True,
+            'next_since': next_since,
+            'count': len(changes),
+            'changes': changes
         })
     except Exception as e:
         return jsonify({
@@ -82,11 +621,10 @@ def scrape_page():
         if not soup:
             return jsonify({'error': 'Failed to fetch page'}), 500
         
-        table = scraper.find_results_table(soup)
-        if not table:
+        results = scraper.extract_results(soup)
+        if results is None:
             return jsonify({'error': 'No results table found'}), 404
         
-        results = scraper.extract_table_data(table)
         return jsonify({
             'success': True,
             'count': len(results),
@@ -0,0 +1,254 @@
+"""
+异步 API 服务器（ASGI）
+与 app.py 提供相同的 /api/health、/api/search、/api/personal-bests、/api/scrape-page 接口，
+上游请求使用共享连接池的异步 HTTP 客户端，慢请求不会占用工作线程。
+
+与 app.py 共用解析缓存和响应缓存；下载不经过磁盘 HTTP 缓存和爬取调度器（见 README）。
+
+运行：
+    hypercorn asgi_app:app --bind 0.0.0.0:8080
+"""
+import asyncio
+import functools
+import os
+
+from dotenv import load_dotenv
+from quart import Quart, Response, request, jsonify
+
+from scraper import SwimmingArchiveScraper
+from async_scraper import AsyncArchiveScraper
+from results_store import ResultsStore
+from snapshot import ResultsSnapshot
+from parse_cache import ParsedTableCache
+from response_cache import ResponseCache
+from singleflight import AsyncSingleFlight, CoalescedTimeout
+import metrics
+
+load_dotenv()
+
+app = Quart(__name__)
+
+# 解析结果缓存：进程内 LRU，设置 PARSE_CACHE_DIR 时启用磁盘二级缓存
+parse_cache = ParsedTableCache(
+    max_entries=int(os.getenv('PARSE_CACHE_ENTRIES', 512)),
+    cache_dir=os.getenv('PARSE_CACHE_DIR') or None,
+    max_disk_entries=int(os.getenv('PARSE_CACHE_DISK_ENTRIES', 4096)),
+    max_disk_bytes=int(os.getenv('PARSE_CACHE_DISK_MAX_MB', 256)) * 1024 * 1024,
+)
+
+# 同步爬虫只负责解析和配置，下载由 AsyncArchiveScraper 完成
+scraper = SwimmingArchiveScraper(
+    per_host_limit=int(os.getenv('SCRAPER_PER_HOST_LIMIT', 4)),
+    deadline=float(os.getenv('SEARCH_DEADLINE', 20)),
+    parse_cache=parse_cache,
+    parser_engine=os.getenv('PARSER_ENGINE', 'bs4'),
+)
+# 本地成绩索引（由 ingest_results.py 填充）；索引为空时退回实时爬取
+results_store = ResultsStore(os.getenv('RESULTS_DB_PATH', 'results.db'))
+# 设置 RESULTS_SNAPSHOT_PATH 时查询走 mmap 列式快照（snapshot.py build 生成），PB 变更订阅仍读 SQLite
+RESULTS_SNAPSHOT_PATH = os.getenv('RESULTS_SNAPSHOT_PATH')
+results_index = ResultsSnapshot(RESULTS_SNAPSHOT_PATH) if RESULTS_SNAPSHOT_PATH else results_store
+LIVE_SEARCH_MAX_PAGES = int(os.getenv('LIVE_SEARCH_MAX_PAGES', 50))
+
+search_flight = AsyncSingleFlight()
+COALESCE_TIMEOUT = float(os.getenv('COALESCE_TIMEOUT', 30))
+
+# API 响应缓存：与 app.py 相同的配置和行为（ETag / 304、压缩、数据版本失效）
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', 1024)),
+    max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_MB', 64)) * 1024 * 1024,
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', 60)),
+    max_age=int(os.getenv('RESPONSE_MAX_AGE', 0)),
+    compress_min_bytes=int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024)),
+)
+
+async_scraper = None
+
+
+@app.before_serving
+async def startup():
+    """创建共享连接池"""
+    global async_scraper
+    client = AsyncArchiveScraper.create_client(
+        dict(scraper.session.headers),
+        max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', 100)),
+    )
+    async_scraper = AsyncArchiveScraper(scraper, client, parse_workers=int(os.getenv('PARSE_WORKERS', 4)))
+
+
+@app.after_serving
+async def shutdown():
+    await async_scraper.close()
+
+
+@app.after_request
+async def add_cors_headers(response):
+    """允许跨域请求（与 app.py 中 CORS(app) 的默认行为一致）"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+async def find_results(athlete_name, club):
+    """优先查询本地索引，索引为空时实时爬取；返回 (成绩列表, 被跳过的页面列表)"""
+    if await asyncio.to_thread(results_index.has_data):
+        return await asyncio.to_thread(results_index.search, athlete_name, club), []
+
+    # 相同 (姓名, 俱乐部) 的并发请求合并为一次爬取
+    key = (athlete_name.lower().strip(), (club or '').lower().strip())
+    report, _ = await search_flight.do(
+        key,
+        lambda: async_scraper.search_athlete_detailed(athlete_name, club, max_pages=LIVE_SEARCH_MAX_PAGES),
+        timeout=COALESCE_TIMEOUT,
+    )
+    return report['results'], report['skipped_pages']
+
+
+def data_version():
+    """缓存响应对应的数据版本：索引有新数据时旧响应失效（实时爬取的响应只受 TTL 限制）"""
+    return results_index.last_ingested_at()
+
+
+def cached_response(view):
+    """与 app.py 的 cached_response 相同；序列化和压缩放到线程池，不阻塞事件循环
+
+    视图返回 (响应, 状态码)（错误）时原样返回，不缓存；部分结果不缓存。
+    """
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        key = response_cache.make_key(request.path, request.args)
+        version = await asyncio.to_thread(data_version)
+        entry = response_cache.get(key, version)
+        if entry is None:
+            result = await view(*args, **kwargs)
+            if not isinstance(result, dict):
+                return result
+            entry = await asyncio.to_thread(
+                functools.partial(response_cache.put, key, result, version, store=not result.get('partial')))
+        status, body, headers = await asyncio.to_thread(
+            response_cache.render, entry, request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match'))
+        return Response(body, status=status, headers=headers, mimetype='application/json')
+    return wrapper
+
+
+@app.route('/api/health', methods=['GET'])
+async def health():
+    """健康检查端点"""
+    return jsonify({
+        'status': 'ok',
+        'message': 'Swimming Archive API is running',
+        'server': 'asgi',
+        'parse_cache': parse_cache.stats(),
+        'coalescing': search_flight.stats(),
+        'response_cache': response_cache.stats()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def get_metrics():
+    """Prometheus 格式的运行指标（解析阶段在线程池中执行，同样会被记录）"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/search', methods=['GET'])
+@cached_response
+async def search_athlete():
+    """搜索运动员成绩"""
+    athlete_name = request.args.get('name', '').strip()
+    club = request.args.get('club', '').strip() or None
+
+    if not athlete_name:
+        return jsonify({'error': 'Athlete name is required'}), 400
+
+    try:
+        results, skipped_pages = await find_results(athlete_name, club)
+        return {
+            'success': True,
+            'count': len(results),
+            'results': results,
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages
+        }
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/personal-bests', methods=['GET'])
+@cached_response
+async def get_personal_bests():
+    """获取运动员个人最佳成绩"""
+    athlete_name = request.args.get('name', '').strip()
+    club = request.args.get('club', '').strip() or None
+
+    if not athlete_name:
+        return jsonify({'error': 'Athlete name is required'}), 400
+
+    try:
+        if await asyncio.to_thread(results_index.has_data):
+            pbs = await asyncio.to_thread(results_index.personal_bests, athlete_name, club)
+            skipped_pages = []
+        else:
+            results, skipped_pages = await find_results(athlete_name, club)
+            pbs = scraper.reduce_personal_bests(results)
+        return {
+            'success': True,
+            'count': len(pbs),
+            'personal_bests': pbs,
+            'partial': bool(skipped_pages),
+            'skipped_pages': skipped_pages
+        }
+    except CoalescedTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/scrape-page', methods=['POST'])
+async def scrape_page():
+    """爬取指定页面的结果"""
+    data = await request.get_json()
+    url = data.get('url', '').strip()
+
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+
+    try:
+        try:
+            results = await async_scraper.extract_page(url)
+        except IOError:
+            return jsonify({'error': 'Failed to fetch page'}), 500
+
+        if results is None:
+            return jsonify({'error': 'No results table found'}), 404
+
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', 8080))
+    debug = os.getenv('DEBUG', 'False').lower() == 'true'
+    app.run(host='0.0.0.0', port=port, debug=debug)
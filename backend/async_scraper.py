@@ -0,0 +1,144 @@
+"""
+异步版游泳成绩爬虫
+使用共享连接池的 httpx.AsyncClient 下载页面，解析仍复用 SwimmingArchiveScraper，
+但放在线程池中执行，不阻塞事件循环。
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+import fast_parser
+import metrics
+from scraper import SwimmingArchiveScraper
+
+
+class AsyncArchiveScraper:
+    def __init__(self, scraper: SwimmingArchiveScraper, client: httpx.AsyncClient,
+                 parse_workers: int = 4):
+        # scraper 只用于解析和配置（base_url、单主机并发数、截止时间、解析引擎、解析缓存）
+        self.scraper = scraper
+        self.client = client
+        self.parse_executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='parse')
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def create_client(headers: Dict[str, str], max_connections: int = 100,
+                      timeout: float = 10) -> httpx.AsyncClient:
+        """创建共享连接池的异步 HTTP 客户端"""
+        return httpx.AsyncClient(
+            headers=headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.scraper.per_host_limit)
+        return semaphore
+
+    async def _in_executor(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.parse_executor, fn, *args)
+
+    async def fetch_content(self, url: str) -> Optional[bytes]:
+        """下载页面内容（受单主机并发限制），失败时返回 None"""
+        try:
+            async with self._host_semaphore(url):
+                started = time.perf_counter()
+                response = await self.client.get(url)
+                metrics.record_stage('fetch', time.perf_counter() - started)
+            response.raise_for_status()
+            metrics.PAGE_BYTES.observe(len(response.content))
+            return response.content
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc()
+            print(f"Error fetching page: {e}")
+            return None
+
+    async def fetch_result_links(self) -> Optional[List[str]]:
+        """获取 results.html 并返回全部结果页面链接"""
+        content = await self.fetch_content(f"{self.scraper.base_url}/results.html")
+        if content is None:
+            return None
+        return await self._in_executor(self._parse_result_links, content)
+
+    def _parse_result_links(self, content: bytes) -> List[str]:
+        if self.scraper.parser_engine == 'lxml':
+            return self.scraper.filter_result_links(
+                fast_parser.extract_links(fast_parser.parse_document(content)))
+        return self.scraper.find_result_links(BeautifulSoup(content, 'lxml'))
+
+    async def fetch_page_results(self, url: str) -> Optional[List[Dict]]:
+        """获取单个结果页面并在线程池中解析（页面获取失败时返回 None）"""
+        content = await self.fetch_content(url)
+        if content is None:
+            return None
+        return await self._in_executor(self.scraper.parse_results, url, content)
+
+    async def extract_page(self, url: str) -> Optional[List[Dict]]:
+        """供 /api/scrape-page 使用：页面获取失败抛出 IOError，没有结果表格时返回 None"""
+        content = await self.fetch_content(url)
+        if content is None:
+            raise IOError('Failed to fetch page')
+        return await self._in_executor(self._extract_table, content)
+
+    def _extract_table(self, content: bytes) -> Optional[List[Dict]]:
+        return self.scraper.extract_results(BeautifulSoup(content, 'lxml'))
+
+    async def search_athlete_detailed(self, athlete_name: str, club: Optional[str] = None,
+                                      max_pages: Optional[int] = None,
+                                      deadline: Optional[float] = None) -> Dict:
+        """与 SwimmingArchiveScraper.search_athlete_detailed 返回相同结构"""
+        report = {
+            'results': [],
+            'pages_total': 0,
+            'pages_fetched': 0,
+            'skipped_pages': [],
+            'failed_pages': [],
+        }
+
+        results_links = await self.fetch_result_links()
+        if results_links is None:
+            return report
+        if max_pages is not None:
+            results_links = results_links[:max_pages]
+        report['pages_total'] = len(results_links)
+        if not results_links:
+            return report
+
+        if deadline is None:
+            deadline = self.scraper.deadline
+        tasks = {asyncio.ensure_future(self.fetch_page_results(url)): url for url in results_links}
+        done, pending = await asyncio.wait(tasks, timeout=deadline or None)
+        for task in pending:
+            task.cancel()
+
+        pages = {}
+        for task in done:
+            url = tasks[task]
+            rows = None if task.exception() else task.result()
+            if rows is None:
+                report['failed_pages'].append(url)
+            else:
+                pages[url] = rows
+
+        report['pages_fetched'] = len(pages)
+        skipped = {tasks[task] for task in pending}
+        report['skipped_pages'] = [url for url in results_links if url in skipped]
+        # 按页面顺序过滤匹配的运动员
+        for url in results_links:
+            for result in pages.get(url, []):
+                if self.scraper.match_athlete(result, athlete_name, club):
+                    report['results'].append(result)
+        return report
+
+    async def close(self):
+        await self.client.aclose()
+        self.parse_executor.shutdown(wait=False)
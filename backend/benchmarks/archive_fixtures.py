@@ -0,0 +1,303 @@
+"""
+基准测试用的归档网站数据
+- synthetic_site：生成与 archive.swimming.org.nz 结构相同的模拟网站（results.html、年份页面、比赛结果页面）
+- record / load_recorded：从线上网站录制页面到本地目录，之后离线回放
+- StandInServer：在本机端口上提供这些页面的 HTTP 服务，可模拟网络延迟
+- parity_pages：解析引擎一致性检查使用的页面（模拟网站 + 多表格、嵌套表格、编码等特殊布局）
+"""
+import os
+import random
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+from urllib.parse import urlparse, unquote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+FIRST_NAMES = ['Michael', 'Aroha', 'Tāne', 'Sophie', 'Liam', 'Mereana', 'Oliver', 'Charlotte', 'Wiremu',
+               'Isla', 'Jack', 'Amelia', 'Hemi', 'Ruby', 'Noah', 'Ngaio', 'Lucas', 'Ava', 'Māui', 'Zoe']
+SURNAMES = ['Smith', 'Ngata', 'Wilson', 'Te Rangi', 'Brown', 'Parata', 'Taylor', 'Walker', 'Tūhoe',
+            'Harris', 'Martin', 'Clarke', 'Rāwiri', 'Young', 'King', 'Thompson', 'White', 'Hēnare']
+CLUBS = ['North Shore', 'Coast', 'Howick Pakuranga', 'Roskill', 'West Auckland Aquatics',
+         'Capital', 'Raumati', 'Hamilton City Hammers', 'Fendalton Wharenui', 'Neptune']
+EVENTS = ['50m Freestyle', '100m Freestyle', '200m Freestyle', '400m Freestyle', '50m Backstroke',
+          '100m Backstroke', '100m Breaststroke', '200m Breaststroke', '50m Butterfly', '100m Butterfly',
+          '200m Individual Medley', '100m Freestyle Long Course', '200m Backstroke LCM']
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.pdf': 'application/pdf',
+    '.csv': 'text/csv',
+    '.txt': 'text/plain',
+}
+
+
+def format_time(hundredths: int) -> str:
+    minutes, rest = divmod(hundredths, 6000)
+    seconds, fraction = divmod(rest, 100)
+    if minutes:
+        return f"{minutes}:{seconds:02d}.{fraction:02d}"
+    return f"{seconds}.{fraction:02d}"
+
+
+def meet_page(rows: int, seed: int = 0, title: str = 'Meet') -> bytes:
+    """生成一个包含 rows 行成绩的比赛结果页面（带导航和页脚，结构与线上页面类似）"""
+    rng = random.Random(seed)
+    lines = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{title}</title><style>td {{ padding: 2px; }}</style>',
+        '<script>var analytics = "<table><tr><td>not a result</td></tr></table>";</script></head><body>',
+        '<div class="nav"><ul>' + ''.join(f'<li><a href="/page-{i}.html">Link {i}</a></li>' for i in range(30))
+        + '</ul></div>',
+        f'<h1>{title}</h1>',
+        '<table class="layout"><tr><td>Venue</td><td>Pool</td></tr></table>',
+        '<table class="results-table">',
+        '<tr><th>Name</th><th>Event</th><th>Time</th><th>Splits</th><th>Club</th><th>Date</th></tr>',
+    ]
+    for _ in range(rows):
+        event = rng.choice(EVENTS)
+        base = int(event.split('m', 1)[0]) * rng.randint(55, 80)
+        time_text = format_time(base + rng.randint(0, 99))
+        lines.append(
+            f'<tr><td>{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}</td><td>{event}</td>'
+            f'<td>{time_text}</td><td>{format_time(base // 2)}</td>'
+            f'<td>{rng.choice(CLUBS)}</td><td>2023-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}</td></tr>'
+        )
+    lines.append('</table><div class="footer">&copy; Swimming New Zealand</div></body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def meet_page_by_event(rows: int, seed: int = 0, title: str = 'Meet') -> bytes:
+    """生成每个项目一个表格的比赛结果页面：项目名称在表格前的 <h3> 中，表头没有项目列；
+    最后一个表格用只有一个单元格的行分隔多个项目"""
+    rng = random.Random(seed)
+    per_event = max(rows // len(EVENTS), 1)
+    lines = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{title}</title></head><body>',
+        '<div class="nav"><ul>' + ''.join(f'<li><a href="/page-{i}.html">Link {i}</a></li>' for i in range(30))
+        + '</ul></div>',
+        f'<h1>{title}</h1>',
+        '<table class="layout"><tr><td>Venue</td><td>Pool</td></tr></table>',
+    ]
+
+    def result_rows(event: str, count: int):
+        base = int(event.split('m', 1)[0]) * rng.randint(55, 80)
+        for place in range(1, count + 1):
+            lines.append(
+                f'<tr><td>{place}</td><td>{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}</td>'
+                f'<td>{rng.randint(10, 18)}</td><td>{rng.choice(CLUBS)}</td>'
+                f'<td>{format_time(base + place * rng.randint(10, 90))}</td></tr>'
+            )
+
+    header = '<tr><th>Place</th><th>Name</th><th>Age</th><th>Club</th><th>Time</th></tr>'
+    for number, event in enumerate(EVENTS[:-2], start=1):
+        lines.append(f'<h3>Event {number} {event}</h3><table>{header}')
+        result_rows(event, per_event)
+        lines.append('</table>')
+    lines.append(f'<h3>Relays and finals</h3><table>{header}')
+    for event in EVENTS[-2:]:
+        lines.append(f'<tr><td colspan="5">{event}</td></tr>')
+        result_rows(event, per_event)
+    lines.append('</table><div class="footer">&copy; Swimming New Zealand</div></body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def synthetic_site(meets: int = 20, meet_rows: int = 500, years: int = 5,
+                   competitions_per_year: int = 40, seed: int = 42) -> Dict[str, bytes]:
+    """生成模拟网站：返回 {路径: 内容}
+
+    results.html 同时包含年份链接（ResultsPageScraper 使用）和比赛结果页面链接（SwimmingArchiveScraper 使用）。
+    比赛页面名称不含四位数字，避免被识别为年份。
+    """
+    pages: Dict[str, bytes] = {}
+    year_list = [str(2023 - i) for i in range(years)]
+    meet_paths = [f'/results/meet-n{i}.html' for i in range(meets)]
+
+    links = [f'<li><a href="/results/{year}.html">{year} Results</a></li>' for year in year_list]
+    links += [f'<li><a href="{path}">Meet {i}</a></li>' for i, path in enumerate(meet_paths)]
+    links += ['<li><a href="/about.html">About</a></li>', '<li><a href="/contact.html">Contact</a></li>']
+    pages['/results.html'] = ('<!DOCTYPE html><html><body><h1>Results</h1><ul>'
+                              + ''.join(links) + '</ul></body></html>').encode('utf-8')
+
+    for i, path in enumerate(meet_paths):
+        pages[path] = meet_page(meet_rows, seed=seed + i, title=f'Meet {i}')
+
+    for year in year_list:
+        rows = []
+        for j in range(competitions_per_year):
+            name = f'{year} Competition {j}'
+            ext = ['.pdf', '.csv', '.txt'][j % 3]
+            rows.append(f'<tr><td>{name}</td><td>Auckland</td>'
+                        f'<td><a href="/files/{year}-c{j}{ext}">Download</a></td></tr>')
+        pages[f'/results/{year}.html'] = (
+            '<!DOCTYPE html><html><body><h1>' + year + '</h1>'
+            '<p><a href="/results.html">Back</a></p><table>' + ''.join(rows) + '</table></body></html>'
+        ).encode('utf-8')
+    return pages
+
+
+def parity_pages(seed: int = 7) -> Dict[str, bytes]:
+    """fast_parser 一致性检查使用的页面：{名称: 内容}，不需要任何外部输入"""
+    pages = synthetic_site(meets=4, meet_rows=300, years=2, competitions_per_year=10, seed=seed)
+    pages['/by-event.html'] = meet_page_by_event(600, seed=seed)
+    pages['/large.html'] = meet_page(3000, seed=seed)
+    header = '<tr><th>Name</th><th>Event</th><th>Time</th><th>Club</th></tr>'
+    row = '<tr><td>Zoë Müller</td><td>100m Butterfly</td><td>1:02.34</td><td>Coast</td></tr>'
+    special = {
+        # 表格标题在 <caption> 中，表头没有项目列
+        '/caption.html': ('<html><body><h2>Day 1</h2><table><caption>200m IM Long Course</caption>'
+                          '<tr><th>Swimmer</th><th>Result</th></tr><tr><td>Aroha Ngata</td><td>2:31.20</td></tr>'
+                          '</table></body></html>'),
+        # 布局表格中嵌套结果表格
+        '/nested.html': ('<html><body><table class="layout"><tr><td>Menu</td><td><h3>100m Backstroke</h3>'
+                         '<table><tr><th>Place</th><th>Name</th><th>Time</th></tr>'
+                         '<tr><td>1</td><td>Liam Brown</td><td>1:05.00</td></tr></table></td></tr></table>'
+                         '</body></html>'),
+        # 没有可识别表头的页面（退回行数最多的表格）
+        '/no-header.html': ('<html><body><table><tr><td>A</td><td>50m Free</td><td>30.01</td></tr>'
+                            '<tr><td>B</td><td>50m Free</td><td>31.02</td></tr></table></body></html>'),
+        '/no-table.html': '<html><body><p>No results yet</p></body></html>',
+        '/empty.html': '',
+    }
+    for path, markup in special.items():
+        pages[path] = markup.encode('utf-8')
+    # 编码：未声明编码的 latin-1 页面、声明为 windows-1252 的页面
+    table = f'<table>{header}{row}</table>'
+    pages['/latin1.html'] = f'<html><body>{table}</body></html>'.encode('latin-1')
+    pages['/cp1252.html'] = (f'<html><head><meta charset="windows-1252"></head><body>{table}</body></html>'
+                             .replace('Coast', 'Coast – “Sharks”').encode('cp1252'))
+    return pages
+
+
+def load_recorded(directory: str) -> Dict[str, bytes]:
+    """读取 record() 保存的页面目录：文件相对路径即 URL 路径"""
+    pages = {}
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            full_path = os.path.join(root, filename)
+            rel_path = '/' + os.path.relpath(full_path, directory).replace(os.sep, '/')
+            with open(full_path, 'rb') as f:
+                pages[rel_path] = f.read()
+    return pages
+
+
+def record(base_url: str, directory: str, max_meets: int = 20, max_years: int = 3) -> int:
+    """从线上网站录制 results.html、前 max_years 个年份页面和前 max_meets 个比赛结果页面，返回保存的页面数"""
+    from bs4 import BeautifulSoup
+    from scraper import SwimmingArchiveScraper
+    from scrape_results_page import ResultsPageScraper
+    from crawl_frontier import MEET_PAGE
+
+    scraper = SwimmingArchiveScraper(base_url)
+    host = urlparse(base_url).netloc
+    main_url = f"{base_url}/results.html"
+    main_content = scraper.fetch_content(main_url)
+    if main_content is None:
+        return 0
+
+    main_page = BeautifulSoup(main_content, 'lxml')
+    urls = scraper.find_result_links(main_page, kinds=(MEET_PAGE,))[:max_meets]
+    year_scraper = ResultsPageScraper(base_url)
+    year_links = year_scraper.find_year_links(main_page)
+    urls += [link['url'] for link in year_links[:max_years]]
+
+    saved = 0
+    for url in [main_url] + urls:
+        parsed = urlparse(url)
+        if parsed.netloc != host:
+            continue
+        content = main_content if url == main_url else scraper.fetch_content(url)
+        if content is None:
+            continue
+        path = os.path.join(directory, unquote(parsed.path).lstrip('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        saved += 1
+    return saved
+
+
+class StandInServer:
+    """在本机随机端口上提供 pages 中的页面；latency 为每个请求的模拟延迟（秒）"""
+
+    def __init__(self, pages: Dict[str, bytes], latency: float = 0.0):
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                body = server.pages.get(unquote(urlparse(self.path).path))
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                ext = os.path.splitext(self.path)[1].lower()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES.get(ext, 'application/octet-stream'))
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='stand-in-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="录制线上页面，或启动本地替身服务器")
+    parser.add_argument('--record', metavar='DIR', help="录制线上页面到目录")
+    parser.add_argument('--base-url', default='https://archive.swimming.org.nz')
+    parser.add_argument('--max-meets', type=int, default=20)
+    parser.add_argument('--max-years', type=int, default=3)
+    parser.add_argument('--serve', metavar='DIR', nargs='?', const='', help="提供录制目录（省略则为模拟网站）")
+    args = parser.parse_args()
+
+    if args.record:
+        count = record(args.base_url, args.record, args.max_meets, args.max_years)
+        print(f"已保存 {count} 个页面到 {args.record}")
+    elif args.serve is not None:
+        site = load_recorded(args.serve) if args.serve else synthetic_site()
+        with StandInServer(site) as stand_in:
+            print(f"{len(site)} 个页面：{stand_in.base_url}/results.html（Ctrl+C 退出）")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+    else:
+        parser.print_help()
@@ -0,0 +1,116 @@
+"""
+姓名索引基准测试
+对比 NameIndex 与原有的线性子串匹配（athlete_name.lower() in result['name'].lower()）
+在 1 万、10 万、100 万条成绩上的查询耗时。
+
+运行：
+    python benchmarks/bench_name_index.py [--sizes 10000 100000 1000000] [--queries 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_index import NameIndex  # noqa: E402
+
+
+FIRST_NAMES = ['Michael', 'Aroha', 'Tāne', 'Sophie', 'Liam', 'Mereana', 'Oliver', 'Charlotte', 'Wiremu',
+               'Isla', 'Jack', 'Amelia', 'Hemi', 'Ruby', 'Noah', 'Ngaio', 'Lucas', 'Ava', 'Māui', 'Zoe']
+SURNAMES = ['Smith', 'Ngata', 'Wilson', 'Te Rangi', 'Brown', 'Parata', 'Taylor', 'Walker', 'Tūhoe',
+            'Harris', 'Martin', 'Clarke', 'Rāwiri', 'Young', 'King', 'Thompson', 'White', 'Hēnare']
+CLUBS = ['North Shore', 'Coast', 'Howick Pakuranga', 'Roskill', 'West Auckland Aquatics',
+         'Capital', 'Raumati', 'Hamilton City Hammers', 'Fendalton Wharenui', 'Neptune']
+
+
+def make_rows(count: int, seed: int = 42):
+    """生成模拟成绩行：每名运动员约有 10 条成绩"""
+    rng = random.Random(seed)
+    athletes = []
+    for i in range(max(count // 10, 1)):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}{i % 997 or ''}"
+        athletes.append((name, rng.choice(CLUBS)))
+    return [{'name': name, 'club': club} for name, club in (rng.choice(athletes) for _ in range(count))]
+
+
+def make_queries(rows, count: int, seed: int = 7):
+    """查询：完整姓名、仅名字、“Surname, First” 顺序、带一个拼写错误"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name = rng.choice(rows)['name']
+        first, _, surname = name.partition(' ')
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append(name)
+        elif kind == 1:
+            queries.append(first)
+        elif kind == 2:
+            queries.append(f"{surname}, {first}")
+        else:
+            pos = rng.randrange(len(name))
+            queries.append(name[:pos] + rng.choice('aeiou') + name[pos + 1:])
+    return queries
+
+
+def linear_scan(rows, query: str):
+    """原有的线性匹配"""
+    lowered = query.lower()
+    return [row for row in rows if lowered in row['name'].lower()]
+
+
+def bench(size: int, query_count: int):
+    rows = make_rows(size)
+    queries = make_queries(rows, query_count)
+
+    started = time.perf_counter()
+    index = NameIndex.build((row['name'], row['club']) for row in rows)
+    build_seconds = time.perf_counter() - started
+
+    # 线性扫描很慢，大数据量时只测部分查询
+    scan_queries = queries[:max(1, min(query_count, 2_000_000 // size))]
+    started = time.perf_counter()
+    scan_hits = sum(1 for query in scan_queries if linear_scan(rows, query))
+    scan_ms = (time.perf_counter() - started) * 1000 / len(scan_queries)
+
+    started = time.perf_counter()
+    index_hits = sum(1 for query in queries if index.search(query))
+    index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    return {
+        'rows': size,
+        'athletes': len(index),
+        'build_seconds': round(build_seconds, 3),
+        'linear_scan_ms_per_query': round(scan_ms, 3),
+        'linear_scan_hit_rate': round(scan_hits / len(scan_queries), 3),
+        'index_ms_per_query': round(index_ms, 3),
+        'index_hit_rate': round(index_hits / len(queries), 3),
+        'speedup': round(scan_ms / index_ms, 1) if index_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="姓名索引基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    args = parser.parse_args()
+
+    reports = [bench(size, args.queries) for size in args.sizes]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{'rows':>10} {'athletes':>9} {'build s':>8} {'scan ms':>9} {'scan hit':>9} "
+          f"{'index ms':>9} {'index hit':>10} {'speedup':>8}")
+    for r in reports:
+        print(f"{r['rows']:>10} {r['athletes']:>9} {r['build_seconds']:>8} "
+              f"{r['linear_scan_ms_per_query']:>9} {r['linear_scan_hit_rate']:>9} "
+              f"{r['index_ms_per_query']:>9} {r['index_hit_rate']:>10} {r['speedup']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+爬虫离线基准测试
+在本地替身服务器（archive_fixtures.StandInServer）上分别测量：
+fetch_page、find_results_table、extract_table_data、extract_results（多表格页面）、
+search_athlete、get_personal_bests、ResultsPageScraper.scrape_all。不访问线上网站。
+
+数据来源：
+- 默认使用模拟网站，单页测试的页面行数由 --rows 指定（可到 1 万行以上）
+- --fixtures DIR 使用 archive_fixtures.py --record 录制的页面，单页测试使用其中行数最多的比赛页面
+
+运行：
+    python benchmarks/bench_scraper.py [--rows 100 1000 10000] [--repeat 5] --output bench.json
+    python benchmarks/bench_scraper.py --compare bench.json       # 与之前的结果比较，变慢超过阈值时退出码为 1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_fixtures import StandInServer, synthetic_site, load_recorded, meet_page, meet_page_by_event  # noqa: E402
+from scraper import SwimmingArchiveScraper  # noqa: E402
+from scrape_results_page import ResultsPageScraper  # noqa: E402
+from crawl_scheduler import CrawlScheduler  # noqa: E402
+
+
+def measure(fn: Callable, repeat: int, warmup: int = 1) -> Dict:
+    """运行 fn（丢弃 warmup 次），返回耗时统计（毫秒）和最后一次返回的列表长度"""
+    result = None
+    for _ in range(warmup):
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'result_count': len(result) if isinstance(result, list) else None,
+    }
+
+
+def table_row_count(content: bytes) -> int:
+    return content.count(b'<tr')
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_single_page(base_url: str, path: str, rows: int, repeat: int) -> List[Dict]:
+    """单页测试：下载并解析、查找结果表格、提取成绩行"""
+    scraper = SwimmingArchiveScraper(base_url)
+    url = base_url + path
+    soup = scraper.fetch_page(url)
+    table = scraper.find_results_table(soup)
+    params = {'rows': rows}
+    return [
+        {'name': 'fetch_page', 'params': params, **measure(lambda: scraper.fetch_page(url), repeat)},
+        {'name': 'find_results_table', 'params': params,
+         **measure(lambda: scraper.find_results_table(soup), repeat)},
+        {'name': 'extract_table_data', 'params': params,
+         **measure(lambda: scraper.extract_table_data(table), repeat)},
+    ]
+
+
+def bench_multi_table(base_url: str, path: str, rows: int, engines: List[str], repeat: int) -> List[Dict]:
+    """多表格页面：旧的单表格提取只返回其中一个表格，extract_results 一次提取所有表格"""
+    scraper = SwimmingArchiveScraper(base_url)
+    soup = scraper.fetch_page(base_url + path)
+    content = scraper.fetch_content(base_url + path)
+    params = {'rows': rows, 'layout': 'by_event'}
+    reports = [{'name': 'extract_table_data', 'params': params,
+                **measure(lambda: scraper.extract_table_data(scraper.find_results_table(soup)), repeat)}]
+    for engine in engines:
+        reports.append({'name': 'extract_results', 'params': {**params, 'engine': engine},
+                        **measure(lambda: scraper.parse_results_with_engine(content, engine), repeat)})
+    return reports
+
+
+def bench_site(base_url: str, engines: List[str], athlete: str, club: Optional[str],
+               max_workers: int, repeat: int, site_params: Dict) -> List[Dict]:
+    """整站测试：搜索、个人最佳成绩、年份页面抓取"""
+    reports = []
+    for engine in engines:
+        scraper = SwimmingArchiveScraper(base_url, max_workers=max_workers, parser_engine=engine)
+        params = {**site_params, 'engine': engine, 'max_workers': max_workers}
+        reports.append({'name': 'search_athlete', 'params': params,
+                        **measure(lambda: scraper.search_athlete(athlete, club), repeat)})
+        reports.append({'name': 'get_personal_bests', 'params': params,
+                        **measure(lambda: scraper.get_personal_bests(athlete, club), repeat)})
+
+    # scrape_all 对替身服务器不限速，只测量抓取和解析
+    page_scraper = ResultsPageScraper(base_url, scheduler=CrawlScheduler(rate=0))
+    reports.append({'name': 'scrape_all', 'params': {**site_params, 'rate_limit': False},
+                    **measure(page_scraper.scrape_all, repeat)})
+    return reports
+
+
+def benchmark_key(report: Dict) -> str:
+    return report['name'] + ' ' + json.dumps(report['params'], sort_keys=True)
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> bool:
+    """按中位数比较两次结果，返回是否有测试变慢超过阈值"""
+    old_reports = {benchmark_key(r): r for r in old['benchmarks']}
+    regressed = False
+    print(f"\n对比 {old['meta'].get('revision')} -> {new['meta'].get('revision')}（中位数，阈值 {threshold}x）")
+    for report in new['benchmarks']:
+        key = benchmark_key(report)
+        previous = old_reports.get(key)
+        if previous is None:
+            print(f"  {key}: 新增 {report['median_ms']} ms")
+            continue
+        ratio = report['median_ms'] / previous['median_ms'] if previous['median_ms'] else float('inf')
+        flag = ''
+        if ratio > threshold:
+            flag = '  <-- 变慢'
+            regressed = True
+        print(f"  {key}: {previous['median_ms']} -> {report['median_ms']} ms ({ratio:.2f}x){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫离线基准测试")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000], help="单页测试的表格行数")
+    parser.add_argument('--meets', type=int, default=20, help="模拟网站的比赛页面数")
+    parser.add_argument('--meet-rows', type=int, default=500, help="模拟网站每个比赛页面的行数")
+    parser.add_argument('--years', type=int, default=5, help="模拟网站的年份页面数")
+    parser.add_argument('--fixtures', help="录制的页面目录（默认使用模拟网站）")
+    parser.add_argument('--latency-ms', type=float, default=0, help="替身服务器每个请求的延迟")
+    parser.add_argument('--engines', nargs='+', default=['bs4', 'lxml'], choices=['bs4', 'lxml'])
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--athlete', default='Michael')
+    parser.add_argument('--club', default='North Shore')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="将 JSON 结果写入文件")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    parser.add_argument('--compare', help="与之前保存的 JSON 结果比较")
+    parser.add_argument('--threshold', type=float, default=1.25, help="中位数变慢超过该倍数视为退化")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = load_recorded(args.fixtures)
+        site_params = {'site': 'recorded', 'pages': len(pages)}
+        # 单页测试使用录制页面中行数最多的页面
+        largest = max((path for path in pages if path != '/results.html'),
+                      key=lambda path: table_row_count(pages[path]))
+        single_pages = [(largest, table_row_count(pages[largest]))]
+    else:
+        pages = synthetic_site(meets=args.meets, meet_rows=args.meet_rows, years=args.years)
+        site_params = {'site': 'synthetic', 'meets': args.meets, 'meet_rows': args.meet_rows, 'years': args.years}
+        single_pages = []
+        for rows in args.rows:
+            # 不在 results.html 中链接，不影响整站测试
+            path = f'/bench/page-{rows}.html'
+            pages[path] = meet_page(rows, seed=rows)
+            single_pages.append((path, rows))
+        # 每个项目一个表格的页面，不在 results.html 中链接
+        multi_rows = max(args.rows)
+        pages['/bench/by-event.html'] = meet_page_by_event(multi_rows, seed=multi_rows)
+    site_params['latency_ms'] = args.latency_ms
+
+    reports = []
+    with StandInServer(pages, latency=args.latency_ms / 1000) as stand_in:
+        for path, rows in single_pages:
+            reports.extend(bench_single_page(stand_in.base_url, path, rows, args.repeat))
+        if not args.fixtures:
+            reports.extend(bench_multi_table(stand_in.base_url, '/bench/by-event.html', multi_rows,
+                                             args.engines, args.repeat))
+        reports.extend(bench_site(stand_in.base_url, args.engines, args.athlete, args.club or None,
+                                  args.max_workers, args.repeat, site_params))
+
+    output = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'benchmarks': reports,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        print(f"{'benchmark':<20} {'median ms':>10} {'min ms':>10} {'results':>8}  params")
+        for r in reports:
+            params = ', '.join(f"{k}={v}" for k, v in r['params'].items())
+            print(f"{r['name']:<20} {r['median_ms']:>10} {r['min_ms']:>10} {r['result_count']!s:>8}  {params}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, output, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+增量爬取检查点
+在 SQLite 中记录每次运行、每个年份页面的内容哈希和已输出的比赛。每处理完一个年份页面就提交一次，
+中断（崩溃或 Ctrl+C）后再次运行会继续未完成的那一轮，跳过已完成的页面；
+内容哈希未变化的年份页面不再解析，只输出新增或变化（名称、年份）的比赛。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    year TEXT NOT NULL,
+    content_hash TEXT,
+    completed_run INTEGER,
+    checked_at REAL
+);
+CREATE TABLE IF NOT EXISTS competitions (
+    download_link TEXT PRIMARY KEY,
+    year TEXT NOT NULL,
+    competition_name TEXT NOT NULL,
+    page_url TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class CrawlCheckpoint:
+    def __init__(self, path: str = "crawl_checkpoint.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立的 SQLite 连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def start_run(self) -> Tuple[int, bool]:
+        """继续上次未完成的运行，或开始新的一轮；返回 (运行编号, 是否为继续)"""
+        conn = self._connect()
+        row = conn.execute('SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1').fetchone()
+        if row:
+            return row[0], True
+        with conn:
+            cursor = conn.execute('INSERT INTO runs (started_at) VALUES (?)', (time.time(),))
+        return cursor.lastrowid, False
+
+    def finish_run(self, run_id: int):
+        conn = self._connect()
+        with conn:
+            conn.execute('UPDATE runs SET finished_at = ? WHERE id = ?', (time.time(), run_id))
+
+    def completed_pages(self, run_id: int) -> Set[str]:
+        """本轮已完成的年份页面"""
+        conn = self._connect()
+        return {row[0] for row in conn.execute('SELECT url FROM pages WHERE completed_run = ?', (run_id,))}
+
+    def page_hash(self, url: str) -> Optional[str]:
+        """上次完成时年份页面的内容哈希（从未完成时为 None）"""
+        row = self._connect().execute('SELECT content_hash FROM pages WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def changed_competitions(self, competitions: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """返回新增或名称 / 年份有变化的比赛"""
+        conn = self._connect()
+        changed = []
+        for comp in competitions:
+            row = conn.execute('SELECT year, competition_name FROM competitions WHERE download_link = ?',
+                               (comp['download_link'],)).fetchone()
+            if row is None or row != (comp['year'], comp['competition_name']):
+                changed.append(comp)
+        return changed
+
+    def complete_page(self, run_id: int, url: str, year: str, page_hash: str,
+                      competitions: List[Dict[str, str]]):
+        """在一个事务中保存年份页面的哈希和其中新增 / 变化的比赛"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO competitions (download_link, year, competition_name, page_url, first_seen, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(download_link) DO UPDATE SET '
+                'year = excluded.year, competition_name = excluded.competition_name, '
+                'page_url = excluded.page_url, updated_at = excluded.updated_at',
+                [(comp['download_link'], comp['year'], comp['competition_name'], url, now, now)
+                 for comp in competitions])
+            conn.execute(
+                'INSERT INTO pages (url, year, content_hash, completed_run, checked_at) '
+                'VALUES (?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET '
+                'year = excluded.year, content_hash = excluded.content_hash, '
+                'completed_run = excluded.completed_run, checked_at = excluded.checked_at',
+                (url, year, page_hash, run_id, now))
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        return {
+            'runs': conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0],
+            'pages': conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0],
+            'competitions': conn.execute('SELECT COUNT(*) FROM competitions').fetchone()[0],
+        }
@@ -0,0 +1,225 @@
+"""
+爬取边界（frontier）
+对页面中的链接做 URL 规范化、域名和扩展名白名单过滤，并分类为年份页面、比赛页面、成绩文件；
+只有有用且未见过的链接才会被抓取。去重基于集合；指定 state_path 时，已发现的比赛页面和成绩文件
+保存在 SQLite 中，之后的运行会跳过它们（年份页面每次运行都会重新访问，以发现新增的比赛）。
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+
+# 链接类型
+YEAR_PAGE = 'year_page'
+MEET_PAGE = 'meet_page'
+RESULT_FILE = 'result_file'
+OTHER = 'other'
+
+# 成绩文件的扩展名
+FILE_EXTENSIONS = ('.pdf', '.xls', '.xlsx', '.csv', '.txt', '.zip')
+# 视为 HTML 页面的扩展名（'' 表示无扩展名）
+PAGE_EXTENSIONS = ('', '.html', '.htm', '.php', '.asp', '.aspx')
+# 不抓取的链接
+SKIP_PREFIXES = ('#', 'mailto:', 'javascript:', 'tel:', 'data:')
+# 规范化时去掉的跟踪参数
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# 年份页面：文件名或链接文本就是年份（例如 /results/2019.html、“2019 Results”）
+YEAR_STEM_PATTERN = re.compile(r'^(?:results?[-_ ]?)?((?:19|20)\d{2})(?:[-_ ]?results?)?$', re.IGNORECASE)
+YEAR_TEXT_PATTERN = re.compile(r'^(?:results?\s*)?((?:19|20)\d{2})(?:\s*results?)?$', re.IGNORECASE)
+# 比赛页面：链接文本或路径包含这些词
+MEET_KEYWORDS = ('meet', 'champ', 'competition', 'result', 'cup', 'carnival', 'festival', 'games')
+# 导航链接文本
+NAV_TEXTS = {'home', 'back', 'about', 'about us', 'contact', 'contact us', 'news', 'login', 'search',
+             'privacy', 'terms', 'sitemap', 'top', 'snz events', 'events'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    first_seen REAL NOT NULL
+);
+"""
+
+
+def _remove_dot_segments(path: str) -> str:
+    """去掉路径中的 . 和 ..（RFC 3986 5.2.4）"""
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    result = '/'.join(output)
+    if path.endswith(('/.', '/..')):
+        result += '/'
+    return result
+
+
+def normalize_url(href: str, base: Optional[str] = None) -> Optional[str]:
+    """规范化 URL：解析相对路径，协议和主机名小写，去掉默认端口、片段和跟踪参数，查询参数排序，
+    统一百分号编码。非 http(s) 链接返回 None"""
+    href = (href or '').strip()
+    if not href or href.lower().startswith(SKIP_PREFIXES):
+        return None
+    url = urljoin(base, href) if base else href
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if port is not None and str(port) != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    path = quote(unquote(_remove_dot_segments(parts.path)), safe="/:@!$&'()*+,;=-._~") or '/'
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not key.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ''))
+
+
+def url_extension(url: str) -> str:
+    """URL 路径的扩展名（小写）"""
+    return os.path.splitext(urlsplit(url).path)[1].lower()
+
+
+def link_year(url: str, text: str = '') -> Optional[str]:
+    """链接指向年份页面时返回年份"""
+    stem = os.path.splitext(unquote(urlsplit(url).path).rstrip('/').rsplit('/', 1)[-1])[0]
+    match = YEAR_STEM_PATTERN.match(stem) or YEAR_TEXT_PATTERN.match(text.strip())
+    return match.group(1) if match else None
+
+
+class CrawlFrontier:
+    def __init__(self, allowed_domains: Iterable[str], file_extensions: Tuple[str, ...] = FILE_EXTENSIONS,
+                 state_path: Optional[str] = None,
+                 persist_kinds: Tuple[str, ...] = (MEET_PAGE, RESULT_FILE)):
+        # 允许的主机名（同时允许其子域名），可带端口
+        self.allowed_domains = {domain.lower() for domain in allowed_domains}
+        self.file_extensions = tuple(ext.lower() for ext in file_extensions)
+        self.state_path = state_path
+        self.persist_kinds = persist_kinds
+        self._lock = threading.Lock()
+        # 本次运行见过的 URL；以前运行中发现的 URL（只读）；本次新发现、待保存的 URL
+        self._seen: Set[str] = set()
+        self._known: Set[str] = set()
+        self._pending: Dict[str, str] = {}
+        self.counts: Dict[str, int] = {}
+        if state_path:
+            conn = self._connect()
+            try:
+                conn.executescript(SCHEMA)
+            finally:
+                conn.close()
+        self.begin()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.state_path, timeout=30)
+
+    def begin(self):
+        """开始新一轮爬取：清空本次运行的去重集合，重新读取已保存的 URL"""
+        with self._lock:
+            self._seen = set()
+            self._pending = {}
+            self.counts = {}
+            if self.state_path:
+                conn = self._connect()
+                try:
+                    self._known = {row[0] for row in conn.execute('SELECT url FROM frontier')}
+                finally:
+                    conn.close()
+
+    def allowed(self, url: str) -> bool:
+        """URL 的主机是否在白名单中"""
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        for domain in self.allowed_domains:
+            if parts.netloc == domain or host == domain or host.endswith('.' + domain):
+                return True
+        return False
+
+    def classify(self, url: str, text: str = '') -> str:
+        """按扩展名、文件名和链接文本判断链接类型"""
+        ext = url_extension(url)
+        if ext in self.file_extensions:
+            return RESULT_FILE
+        if ext not in PAGE_EXTENSIONS:
+            return OTHER
+        if link_year(url, text):
+            return YEAR_PAGE
+        text = text.strip().lower()
+        if text in NAV_TEXTS:
+            return OTHER
+        haystack = text + ' ' + unquote(urlsplit(url).path).lower()
+        if any(keyword in haystack for keyword in MEET_KEYWORDS):
+            return MEET_PAGE
+        return OTHER
+
+    def _count(self, key: str):
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def mark_seen(self, url: str):
+        """把 URL 标记为已见（例如入口页面），之后指向它的链接会被跳过"""
+        url = normalize_url(url)
+        if url:
+            with self._lock:
+                self._seen.add(url)
+
+    def discover(self, href: str, text: str = '', base: Optional[str] = None,
+                 kinds: Tuple[str, ...] = (YEAR_PAGE, MEET_PAGE, RESULT_FILE)) -> Optional[Tuple[str, str]]:
+        """处理页面中的一个链接：类型在 kinds 中且未见过时返回 (规范化 URL, 类型)，否则返回 None"""
+        url = normalize_url(href, base)
+        with self._lock:
+            if url is None:
+                self._count('skipped_invalid')
+                return None
+            if not self.allowed(url):
+                self._count('skipped_off_site')
+                return None
+            kind = self.classify(url, text)
+            if kind not in kinds:
+                self._count('skipped_other')
+                return None
+            if url in self._seen:
+                self._count('duplicates')
+                return None
+            self._seen.add(url)
+            if url in self._known:
+                self._count('previously_seen')
+                return None
+            if kind in self.persist_kinds:
+                self._pending[url] = kind
+            self._count(kind)
+            return url, kind
+
+    def commit(self) -> int:
+        """保存本次新发现的比赛页面和成绩文件，返回保存的数量"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if not self.state_path or not pending:
+            return 0
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('INSERT OR IGNORE INTO frontier (url, kind, first_seen) VALUES (?, ?, ?)',
+                                 [(url, kind, now) for url, kind in pending.items()])
+        finally:
+            conn.close()
+        with self._lock:
+            self._known.update(pending)
+        return len(pending)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'known': len(self._known), 'seen': len(self._seen), **self.counts}
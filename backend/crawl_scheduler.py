@@ -0,0 +1,221 @@
+"""
+爬取调度器
+对每个主机：令牌桶限制请求速率；并发上限按延迟和错误率自适应调整（AIMD：正常时加性增加，变慢或出错时乘性减少）；
+失败时指数退避（full jitter）并遵守 Retry-After。SwimmingArchiveScraper 与 ResultsPageScraper 共用同一个实例，
+对同一主机的礼貌限制是全局的。
+"""
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+
+
+# 需要重试的状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 统计近期请求速率的时间窗口（秒）
+RATE_WINDOW = 60.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    return max(parsed.timestamp() - time.time(), 0.0)
+
+
+class _HostState:
+    def __init__(self, burst: float, concurrency: float):
+        self.cond = threading.Condition()
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.limit = concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.first_request_at: Optional[float] = None
+        self.completed = deque()
+
+
+class ScheduledSession:
+    """包装 requests.Session：get() 经过调度器（可直接传给 HttpCache.fetch）"""
+
+    def __init__(self, scheduler: 'CrawlScheduler', session: requests.Session):
+        self.scheduler = scheduler
+        self.session = session
+        self.headers = session.headers
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.scheduler.request(url, lambda: self.session.get(url, **kwargs))
+
+
+class CrawlScheduler:
+    def __init__(self, rate: float = 5.0, burst: float = 5, min_concurrency: int = 1,
+                 max_concurrency: int = 4, initial_concurrency: Optional[int] = None,
+                 max_attempts: int = 3, base_backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_retry_after: float = 120.0, target_latency: float = 2.0, budget=None):
+        # rate：每个主机每秒的请求数（<= 0 表示不限速），burst：令牌桶容量
+        self.rate = rate
+        # budget：多个进程共用的请求预算（例如 work_queue.SharedRateLimiter），每次发送前调用 budget.acquire(host)
+        self.budget = budget
+        self.burst = max(burst, 1)
+        self.min_concurrency = max(min_concurrency, 1)
+        self.max_concurrency = max(max_concurrency, self.min_concurrency)
+        self.initial_concurrency = min(initial_concurrency or self.max_concurrency, self.max_concurrency)
+        self.max_attempts = max(max_attempts, 1)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        # 响应时间超过 target_latency 秒时降低并发
+        self.target_latency = target_latency
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> _HostState:
+        host = urlparse(url).netloc
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(self.burst, self.initial_concurrency)
+            return state
+
+    def wrap(self, session: requests.Session) -> ScheduledSession:
+        return ScheduledSession(self, session)
+
+    def _acquire(self, state: _HostState):
+        """等待令牌、并发名额以及 Retry-After 暂停结束"""
+        with state.cond:
+            while True:
+                now = time.monotonic()
+                if self.rate > 0:
+                    state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+                    state.refilled_at = now
+
+                wait = None
+                if now < state.paused_until:
+                    wait = state.paused_until - now
+                elif self.rate > 0 and state.tokens < 1:
+                    wait = (1 - state.tokens) / self.rate
+                elif state.in_flight >= int(state.limit):
+                    wait = None  # 等待其他请求完成时唤醒
+                else:
+                    if self.rate > 0:
+                        state.tokens -= 1
+                    state.in_flight += 1
+                    if state.first_request_at is None:
+                        state.first_request_at = now
+                    return
+                state.cond.wait(wait)
+
+    def _release(self, state: _HostState, latency: float, ok: bool):
+        """请求完成：按结果调整并发上限（AIMD）"""
+        with state.cond:
+            state.in_flight -= 1
+            state.requests += 1
+            now = time.monotonic()
+            state.completed.append(now)
+            while state.completed and state.completed[0] < now - RATE_WINDOW:
+                state.completed.popleft()
+
+            state.latency_ewma = latency if state.latency_ewma is None else 0.8 * state.latency_ewma + 0.2 * latency
+            state.error_ewma = 0.8 * state.error_ewma + (0.0 if ok else 0.2)
+            if not ok:
+                state.errors += 1
+                state.limit = max(self.min_concurrency, state.limit / 2)
+            elif latency > self.target_latency:
+                state.limit = max(self.min_concurrency, state.limit * 0.9)
+            else:
+                # 每个并发窗口增加 1
+                state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+            state.cond.notify_all()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    def request(self, url: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """发送请求（send 返回 requests.Response）
+
+        连接错误、超时以及 429 / 5xx 会退避重试，最多 max_attempts 次；最后一次仍失败时
+        抛出异常或返回该响应（由调用方 raise_for_status）。其他状态码直接返回。
+        """
+        state = self._host(url)
+        host = urlparse(url).netloc
+        for attempt in range(self.max_attempts):
+            if self.budget is not None:
+                self.budget.acquire(host)
+            self._acquire(state)
+            started = time.monotonic()
+            response = None
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                self._release(state, time.monotonic() - started, ok=False)
+                if attempt == self.max_attempts - 1:
+                    raise
+                retry_after = None
+            except BaseException:
+                self._release(state, time.monotonic() - started, ok=True)
+                raise
+            else:
+                ok = response.status_code not in RETRY_STATUS
+                self._release(state, time.monotonic() - started, ok=ok)
+                if ok or attempt == self.max_attempts - 1:
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+
+            delay = self._backoff(attempt, retry_after)
+            with state.cond:
+                state.retries += 1
+                if retry_after is not None:
+                    # 服务器要求暂停时，该主机的所有请求一起等待
+                    state.paused_until = max(state.paused_until, time.monotonic() + delay)
+            metrics.RETRIES.inc(1, host)
+            time.sleep(delay)
+        return response
+
+    def stats(self) -> Dict:
+        """各主机的请求数、错误数、当前并发上限和实际请求速率"""
+        hosts = {}
+        with self._lock:
+            items = list(self._hosts.items())
+        now = time.monotonic()
+        for host, state in items:
+            with state.cond:
+                elapsed = now - state.first_request_at if state.first_request_at is not None else 0.0
+                window = min(elapsed, RATE_WINDOW)
+                recent = sum(1 for t in state.completed if t >= now - RATE_WINDOW)
+                hosts[host] = {
+                    'requests': state.requests,
+                    'errors': state.errors,
+                    'retries': state.retries,
+                    'in_flight': state.in_flight,
+                    'concurrency_limit': round(state.limit, 2),
+                    'latency_ewma': round(state.latency_ewma, 3) if state.latency_ewma is not None else None,
+                    'error_rate': round(state.error_ewma, 3),
+                    'effective_rps': round(state.requests / elapsed, 3) if elapsed > 0 else None,
+                    'recent_rps': round(recent / window, 3) if window > 0 else None,
+                }
+        return {'rate': self.rate, 'max_concurrency': self.max_concurrency, 'hosts': hosts}
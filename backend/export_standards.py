@@ -0,0 +1,154 @@
+"""
+从前端 TypeScript 源文件生成 standards.json
+读取 data/asaStandards.ts 的 ASA_DATA 和 services/recordDataService.ts 的 AUCKLAND_SC_RECORDS 对象字面量，
+转换为 standards.py 使用的 JSON 格式。前端数据更新后重新运行本脚本；--check 只比较，不一致时退出码为 1。
+
+    python export_standards.py            # 重新生成 standards.json
+    python export_standards.py --check    # 检查 standards.json 是否与 TS 源文件一致
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+from standards import DEFAULT_PATH
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASA_SOURCE = 'data/asaStandards.ts'
+RECORDS_SOURCE = 'services/recordDataService.ts'
+
+# 与前端 getAsaStandard / getAucklandRecord 的规则一致：奥克兰纪录只有短池，9 岁及以下使用 “9” 的纪录
+ASA_GENDERS = {'Girls': 'F', 'Boys': 'M'}
+RECORD_GENDERS = {'Female': 'F', 'Male': 'M'}
+RECORD_NAME, RECORD_COURSE, RECORD_YOUNGEST_AGE = 'Auckland SC', 'SCM', 9
+
+# TS 字段名到 JSON 字段名
+KEY_NAMES = {'minAge': 'min_age', 'maxAge': 'max_age'}
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,])
+''', re.VERBOSE | re.DOTALL)
+
+
+def _tokens(source: str, pos: int) -> Iterator[Tuple[str, str]]:
+    while pos < len(source):
+        match = TOKEN_PATTERN.match(source, pos)
+        if match is None:
+            raise ValueError(f"无法解析的字符 {source[pos]!r}（位置 {pos}）")
+        pos = match.end()
+        if match.lastgroup != 'space':
+            yield match.lastgroup, match.group()
+
+
+def _string_value(token: str) -> str:
+    if token.startswith('"'):
+        return json.loads(token)
+    # 单引号字符串：去掉引号并处理转义
+    return json.loads('"' + token[1:-1].replace("\\'", "'").replace('"', '\\"') + '"')
+
+
+def parse_object_literal(source: str, name: str):
+    """解析 `const NAME ... = { ... };` 中的对象字面量（只支持字符串、数字、对象和数组）"""
+    match = re.search(r'\b(?:const|let|var)\s+' + re.escape(name) + r'\b[^=]*=\s*', source)
+    if match is None:
+        raise ValueError(f"找不到 {name}")
+    parts: List[str] = []
+    depth = 0
+    for kind, token in _tokens(source, match.end()):
+        if kind == 'string':
+            parts.append(json.dumps(_string_value(token)))
+        elif kind == 'name':
+            parts.append(json.dumps(KEY_NAMES.get(token, token)) if token not in ('true', 'false', 'null') else token)
+        elif kind == 'number':
+            parts.append(token)
+        elif token in '}]':
+            # 去掉尾随逗号
+            if parts and parts[-1] == ',':
+                parts.pop()
+            parts.append(token)
+            depth -= 1
+        else:
+            parts.append(token)
+            if token in '{[':
+                depth += 1
+        if depth == 0:
+            break
+    return json.loads(''.join(parts))
+
+
+def _read(relative_path: str, root: str) -> str:
+    with open(os.path.join(root, relative_path), encoding='utf-8') as f:
+        return f.read()
+
+
+def build(root: str = REPO_ROOT) -> Dict:
+    """从 TS 源文件生成 standards.json 的内容"""
+    return {
+        'asa_standards': {
+            'source': ASA_SOURCE,
+            'gender': ASA_GENDERS,
+            'standards': parse_object_literal(_read(ASA_SOURCE, root), 'ASA_DATA'),
+        },
+        'records': [{
+            'name': RECORD_NAME,
+            'source': RECORDS_SOURCE,
+            'course': RECORD_COURSE,
+            'gender': RECORD_GENDERS,
+            'youngest_age': RECORD_YOUNGEST_AGE,
+            'records': parse_object_literal(_read(RECORDS_SOURCE, root), 'AUCKLAND_SC_RECORDS'),
+        }],
+    }
+
+
+def differences(expected, actual, path: str = '') -> Iterator[str]:
+    """逐项比较两个 JSON 值，返回不一致的路径"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected:
+            if key not in actual:
+                yield f"{path}/{key}: standards.json 中缺少"
+            else:
+                yield from differences(expected[key], actual[key], f"{path}/{key}")
+        for key in actual:
+            if key not in expected:
+                yield f"{path}/{key}: TS 源文件中没有"
+    elif isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            yield from differences(a, b, f"{path}[{i}]")
+    elif expected != actual:
+        yield f"{path}: TS 源文件为 {json.dumps(expected, ensure_ascii=False)}，standards.json 为 {json.dumps(actual, ensure_ascii=False)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从前端 TS 源文件生成 standards.json")
+    parser.add_argument('--output', default=DEFAULT_PATH, help="standards.json 路径")
+    parser.add_argument('--root', default=REPO_ROOT, help="前端代码根目录（包含 data/ 和 services/）")
+    parser.add_argument('--check', action='store_true', help="只检查是否一致，不写入")
+    args = parser.parse_args()
+
+    data = build(args.root)
+    if args.check:
+        with open(args.output, encoding='utf-8') as f:
+            current = json.load(f)
+        diffs = list(differences(data, current))
+        for line in diffs[:20]:
+            print(line)
+        if diffs:
+            print(f"standards.json 与 TS 源文件不一致（{len(diffs)} 处），运行 python export_standards.py 重新生成")
+            sys.exit(1)
+        print("standards.json 与 TS 源文件一致")
+        return
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    print(f"已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+快速表格解析引擎
+直接使用 lxml 解析页面，只读取 <table>/<tr>/<td> 结构和 <a href> 链接，
+不构建 BeautifulSoup 对象树。输出与 SwimmingArchiveScraper.extract_table_data 完全一致。
+iter_table_rows 为流式版本：分块喂给增量解析器，逐行产出单元格并随即释放已处理的元素。
+
+直接运行本文件可对比两种引擎（以及流式提取）的输出：
+    python fast_parser.py                          # 使用 benchmarks/archive_fixtures.parity_pages，不需要输入
+    python fast_parser.py page1.html page2.html ...
+"""
+import codecs
+import sys
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+
+from bs4.dammit import EncodingDetector, UnicodeDammit
+from lxml import etree
+from lxml import html as lxml_html
+
+
+# BeautifulSoup 的 get_text() 不包含这些元素中的文本
+SKIPPED_TEXT_TAGS = {'script', 'style', 'template'}
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+# 流式解析时需要完整子树才能取文本的元素，结束前不释放其子元素
+TEXT_CAPTURE_TAGS = {'td', 'th', 'caption', *HEADING_TAGS}
+# 流式解析检测编码时最多缓冲的字节数
+SNIFF_BYTES = 4096
+
+RESULTS_TABLE_XPATHS = [
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' results-table ')]",
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' results ')]",
+    "//table[@id='results-table']",
+    "//table[@id='results']",
+]
+
+# 流式提取无法确定退回表格时（见 iter_table_rows），调用方需要整体解析页面
+FALLBACK_UNAVAILABLE = object()
+
+
+def parse_document(content: bytes):
+    """解析 HTML 字节内容，编码检测方式与 BeautifulSoup 一致；内容为空时返回 None"""
+    if not content:
+        return None
+    markup = UnicodeDammit(content, is_html=True).unicode_markup
+    if not markup:
+        return None
+    try:
+        return lxml_html.document_fromstring(markup)
+    except ValueError:
+        # 带编码声明的字符串不能直接解析，转为 UTF-8 字节并显式指定编码
+        parser = lxml_html.HTMLParser(encoding='utf-8')
+        try:
+            return lxml_html.document_fromstring(markup.encode('utf-8'), parser=parser)
+        except (etree.ParserError, ValueError):
+            return None
+    except etree.ParserError:
+        return None
+
+
+def element_text(element, separator: str = '') -> str:
+    """等价于 BeautifulSoup 的 get_text(separator, strip=True)：逐段去除空白后拼接"""
+    parts = []
+
+    def walk(node):
+        if isinstance(node.tag, str) and node.tag not in SKIPPED_TEXT_TAGS:
+            if node.text:
+                parts.append(node.text.strip())
+            for child in node:
+                walk(child)
+                if child.tail:
+                    parts.append(child.tail.strip())
+
+    walk(element)
+    if separator:
+        return separator.join(part for part in parts if part)
+    return ''.join(parts)
+
+
+def find_results_table(root):
+    """查找结果表格，选择规则与 SwimmingArchiveScraper.find_results_table 相同"""
+    if root is None:
+        return None
+
+    for xpath in RESULTS_TABLE_XPATHS:
+        tables = root.xpath(xpath)
+        if tables:
+            return tables[0]
+
+    # 返回行数最多的表格（行数相同时取第一个）
+    best_table = None
+    best_count = -1
+    for table in root.iter('table'):
+        count = sum(1 for _ in table.iter('tr'))
+        if count > best_count:
+            best_table = table
+            best_count = count
+    return best_table
+
+
+def results_tables(root) -> List[Tuple[Optional[str], object]]:
+    """按文档顺序返回所有不含嵌套表格的表格及其标题，规则与 SwimmingArchiveScraper.find_results_tables 相同"""
+    tables = []
+    heading = None
+    for element in root.iter('table', *HEADING_TAGS):
+        if element.tag != 'table':
+            heading = element_text(element, ' ') or heading
+            continue
+        if next(element.iterdescendants('table'), None) is not None:
+            continue
+        caption = next(element.iter('caption'), None)
+        caption_text = element_text(caption, ' ') if caption is not None else ''
+        tables.append((caption_text or heading, element))
+    return tables
+
+
+def header_cells(table) -> List[str]:
+    """表格第一行的单元格文本（小写）"""
+    first_row = next(table.iter('tr'), None)
+    if first_row is None:
+        return []
+    return [element_text(cell).lower() for cell in first_row.iter('th', 'td')]
+
+
+def data_cells(table) -> List[List[Tuple[str, int]]]:
+    """第一行之后各行的单元格 (文本, colspan)"""
+    rows = table.iter('tr')
+    next(rows, None)
+    return [[(element_text(cell), int(cell.get('colspan', 1))) for cell in row.iter('td', 'th')] for row in rows]
+
+
+def table_cells(table) -> Tuple[List[str], List[List[Tuple[str, int]]]]:
+    """读取表头文本和数据行单元格 (文本, colspan)，供 build_results 使用"""
+    return header_cells(table), data_cells(table)
+
+
+def sniff_encoding(head: bytes) -> str:
+    """根据页面开头检测编码：BOM、页面声明的编码、UTF-8，否则为 windows-1252（与 UnicodeDammit 的顺序相同）"""
+    _, declared = EncodingDetector.strip_byte_order_mark(head)
+    declared = declared or EncodingDetector.find_declared_encoding(head, is_html=True)
+    if declared:
+        try:
+            return codecs.lookup(declared).name
+        except LookupError:
+            pass
+    try:
+        # 末尾可能截断了一个多字节字符，不作为最终输入解码
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'windows-1252'
+
+
+def table_rank(element) -> Optional[int]:
+    """表格匹配 RESULTS_TABLE_XPATHS 中第几个选择器（不匹配时为 None）"""
+    classes = (element.get('class') or '').split()
+    if 'results-table' in classes:
+        return 0
+    if 'results' in classes:
+        return 1
+    if element.get('id') == 'results-table':
+        return 2
+    if element.get('id') == 'results':
+        return 3
+    return None
+
+
+class _StreamTable:
+    __slots__ = ('number', 'heading', 'caption', 'headers', 'cells', 'nested', 'rank', 'rows', 'buffer')
+
+    def __init__(self, number: int, heading: Optional[str], rank: Optional[int], buffer: bool):
+        self.number = number
+        self.heading = heading
+        self.caption = None
+        self.headers: Optional[List[str]] = None
+        self.cells: List[Tuple[str, int]] = []
+        self.nested = False
+        self.rank = rank
+        # 包括嵌套表格在内的 <tr> 数，与 find_results_table 的计数相同
+        self.rows = 0
+        # 退回候选表格的数据行；不再需要退回时为 None
+        self.buffer: Optional[List[List[Tuple[str, int]]]] = [] if buffer else None
+
+    def fallback_key(self) -> Tuple[int, int, int]:
+        """find_results_table 的选择顺序：先按选择器，再按行数从多到少，最后按文档顺序"""
+        if self.rank is not None:
+            return self.rank, 0, self.number
+        return len(RESULTS_TABLE_XPATHS), -self.rows, self.number
+
+
+class _StreamReader:
+    """处理增量解析器的 start / end 事件，维护当前标题和打开的表格
+
+    提供 is_results_header 时同时跟踪 find_results_table 会退回的表格：在出现结果表头之前缓存候选表格的行
+    （只保留目前最好的一个已结束的表格），出现结果表头后丢弃缓存。
+    """
+
+    def __init__(self, is_results_header: Optional[Callable[[List[str]], bool]] = None):
+        self.stack: List[_StreamTable] = []
+        self.tables = 0
+        self.heading = None
+        # 打开的 TEXT_CAPTURE_TAGS 元素数，为 0 时才释放已结束的元素
+        self.capture = 0
+        self.is_results_header = is_results_header
+        self.buffering = is_results_header is not None
+        # 已结束、不含嵌套表格的结果表格数；目前最好的退回候选表格
+        self.results_tables = 0
+        self.best: Optional[_StreamTable] = None
+
+    def process(self, events) -> Iterator[Tuple[int, Optional[str], List[str], List[Tuple[str, int]]]]:
+        stack = self.stack
+        for event, element in events:
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            if event == 'start':
+                if tag in TEXT_CAPTURE_TAGS:
+                    self.capture += 1
+                elif tag == 'tr':
+                    if stack:
+                        stack[-1].cells = []
+                elif tag == 'table':
+                    if stack:
+                        stack[-1].nested = True
+                    self.tables += 1
+                    stack.append(_StreamTable(self.tables, self.heading, table_rank(element), self.buffering))
+                continue
+
+            if tag in TEXT_CAPTURE_TAGS:
+                self.capture -= 1
+                if tag in ('td', 'th'):
+                    if stack:
+                        stack[-1].cells.append((element_text(element), int(element.get('colspan', 1))))
+                elif tag == 'caption':
+                    if stack and stack[-1].caption is None:
+                        stack[-1].caption = element_text(element, ' ')
+                else:
+                    self.heading = element_text(element, ' ') or self.heading
+            elif tag == 'tr' and stack:
+                for table in stack:
+                    table.rows += 1
+                table = stack[-1]
+                cells, table.cells = table.cells, []
+                if table.headers is None:
+                    table.headers = [text.lower() for text, _ in cells]
+                    if table.caption:
+                        table.heading = table.caption
+                    if self.buffering and self.is_results_header(table.headers):
+                        self._stop_buffering()
+                elif not table.nested:
+                    if table.buffer is not None:
+                        table.buffer.append(cells)
+                    yield table.number, table.heading, table.headers, cells
+            elif tag == 'table' and stack:
+                self._close(stack.pop())
+
+            if self.capture == 0:
+                # 删除已处理的元素及其之前的兄弟节点
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+    def _stop_buffering(self):
+        self.buffering = False
+        self.best = None
+        for table in self.stack:
+            table.buffer = None
+
+    def _close(self, table: _StreamTable):
+        if (not table.nested and table.headers is not None and self.is_results_header is not None
+                and self.is_results_header(table.headers)):
+            self.results_tables += 1
+        if table.buffer is not None and (self.best is None or table.fallback_key() < self.best.fallback_key()):
+            self.best = table
+
+    def fallback(self):
+        """页面结束后 find_results_table 会退回的表格：(表头, 数据行)；不需要退回时为 None，
+        无法在流式读取中确定（候选表格含嵌套表格，或出现过结果表头后才需要退回）时为 FALLBACK_UNAVAILABLE"""
+        if self.results_tables or not self.tables:
+            return None
+        if self.best is None or self.best.nested:
+            return FALLBACK_UNAVAILABLE
+        return self.best.headers or [], self.best.buffer
+
+
+def iter_table_rows(chunks: Iterable[bytes],
+                    is_results_header: Optional[Callable[[List[str]], bool]] = None
+                    ) -> Iterator[Tuple[int, Optional[str], List[str], List[Tuple[str, int]]]]:
+    """流式读取页面中所有表格的数据行，逐行产出 (表格序号, 标题, 表头, 单元格)
+
+    标题、表头和单元格的规则与 results_tables / header_cells / data_cells 相同；表格结束前无法知道
+    是否含有嵌套表格，因此只产出嵌套表格出现之前的行。已处理的行和页面其他部分随即从文档树中删除，
+    内存占用与页面大小无关。
+    提供 is_results_header 时，生成器的返回值为页面没有结果表格时应退回的表格（见 _StreamReader.fallback）。
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_BYTES:
+            break
+    if not head:
+        return None
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding=sniff_encoding(head))
+    reader = _StreamReader(is_results_header)
+    parser.feed(head)
+    yield from reader.process(parser.read_events())
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from reader.process(parser.read_events())
+    parser.close()
+    yield from reader.process(parser.read_events())
+    return reader.fallback()
+
+
+def extract_links(root) -> List[Tuple[str, str]]:
+    """返回页面中所有 <a href> 的 (原始链接, 链接文本)；文本与 BeautifulSoup 的 get_text(strip=True) 一致"""
+    if root is None:
+        return []
+    return [(link.get('href'), ''.join(text.strip() for text in link.itertext()))
+            for link in root.iter('a') if link.get('href') is not None]
+
+
+def compare_engines(scraper, content: bytes, url: str = '', chunk_size: int = 1000) -> Optional[str]:
+    """用两种引擎和流式提取解析同一页面，输出不一致时返回差异说明，一致时返回 None
+
+    流式提取无法确定退回表格时（iter_stream_results 返回 None），爬虫会整体解析该页面，此时不比较流式输出。
+    """
+    expected = scraper.parse_results_with_engine(content, 'bs4')
+    candidates = [('lxml', scraper.parse_results_with_engine(content, 'lxml'))]
+    streamed, tables = [], 0
+    results = scraper.iter_stream_results(content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+    while True:
+        try:
+            streamed.append(next(results))
+        except StopIteration as done:
+            tables = done.value
+            break
+    if tables is not None:
+        candidates.append(('stream', streamed))
+
+    for engine, actual in candidates:
+        if expected == actual:
+            continue
+        if len(expected) != len(actual):
+            return f"{url}: bs4 {len(expected)} 行, {engine} {len(actual)} 行"
+        for idx, (left, right) in enumerate(zip(expected, actual)):
+            if left != right:
+                return f"{url}: 第 {idx} 行不一致\n  bs4:    {left}\n  {engine}: {right}"
+        return f"{url}: {engine} 输出不一致"
+    return None
+
+
+def load_sources(sources: List[str], scraper) -> Dict[str, bytes]:
+    """读取本地 HTML 文件或 URL；没有参数时使用模拟网站和特殊布局页面"""
+    if not sources:
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+        from archive_fixtures import parity_pages
+        return parity_pages()
+
+    pages = {}
+    for source in sources:
+        if source.startswith('http://') or source.startswith('https://'):
+            pages[source] = scraper.fetch_content(source) or b''
+        else:
+            with open(source, 'rb') as f:
+                pages[source] = f.read()
+    return pages
+
+
+if __name__ == "__main__":
+    # 引擎一致性检查：参数为本地 HTML 文件或 URL，没有参数时检查内置页面
+    from scraper import SwimmingArchiveScraper
+
+    checker = SwimmingArchiveScraper()
+    failures = 0
+    for source, page_content in load_sources(sys.argv[1:], checker).items():
+        difference = compare_engines(checker, page_content, source)
+        if difference:
+            failures += 1
+            print(f"不一致 {difference}")
+        else:
+            print(f"一致 {source}")
+
+    sys.exit(1 if failures else 0)
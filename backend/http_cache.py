@@ -0,0 +1,275 @@
+"""
+磁盘 HTTP 响应缓存
+按 URL 缓存响应内容及 ETag / Last-Modified，过期后使用条件请求重新验证（304 视为命中），
+流式读取的响应（open + iter_store）边读取边写入，
+总大小超过上限时按最近最少使用（LRU）淘汰。两个爬虫可共用同一个缓存目录。
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import requests
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+"""
+
+
+class HttpCache:
+    """基于磁盘的 HTTP 缓存，元数据保存在 SQLite，响应体保存为单独文件"""
+
+    def __init__(self, cache_dir: str = ".http_cache", ttl: float = 3600,
+                 max_bytes: int = 128 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.bytes_saved = 0
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立的 SQLite 连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.db'), timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _body_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def _read_body(self, filename: str) -> Optional[bytes]:
+        try:
+            with open(self._body_path(filename), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _record_hit(self, size: int):
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += size
+
+    def fetch(self, session: requests.Session, url: str, timeout: float = 10) -> bytes:
+        """获取 URL 内容：新鲜缓存直接返回，过期缓存发送条件请求，否则完整下载
+
+        请求失败时抛出 requests 异常，与直接调用 session.get 的行为一致。
+        """
+        body, response = self.open(session, url, timeout=timeout)
+        if response is None:
+            return body
+
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' not in cache_control:
+            try:
+                self._store(url, response)
+            except (OSError, sqlite3.Error) as e:
+                # 缓存写入失败（磁盘已满、权限等）不影响本次请求
+                print(f"HTTP cache store failed for {url}: {e}")
+        return response.content
+
+    def open(self, session: requests.Session, url: str, timeout: float = 10,
+             stream: bool = False) -> Tuple[Optional[bytes], Optional[requests.Response]]:
+        """缓存命中（新鲜缓存或 304）时返回 (内容, None)，否则返回 (None, 响应)
+
+        stream 为 True 时响应体尚未读取，调用方用 iter_store 读取并写入缓存，读完后关闭响应。
+        请求失败时抛出 requests 异常。
+        """
+        conn = self._connect()
+        entry = conn.execute(
+            'SELECT filename, etag, last_modified, size, stored_at FROM entries WHERE url = ?',
+            (url,)
+        ).fetchone()
+
+        body = None
+        headers = {}
+        if entry:
+            filename, etag, last_modified, size, stored_at = entry
+            body = self._read_body(filename)
+            if body is not None:
+                now = time.time()
+                if now - stored_at < self.ttl:
+                    conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (now, url))
+                    conn.commit()
+                    self._record_hit(size)
+                    return body, None
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+
+        if stream:
+            response = session.get(url, timeout=timeout, headers=headers, stream=True)
+        else:
+            response = session.get(url, timeout=timeout, headers=headers)
+
+        if response.status_code == 304 and body is not None:
+            response.close()
+            now = time.time()
+            conn.execute(
+                'UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?',
+                (now, now, url)
+            )
+            conn.commit()
+            with self._lock:
+                self.revalidations += 1
+            self._record_hit(len(body))
+            return body, None
+
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        with self._lock:
+            self.misses += 1
+        return None, response
+
+    def iter_store(self, url: str, response: requests.Response, chunk_size: int) -> Iterator[bytes]:
+        """逐块产出流式响应的内容，同时写入缓存的临时文件；完整读完后才保存，中途停止时丢弃
+
+        响应带 no-store、超过缓存上限或写入失败时只产出内容，不保存。
+        """
+        chunks = response.iter_content(chunk_size)
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            yield from chunks
+            return
+
+        filename = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{filename}.", suffix='.tmp')
+            f = os.fdopen(fd, 'wb')
+        except OSError as e:
+            print(f"HTTP cache store failed for {url}: {e}")
+            yield from chunks
+            return
+
+        size = 0
+        completed = False
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if f is not None:
+                    try:
+                        if size > self.max_bytes:
+                            raise OSError(f"response larger than the cache ({self.max_bytes} bytes)")
+                        f.write(chunk)
+                    except OSError as e:
+                        print(f"HTTP cache store failed for {url}: {e}")
+                        f.close()
+                        f = None
+                        self._remove(tmp_path)
+                yield chunk
+            completed = True
+        finally:
+            if f is not None:
+                f.close()
+                if completed:
+                    try:
+                        self._commit(url, filename, tmp_path, size, response.headers)
+                    except (OSError, sqlite3.Error) as e:
+                        print(f"HTTP cache store failed for {url}: {e}")
+                        self._remove(tmp_path)
+                else:
+                    self._remove(tmp_path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _store(self, url: str, response: requests.Response):
+        """保存响应并在超出容量时淘汰"""
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+
+        filename = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        # 临时文件名唯一（多个进程可能共用缓存目录），写完后原子替换
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{filename}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+        self._commit(url, filename, tmp_path, len(content), response.headers)
+
+    def _commit(self, url: str, filename: str, tmp_path: str, size: int, headers):
+        """把写好的临时文件替换为缓存文件并记录元数据"""
+        try:
+            os.replace(tmp_path, self._body_path(filename))
+        except OSError:
+            self._remove(tmp_path)
+            raise
+
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (url, filename, etag, last_modified, size, stored_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, filename, headers.get('ETag'), headers.get('Last-Modified'), size, now, now)
+        )
+        conn.commit()
+        self._evict()
+
+    def _evict(self):
+        """按最近访问时间淘汰，直到总大小不超过上限"""
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for url, filename, size in conn.execute(
+                'SELECT url, filename, size FROM entries ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            victims.append((url, filename))
+            total -= size
+
+        for url, filename in victims:
+            conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            try:
+                os.remove(self._body_path(filename))
+            except OSError:
+                pass
+        conn.commit()
+
+    def stats(self) -> Dict:
+        """返回命中/未命中/节省字节数等统计"""
+        conn = self._connect()
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'bytes_saved': self.bytes_saved,
+                'entries': entries,
+                'size_bytes': size,
+            }
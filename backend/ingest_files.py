@@ -0,0 +1,275 @@
+"""
+成绩文件导入流水线
+读取 scrape_results_page.py 生成的 swimming_results.csv，下载其中的 PDF / XLS / CSV / TXT 成绩文件，
+识别格式、解析为 extract_table_data 的成绩行结构并写入本地成绩索引。
+
+各阶段通过有界队列连接：
+    下载（线程） -> 格式识别 -> 解析（进程池） -> 写入（单线程，SQLite 只有一个写入者）
+单个文件在任一阶段失败只记录错误，不影响其他文件。结束时输出各阶段吞吐量。
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional
+
+from scraper import SwimmingArchiveScraper
+from results_store import ResultsStore
+from http_cache import HttpCache
+from crawl_scheduler import CrawlScheduler
+import result_files
+
+
+# 队列结束标记
+_DONE = object()
+
+STAGES = ['download', 'detect', 'parse', 'load']
+
+
+class StageStats:
+    """单个阶段的计数（多个工作线程共享）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = 0
+        self.failed = 0
+        self.bytes = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+
+    def record(self, started: float, ok: bool = True, size: int = 0, rows: int = 0):
+        with self._lock:
+            self.busy_seconds += time.perf_counter() - started
+            if ok:
+                self.items += 1
+                self.bytes += size
+                self.rows += rows
+            else:
+                self.failed += 1
+
+    def report(self, wall_seconds: float) -> Dict:
+        return {
+            'files': self.items,
+            'failed': self.failed,
+            'bytes': self.bytes,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'files_per_sec': round(self.items / wall_seconds, 2) if wall_seconds else None,
+            'mb_per_sec': round(self.bytes / wall_seconds / 1e6, 3) if wall_seconds else None,
+        }
+
+
+class FileIngestPipeline:
+    # 工作进程崩溃时每个文件最多尝试的次数
+    PARSE_ATTEMPTS = 3
+
+    def __init__(self, store: ResultsStore, scraper: SwimmingArchiveScraper,
+                 download_workers: int = 4, parse_processes: Optional[int] = None,
+                 queue_size: int = 16):
+        self.store = store
+        # scraper 负责下载（单主机并发限制、HTTP 缓存）
+        self.scraper = scraper
+        self.download_workers = max(download_workers, 1)
+        self.parse_processes = parse_processes or os.cpu_count() or 1
+        self.queue_size = max(queue_size, 1)
+        self.stats = {stage: StageStats() for stage in STAGES}
+        self.failures: List[Dict] = []
+        self._failures_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _fail(self, job: Dict, stage: str, error: BaseException):
+        print(f"  警告：{stage} 失败 {job['download_link']}: {error}")
+        with self._failures_lock:
+            self.failures.append({
+                'url': job['download_link'],
+                'competition_name': job['competition_name'],
+                'stage': stage,
+                'error': f"{type(error).__name__}: {error}",
+            })
+
+    def _submit_parse(self, fmt: str, content: bytes, year: str) -> List[Dict]:
+        """在进程池中解析；工作进程崩溃时重建进程池并重试（同时在池中的其他文件也会收到 BrokenProcessPool），
+        多次导致崩溃的文件才算失败"""
+        for attempt in range(self.PARSE_ATTEMPTS):
+            with self._pool_lock:
+                pool = self._pool
+            try:
+                return pool.submit(result_files.parse_result_file, fmt, content, year).result()
+            except BrokenProcessPool:
+                with self._pool_lock:
+                    if self._pool is pool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        self._pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+                if attempt == self.PARSE_ATTEMPTS - 1:
+                    raise
+
+    def _download_worker(self, jobs: queue.Queue, parse_queue: queue.Queue):
+        while True:
+            job = jobs.get()
+            if job is _DONE:
+                return
+
+            started = time.perf_counter()
+            content = self.scraper.fetch_content(job['download_link'])
+            if content is None:
+                self.stats['download'].record(started, ok=False)
+                self._fail(job, 'download', IOError('fetch failed'))
+                continue
+            self.stats['download'].record(started, size=len(content))
+
+            started = time.perf_counter()
+            try:
+                fmt = result_files.detect_format(job['download_link'], content)
+            except Exception as e:
+                self.stats['detect'].record(started, ok=False)
+                self._fail(job, 'detect', e)
+                continue
+            self.stats['detect'].record(started, size=len(content))
+            # 队列已满时阻塞，下载速度不会超过解析速度太多
+            parse_queue.put((job, fmt, content))
+
+    def _parse_worker(self, parse_queue: queue.Queue, load_queue: queue.Queue):
+        while True:
+            item = parse_queue.get()
+            if item is _DONE:
+                return
+            job, fmt, content = item
+
+            started = time.perf_counter()
+            try:
+                rows = self._submit_parse(fmt, content, job['year'])
+            except Exception as e:
+                self.stats['parse'].record(started, ok=False)
+                self._fail(job, f'parse ({fmt})', e)
+                continue
+            self.stats['parse'].record(started, size=len(content), rows=len(rows))
+            load_queue.put((job, rows))
+
+    def run(self, jobs: List[Dict], progress_interval: int = 50) -> Dict:
+        """处理全部文件，返回各阶段统计"""
+        job_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        parse_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        load_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        self._pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+        downloaders = [threading.Thread(target=self._download_worker, args=(job_queue, parse_queue),
+                                        name=f'download-{i}', daemon=True)
+                       for i in range(self.download_workers)]
+        # 每个解析进程对应一个提交线程，进程池中最多 parse_processes 个文件
+        parsers = [threading.Thread(target=self._parse_worker, args=(parse_queue, load_queue),
+                                    name=f'parse-{i}', daemon=True)
+                   for i in range(self.parse_processes)]
+
+        def feed():
+            for job in jobs:
+                job_queue.put(job)
+            for _ in downloaders:
+                job_queue.put(_DONE)
+            for thread in downloaders:
+                thread.join()
+            for _ in parsers:
+                parse_queue.put(_DONE)
+            for thread in parsers:
+                thread.join()
+            load_queue.put(_DONE)
+
+        wall_started = time.perf_counter()
+        for thread in downloaders + parsers:
+            thread.start()
+        feeder = threading.Thread(target=feed, name='feed', daemon=True)
+        feeder.start()
+
+        # 写入在当前线程执行
+        loaded = 0
+        try:
+            while True:
+                item = load_queue.get()
+                if item is _DONE:
+                    break
+                job, rows = item
+                started = time.perf_counter()
+                try:
+                    self.store.replace_page(job['download_link'], rows)
+                except Exception as e:
+                    self.stats['load'].record(started, ok=False)
+                    self._fail(job, 'load', e)
+                    continue
+                self.stats['load'].record(started, rows=len(rows))
+                loaded += 1
+                if progress_interval and loaded % progress_interval == 0:
+                    print(f"[{loaded}/{len(jobs)}] 已写入 {loaded} 个文件")
+            feeder.join()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+        wall_seconds = time.perf_counter() - wall_started
+        return {
+            'files': len(jobs),
+            'wall_seconds': round(wall_seconds, 3),
+            'stages': {stage: self.stats[stage].report(wall_seconds) for stage in STAGES},
+            'failures': self.failures,
+        }
+
+
+def print_report(report: Dict):
+    """打印各阶段吞吐量"""
+    print(f"\n共 {report['files']} 个文件，用时 {report['wall_seconds']}s")
+    print(f"{'stage':<10} {'files':>6} {'failed':>7} {'rows':>8} {'MB':>8} {'busy s':>8} {'files/s':>8} {'MB/s':>7}")
+    for stage, s in report['stages'].items():
+        print(f"{stage:<10} {s['files']:>6} {s['failed']:>7} {s['rows']:>8} {s['bytes'] / 1e6:>8.2f} "
+              f"{s['busy_seconds']:>8} {s['files_per_sec']:>8} {s['mb_per_sec']:>7}")
+    failures_by_stage: Dict[str, int] = {}
+    for failure in report['failures']:
+        failures_by_stage[failure['stage']] = failures_by_stage.get(failure['stage'], 0) + 1
+    for stage, count in sorted(failures_by_stage.items()):
+        print(f"  {stage} 失败 {count} 个文件")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="下载并导入 swimming_results.csv 中的成绩文件")
+    parser.add_argument('--csv', default='swimming_results.csv', help="scrape_results_page.py 生成的 CSV")
+    parser.add_argument('--db', default='results.db', help="SQLite 索引文件路径")
+    parser.add_argument('--max-files', type=int, default=None, help="最多处理的文件数（默认全部）")
+    parser.add_argument('--download-workers', type=int, default=4, help="下载线程数")
+    parser.add_argument('--processes', type=int, default=None, help="解析进程数（默认 CPU 核数）")
+    parser.add_argument('--queue-size', type=int, default=16, help="阶段之间的队列长度")
+    parser.add_argument('--cache-dir', default='.http_cache', help="HTTP 缓存目录（为空则禁用）")
+    parser.add_argument('--rate', type=float, default=5, help="每个主机每秒最多的请求数")
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出统计")
+    args = parser.parse_args()
+
+    jobs = result_files.read_competition_files(args.csv)
+    if args.max_files is not None:
+        jobs = jobs[:args.max_files]
+    print(f"找到 {len(jobs)} 个成绩文件")
+
+    store = ResultsStore(args.db)
+    http_cache = HttpCache(args.cache_dir) if args.cache_dir else None
+    scheduler = CrawlScheduler(rate=args.rate, max_concurrency=args.download_workers)
+    scraper = SwimmingArchiveScraper(http_cache=http_cache, per_host_limit=args.download_workers,
+                                     scheduler=scheduler)
+    pipeline = FileIngestPipeline(store, scraper, download_workers=args.download_workers,
+                                  parse_processes=args.processes, queue_size=args.queue_size)
+
+    try:
+        report = pipeline.run(jobs)
+    except KeyboardInterrupt:
+        print("\n\n用户中断程序")
+        sys.exit(0)
+
+    report['crawl'] = scheduler.stats()
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
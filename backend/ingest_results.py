@@ -0,0 +1,80 @@
+"""
+成绩索引导入任务
+遍历 results.html 中的全部结果页面，用 extract_table_data 提取成绩并写入本地 SQLite 索引。
+建议以定时任务运行（例如每晚一次），API 直接查询索引而不再实时爬取。
+"""
+import argparse
+import sys
+import time
+from typing import Optional
+
+from scraper import SwimmingArchiveScraper
+from results_store import ResultsStore
+from http_cache import HttpCache
+from crawl_scheduler import CrawlScheduler
+
+
+def ingest(store: ResultsStore, scraper: SwimmingArchiveScraper,
+           max_pages: Optional[int] = None) -> int:
+    """抓取全部结果页面并写入索引，返回写入的成绩行数"""
+    results_links = scraper.fetch_result_links()
+    if results_links is None:
+        print("错误：无法访问主页面")
+        return 0
+
+    if max_pages is not None:
+        results_links = results_links[:max_pages]
+    print(f"找到 {len(results_links)} 个结果页面")
+
+    total_rows = 0
+    # 分批并发抓取，每批写入后释放内存
+    batch_size = max(scraper.max_workers, 1) * 4
+    for start in range(0, len(results_links), batch_size):
+        batch = results_links[start:start + batch_size]
+        started = time.time()
+        pages, _, failed = scraper.fetch_pages_concurrently(batch)
+        for url in batch:
+            if url in pages:
+                total_rows += store.replace_page(url, pages[url])
+        print(f"[{start + len(batch)}/{len(results_links)}] 本批 {len(pages)} 个页面，"
+              f"失败 {len(failed)} 个 ({time.time() - started:.2f}s)")
+        for url in failed:
+            print(f"  警告：无法获取页面 {url}，保留索引中的旧数据")
+
+    return total_rows
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="导入游泳成绩到本地索引")
+    parser.add_argument('--db', default='results.db', help="SQLite 索引文件路径")
+    parser.add_argument('--max-pages', type=int, default=None, help="最多导入的页面数（默认全部）")
+    parser.add_argument('--engine', default='lxml', choices=['bs4', 'lxml'], help="解析引擎")
+    parser.add_argument('--cache-dir', default='.http_cache', help="HTTP 缓存目录（为空则禁用）")
+    parser.add_argument('--rate', type=float, default=5, help="每个主机每秒最多的请求数")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    http_cache = HttpCache(args.cache_dir) if args.cache_dir else None
+    scheduler = CrawlScheduler(rate=args.rate)
+    scraper = SwimmingArchiveScraper(http_cache=http_cache, parser_engine=args.engine, scheduler=scheduler)
+
+    try:
+        total_rows = ingest(store, scraper, args.max_pages)
+    except KeyboardInterrupt:
+        print("\n\n用户中断程序")
+        sys.exit(0)
+
+    stats = store.stats()
+    print(f"\n完成！本次写入 {total_rows} 条成绩，索引共 {stats['pages']} 个页面、{stats['results']} 条成绩")
+    if http_cache:
+        cache_stats = http_cache.stats()
+        print(f"缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次，"
+              f"节省 {cache_stats['bytes_saved']} 字节")
+    for host, host_stats in scheduler.stats()['hosts'].items():
+        print(f"{host}: {host_stats['requests']} 个请求，实际 {host_stats['effective_rps']} 请求/秒，"
+              f"重试 {host_stats['retries']} 次，当前并发上限 {host_stats['concurrency_limit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+运行指标
+轻量的计数器 / 直方图（Prometheus 文本格式输出，不依赖 prometheus_client）、
+按阶段计时（同时累计到当前请求，用于 Server-Timing 响应头）以及可在运行时开关的采样分析器。
+"""
+import contextlib
+import contextvars
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+
+# 耗时直方图的桶（秒）
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 页面大小（字节）、每页成绩行数
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 20_000_000)
+ROWS_BUCKETS = (0, 10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """单调递增计数器"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """累积直方图：每组标签保存各桶计数、总和与次数"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS,
+                 labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数..., 总和, 次数]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self, *label_values: str) -> Tuple[float, int]:
+        """返回 (总和, 次数)"""
+        with self._lock:
+            state = self._values.get(label_values)
+            return (state[-2], int(state[-1])) if state else (0.0, 0)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for label_values, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}')
+            labels_inf = _format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels_inf} {int(state[-1])}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, label_values)} {int(state[-1])}')
+        return lines
+
+
+class CallbackGauge:
+    """输出时调用 fn 取值；fn 返回数值或 {标签值元组: 数值}"""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 labels: Tuple[str, ...] = (), metric_type: str = 'gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.labels = labels
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        try:
+            values = self.fn()
+        except Exception:
+            return []
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.metric_type}']
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """注册指标；同名指标已存在时返回已有的（模块重复导入时不会重复注册）"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS,
+                  labels: Tuple[str, ...] = ()) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets, labels))
+
+    def gauge_callback(self, name: str, help_text: str, fn, labels: Tuple[str, ...] = (),
+                       metric_type: str = 'gauge') -> CallbackGauge:
+        """注册回调指标；同名时替换为新的回调"""
+        metric = CallbackGauge(name, help_text, fn, labels, metric_type)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'scraper_stage_seconds', 'Time spent in each scraper stage', TIME_BUCKETS, labels=('stage',))
+PAGE_BYTES = registry.histogram('scraper_page_bytes', 'Bytes per fetched page', BYTES_BUCKETS)
+PAGE_ROWS = registry.histogram('scraper_page_rows', 'Result rows extracted per table', ROWS_BUCKETS)
+FETCH_ERRORS = registry.counter('scraper_fetch_errors_total', 'Failed page fetches')
+RETRIES = registry.counter('scraper_retries_total', 'Page fetch retries', labels=('host',))
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'API request duration', TIME_BUCKETS, labels=('endpoint', 'status'))
+
+
+# 当前请求的各阶段耗时 {阶段: [总秒数, 次数]}；线程池中的任务通过 contextvars.copy_context() 共享同一个字典
+_request_timings: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = \
+    contextvars.ContextVar('request_timings', default=None)
+_request_timings_lock = threading.Lock()
+
+
+def start_request_timing() -> contextvars.Token:
+    """开始记录当前请求的阶段耗时"""
+    return _request_timings.set({})
+
+
+def finish_request_timing(token: Optional[contextvars.Token] = None) -> Dict[str, List[float]]:
+    """结束记录并返回 {阶段: [总秒数, 次数]}"""
+    timings = _request_timings.get() or {}
+    if token is not None:
+        _request_timings.reset(token)
+    with _request_timings_lock:
+        return {stage: list(value) for stage, value in timings.items()}
+
+
+def record_stage(stage: str, seconds: float):
+    """记录一次阶段耗时（全局直方图 + 当前请求）"""
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        with _request_timings_lock:
+            total = timings.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """计时上下文：with metrics.stage('parse'): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def server_timing_header(timings: Dict[str, List[float]], total: Optional[float] = None) -> str:
+    """生成 Server-Timing 响应头；并发阶段的耗时为各任务之和，可能大于 total"""
+    parts = [f'{stage_name};dur={seconds * 1000:.1f};desc="{int(count)}x"'
+             for stage_name, (seconds, count) in sorted(timings.items())]
+    if total is not None:
+        parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class SamplingProfiler:
+    """采样分析器：后台线程每 interval 秒记录一次所有线程的调用栈，
+    输出 collapsed stack 格式（每行 “帧;帧;帧 次数”，可直接用 flamegraph.pl / speedscope 查看）"""
+
+    def __init__(self, max_stacks: int = 20000, max_depth: int = 64):
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.interval = 0.01
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.01, reset: bool = True):
+        """开始采样（已在运行时只更新采样间隔）"""
+        self.interval = max(interval, 0.001)
+        if self.running:
+            return
+        if reset:
+            self.reset()
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self._stacks = {}
+            self.samples = 0
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                self.samples += 1
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    key = self._collapse(frame)
+                    if key in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[key] = self._stacks.get(key, 0) + 1
+                    else:
+                        self._stacks['[other]'] = self._stacks.get('[other]', 0) + 1
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self._stacks.items(), key=lambda item: -item[1])
+        return ''.join(f'{stack} {count}\n' for stack, count in items)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'running': self.running,
+                'interval': self.interval,
+                'samples': self.samples,
+                'stacks': len(self._stacks),
+                'started_at': self.started_at,
+            }
+
+
+profiler = SamplingProfiler()
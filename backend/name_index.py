@@ -0,0 +1,239 @@
+"""
+运动员姓名 N-gram 索引
+对规范化后的姓名建立三元组（trigram）倒排索引，支持模糊匹配：
+“Surname, First” 顺序、长音符等变音符号（如 Māori 姓名中的 ā）以及少量拼写错误。
+"""
+import os
+import pickle
+import re
+import time
+import unicodedata
+from array import array
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from results_store import normalize_text
+
+
+NON_WORD_PATTERN = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """规范化姓名：去除变音符号、统一大小写、“Surname, First” 转为 “first surname”"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    if text.count(',') == 1:
+        surname, first = text.split(',')
+        text = f"{first} {surname}"
+    text = NON_WORD_PATTERN.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def name_trigrams(normalized: str) -> set:
+    """按单词分别生成三元组（首尾补空格），与单词顺序无关"""
+    grams = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def ids_to_bitmap(ids: Iterable[int], size: int) -> int:
+    """将条目编号列表转换为位图（Python 大整数，第 i 位表示第 i 个条目）"""
+    bits = bytearray((size + 7) // 8)
+    for entry_id in ids:
+        bits[entry_id >> 3] |= 1 << (entry_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class NameIndex:
+    """运动员姓名倒排索引，每个 (姓名, 俱乐部) 组合为一个条目
+
+    倒排表以条目编号数组保存；查询时转换为位图，用按位切片计数（bit-sliced counter）
+    一次性统计所有条目命中的三元组个数，整个过程都是大整数位运算，不逐个遍历候选条目。
+    出现频率高的三元组预先缓存位图。
+    """
+
+    # 倒排表长度超过条目数的该比例时预先缓存位图
+    DENSE_FRACTION = 1 / 128
+
+    def __init__(self):
+        # 条目：(显示姓名, 俱乐部, 规范化姓名, 规范化俱乐部)
+        self.entries: List[Tuple[str, str, str, str]] = []
+        self.gram_counts = array('H')
+        self.postings: Dict[str, array] = {}
+        self._keys: Dict[Tuple[str, str], int] = {}
+        self.built_at = 0.0
+        self._dirty = True
+        self._dense: Dict[str, int] = {}
+        self._size_bitmaps: List[Tuple[int, int]] = []
+        self._club_bitmaps: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, name: str, club: Optional[str] = None) -> Optional[int]:
+        """添加一个运动员，重复的 (姓名, 俱乐部) 只保留一个条目"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        club = club or ''
+        # 俱乐部与 results_store / snapshot 的 club 过滤使用同一规范化
+        club_normalized = normalize_text(club)
+        key = (normalized, club_normalized)
+        if key in self._keys:
+            return self._keys[key]
+
+        entry_id = len(self.entries)
+        grams = name_trigrams(normalized)
+        self.entries.append((name, club, normalized, club_normalized))
+        self.gram_counts.append(min(len(grams), 0xFFFF))
+        self._keys[key] = entry_id
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(entry_id)
+        self._dirty = True
+        return entry_id
+
+    @classmethod
+    def build(cls, athletes: Iterable[Tuple[str, Optional[str]]]) -> 'NameIndex':
+        """从 (姓名, 俱乐部) 序列构建索引"""
+        index = cls()
+        for name, club in athletes:
+            index.add(name, club)
+        index.built_at = time.time()
+        index.finalize()
+        return index
+
+    def finalize(self):
+        """生成查询用的位图：高频三元组、按三元组个数分组、按俱乐部分组"""
+        size = len(self.entries)
+        threshold = max(64, int(size * self.DENSE_FRACTION))
+        self._dense = {
+            gram: ids_to_bitmap(posting, size)
+            for gram, posting in self.postings.items()
+            if len(posting) >= threshold
+        }
+
+        by_count: Dict[int, List[int]] = {}
+        by_club: Dict[str, List[int]] = {}
+        for entry_id, (_, _, _, club_normalized) in enumerate(self.entries):
+            by_count.setdefault(self.gram_counts[entry_id], []).append(entry_id)
+            by_club.setdefault(club_normalized, []).append(entry_id)
+        # 三元组个数少的条目 Dice 相似度更高，按个数升序保存
+        self._size_bitmaps = [(count, ids_to_bitmap(ids, size)) for count, ids in sorted(by_count.items())]
+        self._club_bitmaps = {club: ids_to_bitmap(ids, size) for club, ids in by_club.items()}
+        self._dirty = False
+
+    def _gram_bitmap(self, gram: str) -> int:
+        bitmap = self._dense.get(gram)
+        if bitmap is None:
+            bitmap = ids_to_bitmap(self.postings[gram], len(self.entries))
+        return bitmap
+
+    def search(self, query: str, club: Optional[str] = None, limit: int = 10,
+               min_coverage: float = 0.6) -> List[Dict]:
+        """返回按相似度排序的候选运动员
+
+        coverage 为查询三元组在候选姓名中出现的比例；只保留 coverage >= min_coverage 的候选，
+        按 (coverage, Dice 相似度, 条目顺序) 排序。club 为俱乐部子串过滤。
+        """
+        if self._dirty:
+            self.finalize()
+
+        normalized = normalize_name(query)
+        query_grams = name_trigrams(normalized)
+        if not query_grams:
+            return []
+
+        need = max(1, int(len(query_grams) * min_coverage + 0.999999))
+        known = [gram for gram in query_grams if gram in self.postings]
+        if len(known) < need:
+            return []
+
+        club_mask = None
+        if club:
+            club_normalized = normalize_text(club)
+            club_mask = 0
+            for entry_club, bitmap in self._club_bitmaps.items():
+                if club_normalized in entry_club:
+                    club_mask |= bitmap
+            if not club_mask:
+                return []
+
+        # 按位切片计数：slices[i] 的第 j 位是条目 j 命中次数的第 i 个二进制位
+        slices: List[int] = []
+        for gram in known:
+            carry = self._gram_bitmap(gram)
+            i = 0
+            while carry:
+                if i == len(slices):
+                    slices.append(carry)
+                    break
+                slices[i], carry = slices[i] ^ carry, slices[i] & carry
+                i += 1
+
+        full = (1 << len(self.entries)) - 1
+        results = []
+        for common in range(len(known), need - 1, -1):
+            # 命中次数恰好为 common 的条目
+            matched = full if club_mask is None else club_mask
+            for i, bits in enumerate(slices):
+                matched &= bits if (common >> i) & 1 else ~bits
+                if not matched:
+                    break
+            if (common >> len(slices)) or not matched:
+                continue
+
+            coverage = common / len(query_grams)
+            for gram_count, size_bitmap in self._size_bitmaps:
+                if gram_count < common:
+                    continue
+                bucket = matched & size_bitmap
+                while bucket:
+                    lowest = bucket & -bucket
+                    entry_id = lowest.bit_length() - 1
+                    bucket ^= lowest
+                    name, entry_club, _, _ = self.entries[entry_id]
+                    results.append({
+                        'name': name,
+                        'club': entry_club,
+                        'name_norm': normalize_text(name),
+                        'score': round(coverage, 3),
+                        'similarity': round(2 * common / (len(query_grams) + gram_count), 3),
+                    })
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def save(self, path: str):
+        """保存索引（pickle 格式，只应加载本服务自己生成的文件）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'built_at': self.built_at,
+                'entries': self.entries,
+                'gram_counts': self.gram_counts,
+                'postings': self.postings,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NameIndex':
+        """加载 save() 保存的索引"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        index = cls()
+        index.built_at = data['built_at']
+        # 旧文件中的俱乐部按姓名规则规范化，加载时重新计算
+        index.entries = [(name, club, normalized, normalize_text(club))
+                         for name, club, normalized, _ in data['entries']]
+        index.gram_counts = data['gram_counts']
+        index.postings = data['postings']
+        index._keys = {(entry[2], entry[3]): i for i, entry in enumerate(index.entries)}
+        index.finalize()
+        return index
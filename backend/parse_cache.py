@@ -0,0 +1,191 @@
+"""
+解析结果缓存
+以 URL + 页面内容哈希为键缓存 extract_table_data 的结果，相同内容的页面不再重复解析。
+进程内 LRU 一级缓存 + 可选的磁盘二级缓存（gunicorn 多进程 / 重启后可复用）。
+磁盘缓存按文件修改时间近似 LRU 淘汰（命中时更新修改时间），文件数和总大小超过上限时删除最旧的文件。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+
+# 行格式版本，成绩行字段变化时递增，使旧缓存自动失效
+ROW_FORMAT_VERSION = 3
+
+# 临时文件超过该时间（秒）仍未替换，视为写入中途退出的进程留下的残留
+STALE_TMP_SECONDS = 3600
+
+ROW_FIELDS = ['name', 'event', 'distance', 'stroke', 'course', 'time', 'time_hundredths', 'splits', 'club', 'date']
+
+
+def encode_rows(rows: List[Dict]) -> bytes:
+    """将成绩行编码为紧凑格式：字段名只存一次，每行为值列表，再 zlib 压缩"""
+    payload = {
+        'fields': ROW_FIELDS,
+        'rows': [[row.get(field) for field in ROW_FIELDS] for row in rows],
+    }
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_rows(data: bytes) -> List[Dict]:
+    """解码 encode_rows 的输出"""
+    payload = json.loads(zlib.decompress(data).decode('utf-8'))
+    fields = payload['fields']
+    return [dict(zip(fields, values)) for values in payload['rows']]
+
+
+class ParsedTableCache:
+    """两级解析结果缓存"""
+
+    def __init__(self, max_entries: int = 512, cache_dir: Optional[str] = None,
+                 max_disk_entries: int = 4096, max_disk_bytes: int = 256 * 1024 * 1024,
+                 prune_interval: int = 64):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        # 磁盘缓存上限；每写入 prune_interval 个文件检查一次（扫描目录，多个进程共用目录时同样有效）
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.prune_interval = max(prune_interval, 1)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def make_key(url: str, content: bytes) -> str:
+        """缓存键：URL + 内容哈希 + 行格式版本"""
+        return ParsedTableCache.key_for_digest(url, hashlib.sha256(content).digest())
+
+    @staticmethod
+    def key_for_digest(url: str, content_digest: bytes) -> str:
+        """已知内容的 SHA-256 摘要时的缓存键（流式读取时边下载边计算），与 make_key 相同"""
+        digest = hashlib.sha256()
+        digest.update(f"v{ROW_FORMAT_VERSION}\0{url}\0".encode('utf-8'))
+        digest.update(content_digest)
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.rows")
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """查询缓存，未命中返回 None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+        if data is not None:
+            return decode_rows(data)
+
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    data = f.read()
+                rows = decode_rows(data)
+            except (OSError, ValueError, zlib.error):
+                rows = None
+            if rows is not None:
+                try:
+                    # 更新修改时间，淘汰时按最近使用排序
+                    os.utime(self._disk_path(key))
+                except OSError:
+                    pass
+                self._remember(key, data)
+                with self._lock:
+                    self.disk_hits += 1
+                return rows
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, rows: List[Dict]):
+        """写入缓存（磁盘写入使用临时文件 + 原子替换，多进程安全）"""
+        data = encode_rows(rows)
+        self._remember(key, data)
+        if self.cache_dir:
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, self._disk_path(key))
+            except OSError as e:
+                print(f"Error writing parse cache: {e}")
+                return
+            with self._lock:
+                self._writes += 1
+                due = self._writes % self.prune_interval == 1 or self.prune_interval == 1
+            if due:
+                self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """删除最久未使用的磁盘缓存文件，直到文件数和总大小都不超过上限；返回删除的文件数"""
+        if not self.cache_dir:
+            return 0
+        files = []
+        now = time.time()
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith('.rows'):
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                    elif entry.name.endswith('.tmp') and now - stat.st_mtime > STALE_TMP_SECONDS:
+                        self._remove_file(entry.path)
+        except OSError as e:
+            print(f"Error pruning parse cache: {e}")
+            return 0
+
+        total = sum(size for _, size, _ in files)
+        count = len(files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if count <= self.max_disk_entries and total <= self.max_disk_bytes:
+                break
+            # 其他进程可能已删除，同样计入
+            self._remove_file(path)
+            count -= 1
+            total -= size
+            removed += 1
+        if removed:
+            with self._lock:
+                self.disk_evictions += removed
+        return removed
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        """返回命中统计"""
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'disk_evictions': self.disk_evictions,
+            }
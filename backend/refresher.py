@@ -0,0 +1,228 @@
+"""
+后台刷新（stale-while-revalidate）
+实时爬取的结果按键缓存在进程内：请求直接返回缓存（附带获取时间），超过 fresh_ttl 的条目由后台线程重新爬取，
+用户请求不再等待上游网站。只有第一次请求某个键时才同步加载。
+- 优先级：每个键的访问热度按半衰期指数衰减，后台按热度从高到低刷新过期条目，热度过低的条目不再刷新
+- 预算：令牌桶限制每个 budget_window 秒内最多 budget 次后台刷新，避免加重归档网站负担
+- 容量：条目超过 max_entries 时淘汰热度最低的；pinned 条目（如 results.html 链接列表）不淘汰，始终保持刷新
+"""
+import sys
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ('loader', 'value', 'fetched_at', 'score', 'scored_at', 'pinned', 'refreshing',
+                 'retry_at', 'errors')
+
+    def __init__(self, loader: Callable, pinned: bool):
+        self.loader = loader
+        self.value = None
+        self.fetched_at = 0.0
+        self.score = 0.0
+        self.scored_at = time.time()
+        self.pinned = pinned
+        self.refreshing = False
+        self.retry_at = 0.0
+        self.errors = 0
+
+
+class BackgroundRefresher:
+    def __init__(self, fresh_ttl: float = 900, budget: int = 30, budget_window: float = 60,
+                 max_entries: int = 1000, half_life: float = 3600, min_score: float = 0.1,
+                 interval: float = 5):
+        self.fresh_ttl = fresh_ttl
+        self.budget = max(budget, 1)
+        self.budget_window = budget_window
+        self.max_entries = max_entries
+        self.half_life = half_life
+        # 热度低于 min_score 的条目过期后不再刷新（直到再次被请求）
+        self.min_score = min_score
+        self.interval = interval
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tokens = float(self.budget)
+        self._tokens_at = time.monotonic()
+        self.counts = {'fresh': 0, 'stale': 0, 'miss': 0, 'refreshed': 0, 'refresh_errors': 0,
+                       'budget_exhausted': 0, 'evicted': 0}
+
+    def _decayed(self, entry: _Entry, now: float) -> float:
+        return entry.score * 0.5 ** ((now - entry.scored_at) / self.half_life)
+
+    def _touch(self, entry: _Entry, now: float):
+        entry.score = self._decayed(entry, now) + 1
+        entry.scored_at = now
+
+    def get(self, key: Hashable, loader: Callable, pinned: bool = False) -> Tuple[object, float, bool]:
+        """返回 (值, 获取时间, 是否已过期)
+
+        有缓存时立即返回，过期则唤醒后台刷新；没有缓存时调用 loader 同步加载。
+        loader 抛出异常或返回 None 视为失败，同步加载失败时异常向上传递 / 返回 None 且不缓存。
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fetched_at:
+                self._touch(entry, now)
+                entry.loader = loader
+                stale = now - entry.fetched_at >= self.fresh_ttl
+                self.counts['stale' if stale else 'fresh'] += 1
+                if stale:
+                    self._wake.set()
+                self._ensure_thread()
+                return entry.value, entry.fetched_at, stale
+            self.counts['miss'] += 1
+
+        value = loader()
+        fetched_at = time.time()
+        if value is None:
+            return None, fetched_at, False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader, pinned)
+            self._touch(entry, fetched_at)
+            entry.value = value
+            entry.fetched_at = fetched_at
+            # 刚加载的条目不参与淘汰，否则缓存已满时新键的热度总是最低，立刻被淘汰
+            self._evict(keep=key)
+            self._ensure_thread()
+        return value, fetched_at, False
+
+    def mark_stale(self, key: Hashable):
+        """让条目在下一轮后台刷新中优先更新（例如只拿到了部分结果）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.fetched_at = min(entry.fetched_at, time.time() - self.fresh_ttl)
+                self._wake.set()
+
+    def _evict(self, keep: Optional[Hashable] = None):
+        """超出容量时淘汰热度最低的非 pinned 条目，keep 不淘汰（调用方持有锁）"""
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        now = time.time()
+        candidates = sorted((self._decayed(entry, now), key) for key, entry in self._entries.items()
+                            if not entry.pinned and not entry.refreshing and key != keep)
+        for _, key in candidates[:excess]:
+            del self._entries[key]
+            self.counts['evicted'] += 1
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='background-refresher', daemon=True)
+            self._thread.start()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.budget, self._tokens + (now - self._tokens_at) * self.budget / self.budget_window)
+        self._tokens_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _next_due(self) -> Optional[Tuple[Hashable, _Entry]]:
+        """热度最高的待刷新条目"""
+        now = time.time()
+        best = None
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.refreshing or not entry.fetched_at or now < entry.retry_at:
+                    continue
+                if now - entry.fetched_at < self.fresh_ttl:
+                    continue
+                # pinned 条目总是最先刷新
+                score = float('inf') if entry.pinned else self._decayed(entry, now)
+                if score < self.min_score:
+                    continue
+                if best is None or score > best[0]:
+                    best = (score, key, entry)
+            if best is None:
+                return None
+            if not self._take_token():
+                self.counts['budget_exhausted'] += 1
+                return None
+            best[2].refreshing = True
+        return best[1], best[2]
+
+    def refresh_once(self) -> bool:
+        """刷新一个到期条目，没有可刷新的条目（或预算用完）时返回 False"""
+        due = self._next_due()
+        if due is None:
+            return False
+        key, entry = due
+        try:
+            value = entry.loader()
+            error = None if value is not None else 'loader returned None'
+        except Exception as e:
+            value, error = None, str(e)
+        now = time.time()
+        with self._lock:
+            entry.refreshing = False
+            if error is None:
+                entry.value = value
+                entry.fetched_at = now
+                entry.errors = 0
+                entry.retry_at = 0.0
+                self.counts['refreshed'] += 1
+            else:
+                # 失败时保留旧值，按失败次数退避
+                entry.errors += 1
+                entry.retry_at = now + min(self.fresh_ttl, self.interval * 2 ** entry.errors)
+                self.counts['refresh_errors'] += 1
+        if error is not None:
+            print(f"Background refresh of {key!r} failed: {error}")
+        return True
+
+    def _run(self):
+        while True:
+            while self.refresh_once():
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            stale = sum(1 for entry in self._entries.values() if now - entry.fetched_at >= self.fresh_ttl)
+            return {
+                'entries': len(self._entries),
+                'stale_entries': stale,
+                'refreshing': sum(1 for entry in self._entries.values() if entry.refreshing),
+                'budget_tokens': round(self._tokens, 2),
+                **self.counts,
+            }
+
+
+def check_capacity() -> Optional[str]:
+    """缓存已满时新键应被缓存并淘汰热度最低的旧条目；有问题时返回说明，正常时返回 None"""
+    refresher = BackgroundRefresher(max_entries=2, fresh_ttl=3600)
+    loads: Dict[str, int] = {}
+
+    def loader(key):
+        def load():
+            loads[key] = loads.get(key, 0) + 1
+            return key
+        return load
+
+    for key in ('a', 'a', 'b', 'c'):
+        refresher.get(key, loader(key))
+    if set(refresher._entries) != {'a', 'c'}:
+        return f"容量为 2 时应保留 a（较热）和 c（新键），实际为 {sorted(refresher._entries)}"
+    refresher.get('c', loader('c'))
+    if loads.get('c') != 1:
+        return f"c 已缓存，再次请求不应重新加载（加载了 {loads.get('c')} 次）"
+    if refresher.counts['evicted'] != 1:
+        return f"应淘汰 1 个条目，实际为 {refresher.counts['evicted']}"
+    return None
+
+
+if __name__ == "__main__":
+    problem = check_capacity()
+    print(problem or "通过")
+    sys.exit(1 if problem else 0)
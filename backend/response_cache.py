@@ -0,0 +1,220 @@
+"""
+API 响应缓存
+按规范化的请求（路径 + 参数）缓存序列化后的 JSON 字节，命中时不再查询和序列化；
+每个响应带强 ETag，If-None-Match 匹配时返回 304；较大的响应按 Accept-Encoding 压缩（brotli / gzip），
+压缩结果随条目缓存。条目绑定数据版本（索引最近导入时间），索引更新后自动失效，另有 TTL 上限。
+安装了 orjson 时用它序列化，安装了 brotli 时支持 br 编码。
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+
+# 参数值按姓名规范化（大小写、空白不同的请求共用缓存）
+NORMALIZED_ARGS = ('name', 'club', 'q')
+
+
+def encode_json(payload) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON（键排序，相同数据的字节和 ETag 稳定）"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def make_etag(body: bytes, suffix: str = '') -> str:
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'"{digest}{suffix}"'
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Accept-Encoding 中可用的编码，按偏好排序（q=0 的排除）"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    available = (['br'] if brotli is not None else []) + ['gzip']
+    wildcard = accepted.get('*', 0.0)
+    choices = [(accepted.get(coding, wildcard), -index, coding) for index, coding in enumerate(available)]
+    return [coding for quality, _, coding in sorted(choices, reverse=True) if quality > 0]
+
+
+def etag_matches(header: Optional[str], etags: List[str]) -> bool:
+    """If-None-Match 使用弱比较（忽略 W/ 前缀）"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in header.split(',')}
+    return any(etag in candidates for etag in etags)
+
+
+class CachedPayload:
+    __slots__ = ('body', 'etag', 'version', 'expires_at', 'variants', 'compressible', 'cached')
+
+    def __init__(self, body: bytes, version, expires_at: float, compressible: bool):
+        self.body = body
+        self.etag = make_etag(body)
+        self.version = version
+        self.expires_at = expires_at
+        self.compressible = compressible
+        # 是否仍在缓存中（压缩变体的大小计入缓存总量）
+        self.cached = False
+        # 编码 -> (压缩后的字节, ETag)
+        self.variants: Dict[str, Tuple[bytes, str]] = {}
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body, _ in self.variants.values())
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl: float = 60,
+                 max_age: int = 0, compress_min_bytes: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Cache-Control 的 max-age；为 0 时客户端每次都带 ETag 重新验证
+        self.max_age = max_age
+        self.compress_min_bytes = compress_min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries: 'OrderedDict[Hashable, CachedPayload]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'not_modified': 0, 'uncacheable': 0}
+        self.bytes_saved = {'not_modified': 0, 'compression': 0}
+
+    @staticmethod
+    def make_key(path: str, args) -> Tuple:
+        """缓存键：路径 + 排序后的参数，姓名类参数统一大小写和空白"""
+        items = []
+        for key in sorted(set(args.keys())):
+            values = args.getlist(key) if hasattr(args, 'getlist') else [args[key]]
+            if key in NORMALIZED_ARGS:
+                values = [' '.join(value.lower().split()) for value in values]
+            items.append((key, tuple(values)))
+        return (path, tuple(items))
+
+    def get(self, key: Hashable, version) -> Optional[CachedPayload]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.version != version or entry.expires_at <= now):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counts['hits'] += 1
+            return entry
+
+    def put(self, key: Hashable, payload, version, store: bool = True) -> CachedPayload:
+        """序列化 payload；store 为 False（例如部分结果）时只生成条目不缓存"""
+        body = encode_json(payload)
+        entry = CachedPayload(body, version, time.time() + self.ttl, len(body) >= self.compress_min_bytes)
+        if not store or self.max_entries <= 0:
+            with self._lock:
+                self.counts['uncacheable'] += 1
+            return entry
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            entry.cached = True
+            self._bytes += entry.size()
+            self._evict()
+        return entry
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.cached = False
+            self._bytes -= entry.size()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            entry.cached = False
+            self._bytes -= entry.size()
+
+    def _compress(self, body: bytes, coding: str) -> bytes:
+        if coding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _variant(self, entry: CachedPayload, coding: str) -> Tuple[bytes, str]:
+        variant = entry.variants.get(coding)
+        if variant is None:
+            compressed = self._compress(entry.body, coding)
+            variant = (compressed, make_etag(entry.body, '-' + coding))
+            with self._lock:
+                if coding not in entry.variants:
+                    entry.variants[coding] = variant
+                    if entry.cached:
+                        self._bytes += len(compressed)
+                        self._evict()
+        return variant
+
+    def render(self, entry: CachedPayload, accept_encoding: Optional[str] = None,
+               if_none_match: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        """选择编码并处理条件请求，返回 (状态码, 响应体, 响应头)"""
+        body, etag, coding = entry.body, entry.etag, None
+        if entry.compressible:
+            for candidate in accepted_encodings(accept_encoding):
+                compressed, compressed_etag = self._variant(entry, candidate)
+                if len(compressed) < len(entry.body):
+                    body, etag, coding = compressed, compressed_etag, candidate
+                break
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'public, max-age={self.max_age}' if self.max_age > 0 else 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        all_etags = [entry.etag] + [variant_etag for _, variant_etag in entry.variants.values()]
+        if etag_matches(if_none_match, all_etags):
+            with self._lock:
+                self.counts['not_modified'] += 1
+                self.bytes_saved['not_modified'] += len(body)
+            return 304, b'', headers
+        if coding:
+            headers['Content-Encoding'] = coding
+            with self._lock:
+                self.bytes_saved['compression'] += len(entry.body) - len(body)
+        return 200, body, headers
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counts['hits'] + self.counts['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                **self.counts,
+                'hit_rate': round(self.counts['hits'] / lookups, 4) if lookups else None,
+                'bytes_saved': dict(self.bytes_saved),
+                'encoder': 'orjson' if orjson is not None else 'json',
+                'encodings': (['br'] if brotli is not None else []) + ['gzip'],
+            }
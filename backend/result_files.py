@@ -0,0 +1,311 @@
+"""
+比赛成绩文件解析
+识别下载文件的格式（PDF / XLS / XLSX / CSV / TXT / HTML，以及包含这些文件的 ZIP），
+并解析为与 extract_table_data 相同结构的成绩行。
+函数均为模块级函数，可在进程池中执行。
+
+PDF 需要 pdfminer.six，XLS 需要 xlrd，XLSX 需要 openpyxl（均为可选依赖）。
+"""
+import csv
+import io
+import re
+import zipfile
+from typing import List, Dict, Optional, Tuple
+
+try:
+    from pdfminer.high_level import extract_text as pdf_extract_text
+except ImportError:  # pdfminer.six 为可选依赖
+    pdf_extract_text = None
+
+try:
+    import xlrd
+except ImportError:  # xlrd 为可选依赖
+    xlrd = None
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl 为可选依赖
+    openpyxl = None
+
+from scraper import SwimmingArchiveScraper
+from crawl_frontier import FILE_EXTENSIONS, normalize_url
+
+# 表头中出现这些词时认为是表头行
+HEADER_KEYWORDS = ('name', 'swimmer', 'athlete')
+
+# 文本成绩（Hy-Tek Meet Manager 等导出格式）
+EVENT_LINE_PATTERN = re.compile(r'^\s*#?\s*Event\s+\d+\s+(?P<title>.+?)\s*$', re.IGNORECASE)
+RESULT_LINE_PATTERN = re.compile(
+    r'^\s*\*?\d+\s+'                                   # 名次
+    r'(?P<name>[^\d\s][^\d]*?)'                        # 姓名
+    r'(?:\s+(?P<age>\d{1,2})\s+|\s{2,})'               # 年龄或列间距
+    r'(?P<club>[^\d\s].*?)\s+'                         # 俱乐部
+    r'(?:(?:NT|NS|[xX]?[\d:.]+)\s+)?'                  # 报名成绩
+    r'(?P<time>[xX]?(?:\d+:)?\d{1,2}\.\d{2})[A-Za-z*]*'  # 决赛成绩（允许 q、J 等标记）
+    r'(?:\s+\d{1,3})?\s*$'                             # 积分
+)
+DISTANCE_UNIT_PATTERN = re.compile(r'\b(\d+)\s*(?:SC|LC)?\s*(?:Meters?|Metres?|M)\b', re.IGNORECASE)
+LONG_COURSE_PATTERN = re.compile(r'\bLCM?\b|long course', re.IGNORECASE)
+SHORT_COURSE_PATTERN = re.compile(r'\bSCM?\b|short course', re.IGNORECASE)
+
+# ZIP 解压后的总大小上限（防止压缩炸弹）
+ZIP_MAX_BYTES = 256 * 1024 * 1024
+
+# 工作进程中复用的解析器（build_results / parse_event 不依赖网络状态）
+_scraper: Optional[SwimmingArchiveScraper] = None
+
+
+class UnsupportedFormat(Exception):
+    """无法解析的文件格式或缺少可选依赖"""
+
+
+def _get_scraper() -> SwimmingArchiveScraper:
+    global _scraper
+    if _scraper is None:
+        _scraper = SwimmingArchiveScraper()
+    return _scraper
+
+
+def _url_path(url: str) -> str:
+    return url.lower().split('?', 1)[0].split('#', 1)[0]
+
+
+def detect_format(url: str, content: bytes) -> str:
+    """根据文件头识别格式，无法识别时参考扩展名；返回 pdf / xls / xlsx / zip / html / csv / txt"""
+    head = content[:1024]
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if head.startswith(b'\xd0\xcf\x11\xe0'):
+        return 'xls'
+    if head.startswith(b'PK\x03\x04'):
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                if 'xl/workbook.xml' in archive.namelist():
+                    return 'xlsx'
+            return 'zip'
+        except zipfile.BadZipFile:
+            raise UnsupportedFormat('corrupt zip archive')
+
+    # 很多 .xls 实际上是 HTML 表格
+    lowered = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if lowered.startswith(b'<') and (b'<html' in lowered or b'<table' in lowered or b'<!doctype' in lowered):
+        return 'html'
+
+    path = _url_path(url)
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith('.txt'):
+        return 'txt'
+    if path.endswith(FILE_EXTENSIONS):
+        # 扩展名与内容不符（例如 .pdf 实际是文本），按文本内容判断
+        text = decode_text(head)
+        if text.count(',') >= 3 and any(keyword in text.lower() for keyword in HEADER_KEYWORDS):
+            return 'csv'
+        return 'txt'
+    raise UnsupportedFormat(f'unknown file type: {url}')
+
+
+def decode_text(content: bytes) -> str:
+    """按 UTF-8 解码，失败时退回 cp1252"""
+    try:
+        return content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return content.decode('cp1252', errors='replace')
+
+
+def table_rows_to_results(rows: List[List[str]]) -> List[Dict]:
+    """表格行（CSV / 电子表格）转换为成绩行：在前 20 行中查找表头"""
+    rows = [[cell.strip() for cell in row] for row in rows if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header_idx = 0
+    for i, row in enumerate(rows[:20]):
+        if any(keyword in cell.lower() for cell in row for keyword in HEADER_KEYWORDS):
+            header_idx = i
+            break
+    headers = [cell.lower() for cell in rows[header_idx]]
+    data_rows = [[(cell, 1) for cell in row] for row in rows[header_idx + 1:]]
+    return _get_scraper().build_results(headers, data_rows)
+
+
+def text_event_title(title: str) -> str:
+    """将 “50 SC Meter Freestyle” 之类的项目名改写为 parse_event 能识别的 “50m Freestyle”"""
+    return DISTANCE_UNIT_PATTERN.sub(lambda m: f"{m.group(1)}m", title)
+
+
+def parse_text_results(text: str) -> List[Dict]:
+    """解析文本格式成绩（按项目分组的定宽文本，Hy-Tek 导出的 TXT / PDF 均为此格式），跳过接力项目"""
+    headers = ['name', 'event', 'time', 'club']
+    data_rows = []
+    titles = []
+    title = None
+    for line in text.splitlines():
+        event_match = EVENT_LINE_PATTERN.match(line)
+        if event_match:
+            title = event_match.group('title')
+            if 'relay' in title.lower():
+                title = None
+            continue
+        if title is None:
+            continue
+        match = RESULT_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        data_rows.append([
+            (match.group('name').strip(), 1),
+            (text_event_title(title), 1),
+            (match.group('time').lstrip('xX'), 1),
+            (match.group('club').strip(), 1),
+        ])
+        titles.append(title)
+
+    results = _get_scraper().build_results(headers, data_rows)
+    # build_results 会跳过空行，这里所有行都有姓名和成绩，与 titles 一一对应
+    for result, raw_title in zip(results, titles):
+        # 项目名中明确写了长池 / 短池时以此为准
+        if LONG_COURSE_PATTERN.search(raw_title):
+            result['course'] = 'LCM'
+        elif SHORT_COURSE_PATTERN.search(raw_title):
+            result['course'] = 'SCM'
+    return results
+
+
+def parse_csv(content: bytes) -> List[Dict]:
+    text = decode_text(content)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return table_rows_to_results(list(csv.reader(io.StringIO(text), dialect)))
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def parse_xls(content: bytes) -> List[Dict]:
+    if xlrd is None:
+        raise UnsupportedFormat('xls requires xlrd')
+    book = xlrd.open_workbook(file_contents=content)
+    results = []
+    for sheet in book.sheets():
+        rows = [[_cell_text(value) for value in sheet.row_values(i)] for i in range(sheet.nrows)]
+        results.extend(table_rows_to_results(rows))
+    return results
+
+
+def parse_xlsx(content: bytes) -> List[Dict]:
+    if openpyxl is None:
+        raise UnsupportedFormat('xlsx requires openpyxl')
+    book = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    results = []
+    try:
+        for sheet in book.worksheets:
+            rows = [[_cell_text(value) for value in row] for row in sheet.iter_rows(values_only=True)]
+            results.extend(table_rows_to_results(rows))
+    finally:
+        book.close()
+    return results
+
+
+def parse_pdf(content: bytes) -> List[Dict]:
+    if pdf_extract_text is None:
+        raise UnsupportedFormat('pdf requires pdfminer.six')
+    return parse_text_results(pdf_extract_text(io.BytesIO(content)))
+
+
+def parse_zip(content: bytes) -> List[Dict]:
+    """逐个解析 ZIP 中的成绩文件并合并成绩行；无法识别的文件和嵌套的 ZIP 跳过"""
+    results = []
+    parsed = 0
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+        if sum(info.file_size for info in members) > ZIP_MAX_BYTES:
+            raise UnsupportedFormat(f'zip archive larger than {ZIP_MAX_BYTES} bytes when extracted')
+        for info in members:
+            data = archive.read(info)
+            try:
+                fmt = detect_format(info.filename, data)
+                if fmt == 'zip':
+                    continue
+                results.extend(parse_result_file(fmt, data))
+            except UnsupportedFormat:
+                continue
+            parsed += 1
+    if not parsed:
+        raise UnsupportedFormat('zip archive without result files')
+    return results
+
+
+def parse_result_file(fmt: str, content: bytes, year: str = '') -> List[Dict]:
+    """解析一个成绩文件（在工作进程中执行）；没有日期的成绩行以比赛年份填充"""
+    if fmt == 'pdf':
+        results = parse_pdf(content)
+    elif fmt == 'xls':
+        results = parse_xls(content)
+    elif fmt == 'xlsx':
+        results = parse_xlsx(content)
+    elif fmt == 'csv':
+        results = parse_csv(content)
+    elif fmt == 'txt':
+        results = parse_text_results(decode_text(content))
+    elif fmt == 'html':
+        results = _get_scraper().parse_results_with_engine(content, 'lxml')
+    elif fmt == 'zip':
+        results = parse_zip(content)
+    else:
+        raise UnsupportedFormat(fmt)
+
+    for result in results:
+        if not result['date']:
+            result['date'] = year
+    return results
+
+
+def is_result_file(url: str) -> bool:
+    """链接是否指向成绩文件"""
+    return _url_path(url).endswith(FILE_EXTENSIONS)
+
+
+def read_competition_files(csv_path: str) -> List[Dict[str, str]]:
+    """读取 scrape_results_page.py 生成的 CSV，返回去重后的成绩文件链接
+    （增量模式会追加变化的比赛，同一链接以最后一行为准，顺序按第一次出现）"""
+    jobs: Dict[str, Dict[str, str]] = {}
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            # 按规范化 URL 去重（旧 CSV 中同一文件可能有多种写法）
+            url = normalize_url(row.get('download_link') or '')
+            if not url or not is_result_file(url):
+                continue
+            jobs[url] = {
+                'year': (row.get('year') or '').strip(),
+                'competition_name': (row.get('competition_name') or '').strip(),
+                'download_link': url,
+            }
+    return list(jobs.values())
+
+
+def parse_file_locally(path: str) -> Tuple[str, List[Dict]]:
+    """解析本地文件，返回 (格式, 成绩行)"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    fmt = detect_format(path, content)
+    return fmt, parse_result_file(fmt, content)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # 用法：python result_files.py 文件1 [文件2 ...]
+    for file_path in sys.argv[1:]:
+        file_format, rows = parse_file_locally(file_path)
+        print(f"{file_path}: {file_format}, {len(rows)} 条成绩")
+        for row in rows[:5]:
+            print("  " + json.dumps(row, ensure_ascii=False))
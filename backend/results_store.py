@@ -0,0 +1,531 @@
+"""
+本地成绩索引
+将 extract_table_data 提取出的成绩行持久化到 SQLite，供 API 毫秒级查询
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+import time_codec
+
+
+RESULT_COLUMNS = ['name', 'event', 'distance', 'stroke', 'course', 'time', 'splits', 'club', 'date']
+
+# 索引格式版本（PRAGMA user_version）：1 = 旧索引的 time_hundredths 已回填
+SCHEMA_VERSION = 1
+
+# 数值列，查询结果中保留 None 而不是转换为空字符串
+NUMERIC_COLUMNS = ['time_hundredths']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    source_url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    event TEXT,
+    distance TEXT,
+    stroke TEXT,
+    course TEXT,
+    time TEXT,
+    time_hundredths INTEGER,
+    splits TEXT,
+    club TEXT,
+    club_norm TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_name ON results (name_norm);
+CREATE INDEX IF NOT EXISTS idx_results_club ON results (club_norm);
+CREATE INDEX IF NOT EXISTS idx_results_event ON results (distance, stroke, course);
+CREATE INDEX IF NOT EXISTS idx_results_source ON results (source_url);
+
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS personal_bests (
+    name_norm TEXT NOT NULL,
+    club_norm TEXT NOT NULL,
+    distance TEXT NOT NULL,
+    stroke TEXT NOT NULL,
+    course TEXT NOT NULL,
+    name TEXT,
+    club TEXT,
+    event TEXT,
+    time TEXT,
+    time_hundredths INTEGER NOT NULL,
+    splits TEXT,
+    date TEXT,
+    source_url TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (name_norm, club_norm, distance, stroke, course)
+);
+CREATE INDEX IF NOT EXISTS idx_pb_updated ON personal_bests (updated_at);
+
+-- 被删除的 PB（重新导入后没有成绩的键），供轮询接口告知客户端删除
+CREATE TABLE IF NOT EXISTS pb_deletions (
+    name_norm TEXT NOT NULL,
+    club_norm TEXT NOT NULL,
+    distance TEXT NOT NULL,
+    stroke TEXT NOT NULL,
+    course TEXT NOT NULL,
+    name TEXT,
+    club TEXT,
+    event TEXT,
+    deleted_at REAL NOT NULL,
+    PRIMARY KEY (name_norm, club_norm, distance, stroke, course)
+);
+CREATE INDEX IF NOT EXISTS idx_pb_deletions_at ON pb_deletions (deleted_at);
+
+-- 有 PB 的不重复姓名：子串匹配只扫描这张小表，再按 PB 主键查找
+CREATE TABLE IF NOT EXISTS pb_names (
+    name_norm TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+# 加入 time_hundredths 和 PB 表之前的索引格式，用于检查升级路径
+LEGACY_SCHEMA = """
+CREATE TABLE results (
+    id INTEGER PRIMARY KEY,
+    source_url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    event TEXT,
+    distance TEXT,
+    stroke TEXT,
+    course TEXT,
+    time TEXT,
+    splits TEXT,
+    club TEXT,
+    club_norm TEXT,
+    date TEXT
+);
+CREATE TABLE pages (
+    url TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+"""
+
+# 新成绩更快时才覆盖已有 PB（主键查找，每条成绩 O(1)）
+PB_UPSERT_SQL = """
+INSERT INTO personal_bests (name_norm, club_norm, distance, stroke, course, name, club, event,
+                            time, time_hundredths, splits, date, source_url, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name_norm, club_norm, distance, stroke, course) DO UPDATE SET
+    name = excluded.name,
+    club = excluded.club,
+    event = excluded.event,
+    time = excluded.time,
+    time_hundredths = excluded.time_hundredths,
+    splits = excluded.splits,
+    date = excluded.date,
+    source_url = excluded.source_url,
+    updated_at = excluded.updated_at
+WHERE excluded.time_hundredths < personal_bests.time_hundredths
+"""
+
+PB_COLUMNS = ['name', 'event', 'distance', 'stroke', 'course', 'time', 'time_hundredths',
+              'splits', 'club', 'date', 'source_url', 'updated_at']
+
+# 记录被删除的 PB；之后同一键又有了 PB 时，轮询接口以 PB 表为准（见 personal_bests_changed_since）
+PB_TOMBSTONE_SQL = """
+INSERT OR REPLACE INTO pb_deletions (name_norm, club_norm, distance, stroke, course, name, club, event, deleted_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """统一大小写和空白，用于姓名/俱乐部匹配"""
+    if not value:
+        return ''
+    return ' '.join(value.lower().split())
+
+
+class ResultsStore:
+    """基于 SQLite 的成绩存储，按页面 URL 整页替换写入"""
+
+    def __init__(self, db_path: str = "results.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接（gunicorn 多线程下 sqlite 连接不能共享）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """为旧版本索引补充新增的列并回填数据（与调用方的 commit 在同一个事务中）"""
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(results)')}
+        if 'time_hundredths' not in columns:
+            conn.execute('ALTER TABLE results ADD COLUMN time_hundredths INTEGER')
+
+        # 新增列之前导入的成绩（以及已加列但未回填的索引）按 time 回填；必须在 PB 回填之前完成
+        if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            self._backfill_hundredths(conn)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+        # 旧索引中已有成绩但尚无 PB 表数据时，全量生成一次
+        has_pbs = conn.execute('SELECT 1 FROM personal_bests LIMIT 1').fetchone()
+        has_results = conn.execute('SELECT 1 FROM results LIMIT 1').fetchone()
+        if has_results and not has_pbs:
+            self._rebuild_personal_bests(conn)
+        elif has_pbs and not conn.execute('SELECT 1 FROM pb_names LIMIT 1').fetchone():
+            conn.execute('INSERT OR IGNORE INTO pb_names (name_norm) SELECT DISTINCT name_norm FROM personal_bests')
+
+    def _backfill_hundredths(self, conn: sqlite3.Connection, batch_size: int = 10000):
+        """按 id 分批计算 time_hundredths 为空的成绩"""
+        last_id = 0
+        while True:
+            batch = conn.execute(
+                "SELECT id, time FROM results WHERE id > ? AND time_hundredths IS NULL AND time != '' "
+                'ORDER BY id LIMIT ?',
+                (last_id, batch_size)
+            ).fetchall()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            conn.executemany('UPDATE results SET time_hundredths = ? WHERE id = ?', [
+                (hundredths, row_id)
+                for (row_id, _), hundredths in zip(batch, time_codec.encode_times(row[1] for row in batch))
+                if hundredths is not None
+            ])
+
+    def replace_page(self, url: str, rows: Iterable[Dict]) -> int:
+        """写入一个页面的全部成绩（先删除该页面旧数据）"""
+        conn = self._connect()
+        records = [
+            (
+                url,
+                row.get('name', ''),
+                normalize_text(row.get('name')),
+                row.get('event', ''),
+                row.get('distance', ''),
+                row.get('stroke', ''),
+                row.get('course', ''),
+                row.get('time', ''),
+                row.get('time_hundredths'),
+                row.get('splits', ''),
+                row.get('club', ''),
+                normalize_text(row.get('club')),
+                row.get('date', ''),
+            )
+            for row in rows
+        ]
+        with conn:
+            # 该页面旧成绩对应的 PB 键；重新导入后这些键的 PB 可能来自已删除的成绩，需要重新计算
+            old_keys = conn.execute(
+                'SELECT DISTINCT name_norm, club_norm, distance, stroke, course FROM results '
+                'WHERE source_url = ? AND time_hundredths IS NOT NULL',
+                (url,)
+            ).fetchall()
+            conn.execute('DELETE FROM results WHERE source_url = ?', (url,))
+            conn.executemany(
+                'INSERT INTO results (source_url, name, name_norm, event, distance, stroke, course, '
+                'time, time_hundredths, splits, club, club_norm, date) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                records
+            )
+            now = time.time()
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (url, row_count, ingested_at) VALUES (?, ?, ?)',
+                (url, len(records), now)
+            )
+            self._recompute_personal_bests(conn, [tuple(key) for key in old_keys], now)
+            self._update_personal_bests(conn, records, now)
+        return len(records)
+
+    def _update_personal_bests(self, conn: sqlite3.Connection, records: List[tuple], now: float):
+        """用新写入的成绩增量更新 PB 表"""
+        rows = [
+            (name_norm, club_norm, distance, stroke, course, name, club, event,
+             time_str, hundredths, splits, date, url, now)
+            for (url, name, name_norm, event, distance, stroke, course, time_str, hundredths,
+                 splits, club, club_norm, date) in records
+            if hundredths is not None
+        ]
+        conn.executemany(PB_UPSERT_SQL, rows)
+        conn.executemany('INSERT OR IGNORE INTO pb_names (name_norm) VALUES (?)',
+                         [(name_norm,) for name_norm in {row[0] for row in rows}])
+
+    def _recompute_personal_bests(self, conn: sqlite3.Connection, keys: List[tuple], now: float):
+        """按成绩表重新计算指定 (姓名, 俱乐部, 距离, 泳姿, 泳池) 的 PB，没有成绩的键删除
+
+        PB 没有变化时保留原来的 updated_at，变化时更新为 now（轮询接口可以看到更正后的 PB）；
+        删除的 PB 记入 pb_deletions，轮询接口返回 deleted 为 true 的记录。
+        """
+        for key in keys:
+            best = conn.execute(
+                'SELECT name, club, event, time, time_hundredths, splits, date, source_url '
+                'FROM results INDEXED BY idx_results_name '
+                'WHERE name_norm = ? AND club_norm = ? AND distance = ? AND stroke = ? AND course = ? '
+                'AND time_hundredths IS NOT NULL ORDER BY time_hundredths, id LIMIT 1',
+                key
+            ).fetchone()
+            current = conn.execute(
+                'SELECT name, club, event, time, time_hundredths, splits, date, source_url FROM personal_bests '
+                'WHERE name_norm = ? AND club_norm = ? AND distance = ? AND stroke = ? AND course = ?',
+                key
+            ).fetchone()
+            if best is None:
+                if current is not None:
+                    conn.execute(
+                        'DELETE FROM personal_bests '
+                        'WHERE name_norm = ? AND club_norm = ? AND distance = ? AND stroke = ? AND course = ?',
+                        key
+                    )
+                    conn.execute(PB_TOMBSTONE_SQL, tuple(key) + (current['name'], current['club'], current['event'], now))
+                    conn.execute(
+                        'DELETE FROM pb_names WHERE name_norm = ? '
+                        'AND NOT EXISTS (SELECT 1 FROM personal_bests WHERE name_norm = ?)',
+                        (key[0], key[0])
+                    )
+            elif current is None or tuple(best) != tuple(current):
+                conn.execute(
+                    'INSERT OR REPLACE INTO personal_bests (name_norm, club_norm, distance, stroke, course, '
+                    'name, club, event, time, time_hundredths, splits, date, source_url, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    tuple(key) + tuple(best) + (now,)
+                )
+
+    def _rebuild_personal_bests(self, conn: sqlite3.Connection):
+        """根据成绩表全量重建 PB 表；重建后不再存在的 PB 记入 pb_deletions"""
+        now = time.time()
+        conn.execute('DROP TABLE IF EXISTS temp.old_personal_bests')
+        conn.execute('CREATE TEMP TABLE old_personal_bests AS '
+                     'SELECT name_norm, club_norm, distance, stroke, course, name, club, event FROM personal_bests')
+        conn.execute('DELETE FROM personal_bests')
+        conn.execute('DELETE FROM pb_names')
+        cursor = conn.execute(
+            'SELECT source_url, name, name_norm, event, distance, stroke, course, time, time_hundredths, '
+            'splits, club, club_norm, date FROM results WHERE time_hundredths IS NOT NULL ORDER BY id'
+        )
+        while True:
+            batch = cursor.fetchmany(10000)
+            if not batch:
+                break
+            self._update_personal_bests(conn, [tuple(row) for row in batch], now)
+        conn.execute(
+            'INSERT OR REPLACE INTO pb_deletions (name_norm, club_norm, distance, stroke, course, name, club, event, '
+            'deleted_at) SELECT o.*, ? FROM temp.old_personal_bests o WHERE NOT EXISTS ('
+            'SELECT 1 FROM personal_bests p WHERE p.name_norm = o.name_norm AND p.club_norm = o.club_norm '
+            'AND p.distance = o.distance AND p.stroke = o.stroke AND p.course = o.course)',
+            (now,)
+        )
+        conn.execute('DROP TABLE temp.old_personal_bests')
+
+    def rebuild_personal_bests(self):
+        """全量重建 PB 表（例如修正了已导入的成绩之后）"""
+        conn = self._connect()
+        with conn:
+            self._rebuild_personal_bests(conn)
+
+    def personal_bests(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
+        """查询运动员 PB：姓名按子串匹配，与 search 和实时爬取（search_athlete）的规则相同
+
+        匹配到多名运动员时（例如 “Jane Doe” 同时匹配 “Jane Doe-Smith”），每个项目保留最快的成绩，
+        与 reduce_personal_bests 的语义一致。
+        子串匹配只扫描不重复姓名表 pb_names（远小于 PB 表），匹配到的姓名再按 PB 主键查找。
+        """
+        name_norm = normalize_text(athlete_name)
+        if not name_norm:
+            return []
+
+        # CROSS JOIN 固定连接顺序：外层扫描姓名表，内层走 PB 主键
+        sql = ('SELECT p.* FROM pb_names n CROSS JOIN personal_bests p ON p.name_norm = n.name_norm '
+               'WHERE instr(n.name_norm, ?) > 0')
+        params = [name_norm]
+        if club:
+            sql += ' AND instr(p.club_norm, ?) > 0'
+            params.append(normalize_text(club))
+        rows = self._connect().execute(sql, params).fetchall()
+
+        best = {}
+        for row in rows:
+            key = (row['distance'], row['stroke'], row['course'])
+            if key not in best or row['time_hundredths'] < best[key]['time_hundredths']:
+                best[key] = row
+        return [self._pb_row_to_dict(row) for row in best.values()]
+
+    def personal_bests_changed_since(self, since: float, athlete_name: Optional[str] = None,
+                                     club: Optional[str] = None,
+                                     limit: int = 1000) -> Tuple[List[Dict], float]:
+        """返回 updated_at 晚于 since 的 PB 变更（按更新时间排序），可按姓名/俱乐部过滤
+
+        每条记录带 deleted：新增或更正的 PB 为 false；被删除的 PB 为 true（只有姓名、俱乐部和项目，
+        updated_at 为删除时间），之后同一项目又有 PB 时只返回新的 PB。
+        同时返回下一次查询应使用的 since（本次返回的最大 updated_at）。
+        同一页面导入的 PB 更新时间相同，超出 limit 时不拆分同一时间戳的记录。
+        """
+        filters, filter_params = '', []
+        if athlete_name:
+            filters += ' AND instr(name_norm, ?) > 0'
+            filter_params.append(normalize_text(athlete_name))
+        if club:
+            filters += ' AND instr(club_norm, ?) > 0'
+            filter_params.append(normalize_text(club))
+        sql = (
+            'SELECT name, event, distance, stroke, course, time, time_hundredths, splits, club, date, source_url, '
+            'updated_at, 0 AS deleted FROM personal_bests WHERE updated_at > ?' + filters +
+            ' UNION ALL '
+            'SELECT name, event, distance, stroke, course, NULL, NULL, NULL, club, NULL, NULL, '
+            'deleted_at, 1 FROM pb_deletions d WHERE deleted_at > ?' + filters +
+            ' AND NOT EXISTS (SELECT 1 FROM personal_bests p WHERE p.name_norm = d.name_norm '
+            'AND p.club_norm = d.club_norm AND p.distance = d.distance AND p.stroke = d.stroke '
+            'AND p.course = d.course)'
+            ' ORDER BY updated_at LIMIT ?'
+        )
+        params = [since] + filter_params + [since] + filter_params + [limit + 1]
+        rows = self._connect().execute(sql, params).fetchall()
+
+        if len(rows) > limit:
+            last_stamp = rows[limit]['updated_at']
+            trimmed = [row for row in rows[:limit] if row['updated_at'] < last_stamp]
+            # 单个时间戳的记录就超过 limit 时整组返回
+            if trimmed:
+                rows = trimmed
+            else:
+                rows = [row for row in rows if row['updated_at'] == last_stamp]
+
+        next_since = max((row['updated_at'] for row in rows), default=since)
+        return [dict(self._pb_row_to_dict(row), deleted=bool(row['deleted'])) for row in rows], next_since
+
+    def _pb_row_to_dict(self, row: sqlite3.Row) -> Dict:
+        return {column: row[column] for column in PB_COLUMNS}
+
+    def search(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
+        """按姓名（子串匹配）和俱乐部查询成绩，语义与 search_athlete 一致"""
+        name_norm = normalize_text(athlete_name)
+        if not name_norm:
+            return []
+
+        # 先在去重后的姓名表中做子串匹配（远小于成绩表），再按姓名索引取成绩
+        names = [
+            row[0] for row in self._connect().execute(
+                'SELECT DISTINCT name_norm FROM results INDEXED BY idx_results_name '
+                'WHERE instr(name_norm, ?) > 0',
+                (name_norm,)
+            )
+        ]
+        if not names:
+            return []
+
+        return self.search_by_names(names, club)
+
+    def search_by_names(self, name_norms: List[str], club: Optional[str] = None) -> List[Dict]:
+        """按规范化姓名精确查询成绩（走姓名索引）"""
+        if not name_norms:
+            return []
+        placeholders = ','.join('?' * len(name_norms))
+        sql = f'SELECT * FROM results WHERE name_norm IN ({placeholders})'
+        params = list(name_norms)
+        if club:
+            sql += ' AND instr(club_norm, ?) > 0'
+            params.append(normalize_text(club))
+        sql += ' ORDER BY id'
+        rows = self._connect().execute(sql, params).fetchall()
+        return [self._row_to_result(row) for row in rows]
+
+    def athletes(self) -> Iterator[Tuple[str, str]]:
+        """遍历索引中所有不重复的 (姓名, 俱乐部)"""
+        return iter(self._connect().execute('SELECT DISTINCT name, club FROM results').fetchall())
+
+    def _row_to_result(self, row: sqlite3.Row) -> Dict:
+        """数据库行转换为与 extract_table_data 相同结构的成绩字典"""
+        result = {column: row[column] or '' for column in RESULT_COLUMNS}
+        for column in NUMERIC_COLUMNS:
+            result[column] = row[column]
+        return result
+
+    def has_data(self) -> bool:
+        """索引中是否已有数据"""
+        row = self._connect().execute('SELECT 1 FROM pages LIMIT 1').fetchone()
+        return row is not None
+
+    def last_ingested_at(self) -> Optional[float]:
+        """最近一次写入页面的时间"""
+        return self._connect().execute('SELECT MAX(ingested_at) FROM pages').fetchone()[0]
+
+    def stats(self) -> Dict:
+        """返回索引规模信息"""
+        conn = self._connect()
+        pages = conn.execute('SELECT COUNT(*), MAX(ingested_at) FROM pages').fetchone()
+        results = conn.execute('SELECT COUNT(*) FROM results').fetchone()
+        return {
+            'pages': pages[0],
+            'results': results[0],
+            'last_ingested_at': pages[1],
+        }
+
+
+def check_upgrade_path() -> List[str]:
+    """检查旧索引升级和 PB 维护，返回失败说明（全部通过时为空列表）
+
+    - 旧格式索引（没有 time_hundredths 列和 PB 表）打开后回填百分之一秒时间并生成 PB
+    - 已加列但未回填的索引（user_version 为 0）同样回填
+    - 重新导入页面后，被更正或删除的成绩不再作为 PB，删除的 PB 出现在轮询接口中
+    """
+    failures = []
+    row = ('http://example/meet.html', 'Jane Doe', 'jane doe', '50m Freestyle', '50m', 'Freestyle', 'SCM',
+           '31.25', '', 'Coast', 'coast', '2023-01-01')
+    with tempfile.TemporaryDirectory() as directory:
+        for label, add_column in (('旧格式索引', False), ('已加列未回填的索引', True)):
+            path = os.path.join(directory, f'{add_column}.db')
+            conn = sqlite3.connect(path)
+            conn.executescript(LEGACY_SCHEMA)
+            conn.execute('INSERT INTO results (source_url, name, name_norm, event, distance, stroke, course, '
+                         'time, splits, club, club_norm, date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+            conn.execute('INSERT INTO pages VALUES (?, 1, 0)', (row[0],))
+            if add_column:
+                conn.execute('ALTER TABLE results ADD COLUMN time_hundredths INTEGER')
+            conn.commit()
+            conn.close()
+
+            store = ResultsStore(path)
+            hundredths = [result['time_hundredths'] for result in store.search('Jane Doe')]
+            if hundredths != [3125]:
+                failures.append(f"{label}: time_hundredths 为 {hundredths}，应为 [3125]")
+            pbs = [pb['time'] for pb in store.personal_bests('Jane Doe')]
+            if pbs != ['31.25']:
+                failures.append(f"{label}: PB 为 {pbs}，应为 ['31.25']")
+
+        store = ResultsStore(os.path.join(directory, 'reingest.db'))
+        result = {'name': 'Jane Doe', 'event': '50m Freestyle', 'distance': '50m', 'stroke': 'Freestyle',
+                  'course': 'SCM', 'club': 'Coast'}
+        for times, expected in ((['21.25'], ['21.25']), (['31.25'], ['31.25']), ([], [])):
+            rows = [dict(result, time=value, time_hundredths=time_codec.time_to_hundredths(value)) for value in times]
+            store.replace_page(row[0], rows)
+            pbs = [pb['time'] for pb in store.personal_bests('Jane Doe')]
+            if pbs != expected:
+                failures.append(f"重新导入 {times}: PB 为 {pbs}，应为 {expected}")
+        changes, _ = store.personal_bests_changed_since(0)
+        if [(change['name'], change['deleted']) for change in changes] != [('Jane Doe', True)]:
+            failures.append(f"PB 被删除后轮询接口应返回一条 deleted 记录，实际为 {changes}")
+    return failures
+
+
+if __name__ == "__main__":
+    # 升级路径和 PB 维护检查：python results_store.py，失败时退出码为 1
+    problems = check_upgrade_path()
+    for problem in problems:
+        print(f"失败 {problem}")
+    print("通过" if not problems else f"{len(problems)} 项失败")
+    sys.exit(1 if problems else 0)
@@ -3,76 +3,110 @@ Swimming NZ Archive Results Page Scraper
 抓取 https://archive.swimming.org.nz/results.html 页面上的所有年份链接，
 以及每个年份页面中的比赛名称和文件下载链接。
 """
+import argparse
+import os
 import requests
 from bs4 import BeautifulSoup
 import csv
-import time
-from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+from urllib.parse import urlparse
 import sys
+import time
+
+from http_cache import HttpCache
+from crawl_scheduler import CrawlScheduler
+from crawl_checkpoint import CrawlCheckpoint, content_hash
+from crawl_frontier import CrawlFrontier, normalize_url, link_year, YEAR_PAGE, MEET_PAGE, RESULT_FILE
+import metrics
+
+
+# 年份页面中需要的链接类型
+COMPETITION_KINDS = (RESULT_FILE, MEET_PAGE)
 
 
 class ResultsPageScraper:
-    def __init__(self, base_url: str = "https://archive.swimming.org.nz"):
+    def __init__(self, base_url: str = "https://archive.swimming.org.nz",
+                 http_cache: Optional[HttpCache] = None,
+                 parser: str = 'html.parser',
+                 scheduler: Optional[CrawlScheduler] = None,
+                 frontier: Optional[CrawlFrontier] = None):
         self.base_url = base_url
+        # BeautifulSoup 解析器：'html.parser'（纯 Python）或 'lxml'（C 实现，更快）
+        self.parser = parser
+        self.http_cache = http_cache
         self.results_page_url = f"{base_url}/results.html"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # 爬取调度器：按主机限速、退避重试（遵守 Retry-After）、自适应并发；可与 SwimmingArchiveScraper 共用
+        self.scheduler = scheduler or CrawlScheduler()
+        self.http = self.scheduler.wrap(self.session)
+        # 爬取边界：只跟随本站的年份页面、比赛页面和成绩文件链接并去重；指定 state_path 时跨运行去重
+        self.frontier = frontier or CrawlFrontier([urlparse(base_url).netloc])
         self.all_results = []
 
-    def fetch_page(self, url: str, retries: int = 3) -> Optional[BeautifulSoup]:
-        """获取并解析 HTML 页面，包含重试机制"""
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url, timeout=15)
-                response.raise_for_status()
-                return BeautifulSoup(response.content, 'html.parser')
-            except requests.exceptions.RequestException as e:
-                print(f"  错误：获取页面失败 (尝试 {attempt + 1}/{retries}): {e}")
-                if attempt < retries - 1:
-                    time.sleep(2)  # 等待2秒后重试
+    def fetch_content(self, url: str) -> Optional[bytes]:
+        """获取页面内容（重试由调度器负责）"""
+        try:
+            with metrics.stage('fetch'):
+                if self.http_cache:
+                    content = self.http_cache.fetch(self.http, url, timeout=15)
                 else:
-                    return None
-            except Exception as e:
-                print(f"  错误：解析页面时发生意外错误: {e}")
-                return None
-        return None
+                    response = self.http.get(url, timeout=15)
+                    response.raise_for_status()
+                    content = response.content
+            metrics.PAGE_BYTES.observe(len(content))
+            return content
+        except requests.exceptions.RequestException as e:
+            metrics.FETCH_ERRORS.inc()
+            print(f"  错误：获取页面失败: {e}")
+            return None
+        except Exception as e:
+            print(f"  错误：获取页面时发生意外错误: {e}")
+            return None
+
+    def parse_page(self, content: bytes) -> Optional[BeautifulSoup]:
+        try:
+            with metrics.stage('parse'):
+                return BeautifulSoup(content, self.parser)
+        except Exception as e:
+            print(f"  错误：解析页面时发生意外错误: {e}")
+            return None
+
+    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """获取并解析 HTML 页面"""
+        content = self.fetch_content(url)
+        if content is None:
+            return None
+        return self.parse_page(content)
 
     def find_year_links(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
         """在主页面中查找所有年份链接"""
-        year_links = []
+        year_links: Dict[str, Dict[str, str]] = {}
         
         if not soup:
-            return year_links
+            return []
         
-        # 尝试多种可能的选择器来查找年份链接
-        # 方法1: 查找包含年份数字的链接
         all_links = soup.find_all('a', href=True)
         
+        # 方法1: 文件名或链接文本为年份的站内页面（每个年份只保留第一个链接）
         for link in all_links:
-            href = link.get('href', '')
             link_text = link.get_text(strip=True)
-            
-            # 检查链接文本或href中是否包含年份（4位数字，通常在1900-2100之间）
-            import re
-            year_match = re.search(r'\b(19|20)\d{2}\b', link_text + ' ' + href)
-            
-            if year_match:
-                year = year_match.group(0)
-                full_url = urljoin(self.results_page_url, href)
-                
-                # 避免重复添加相同的年份
-                if not any(yl['year'] == year for yl in year_links):
-                    year_links.append({
-                        'year': year,
-                        'url': full_url,
-                        'text': link_text
-                    })
-                    print(f"  找到年份链接: {year} -> {link_text}")
+            found = self.frontier.discover(link['href'], link_text, base=self.results_page_url, kinds=(YEAR_PAGE,))
+            if not found:
+                continue
+            year = link_year(found[0], link_text)
+            if year not in year_links:
+                year_links[year] = {
+                    'year': year,
+                    'url': found[0],
+                    'text': link_text
+                }
+                print(f"  找到年份链接: {year} -> {link_text}")
         
-        # 如果没有找到，尝试查找包含 "year" 或 "results" 的链接
+        # 如果没有找到，尝试查找包含 "year" 或 "results" 的站内链接
         if not year_links:
             print("  警告：未通过年份匹配找到链接，尝试其他方法...")
             for link in all_links:
@@ -80,90 +114,68 @@ class ResultsPageScraper:
                 link_text = link.get_text(strip=True).lower()
                 
                 if 'result' in href or 'result' in link_text or 'year' in href or 'year' in link_text:
-                    full_url = urljoin(self.results_page_url, link.get('href', ''))
-                    year_links.append({
-                        'year': link_text or href,
-                        'url': full_url,
-                        'text': link.get_text(strip=True)
-                    })
+                    url = normalize_url(link['href'], self.results_page_url)
+                    key = link_text or href
+                    if url and self.frontier.allowed(url) and key not in year_links:
+                        year_links[key] = {
+                            'year': key,
+                            'url': url,
+                            'text': link.get_text(strip=True)
+                        }
         
-        return sorted(year_links, key=lambda x: x['year'], reverse=True)
+        return sorted(year_links.values(), key=lambda x: x['year'], reverse=True)
 
-    def find_competition_links(self, soup: BeautifulSoup, year: str) -> List[Dict[str, str]]:
-        """在年份页面中查找所有比赛名称和下载链接"""
+    def find_competition_links(self, soup: BeautifulSoup, year: str,
+                               page_url: Optional[str] = None) -> List[Dict[str, str]]:
+        """在年份页面中查找所有比赛名称和下载链接（只保留站内的成绩文件和比赛页面，按规范化 URL 去重）"""
         competitions = []
         
         if not soup:
             return competitions
         
-        # 尝试多种方法来查找比赛信息
-        # 方法1: 查找所有链接，过滤可能的下载链接或比赛链接
-        all_links = soup.find_all('a', href=True)
+        # 相对链接按年份页面的地址解析
+        page_url = page_url or self.base_url
         
-        for link in all_links:
-            href = link.get('href', '')
-            link_text = link.get_text(strip=True)
-            
-            # 检查是否是文件下载链接（常见格式）
-            href_lower = href.lower()
-            is_download_link = any(ext in href_lower for ext in ['.pdf', '.xls', '.xlsx', '.csv', '.txt', '.zip'])
-            
-            # 或者链接文本包含比赛相关信息
-            text_lower = link_text.lower()
-            is_competition = any(keyword in text_lower for keyword in ['meet', 'championship', 'competition', 'event', 'result'])
-            
-            if is_download_link or is_competition or link_text:
-                full_url = urljoin(self.base_url, href)
-                
-                # 避免添加导航链接或重复链接
-                if not any(skip in href_lower for skip in ['#', 'mailto:', 'javascript:', '../']):
+        # 方法1: 表格中的比赛（第一列是比赛名称，任意单元格中的链接为下载链接），名称比链接文本更完整
+        for row in soup.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) < 2:
+                continue
+            competition_name = cells[0].get_text(strip=True)
+            if not competition_name:
+                continue
+            for cell in cells:
+                link_tag = cell.find('a', href=True)
+                if not link_tag:
+                    continue
+                found = self.frontier.discover(link_tag['href'], competition_name, base=page_url,
+                                               kinds=COMPETITION_KINDS)
+                if found:
                     competitions.append({
                         'year': year,
-                        'competition_name': link_text if link_text else href,
-                        'download_link': full_url
+                        'competition_name': competition_name,
+                        'download_link': found[0]
                     })
+                    break
         
-        # 方法2: 查找表格中的比赛信息
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 2:
-                    # 假设第一列是比赛名称，最后一列或包含链接的是下载链接
-                    name_cell = cells[0]
-                    competition_name = name_cell.get_text(strip=True)
-                    
-                    # 查找下载链接（可能在任意单元格中）
-                    download_link = None
-                    for cell in cells:
-                        link_tag = cell.find('a', href=True)
-                        if link_tag:
-                            href = link_tag.get('href', '')
-                            if any(ext in href.lower() for ext in ['.pdf', '.xls', '.xlsx', '.csv', '.txt', '.zip']):
-                                download_link = urljoin(self.base_url, href)
-                                break
-                    
-                    if competition_name and download_link:
-                        competitions.append({
-                            'year': year,
-                            'competition_name': competition_name,
-                            'download_link': download_link
-                        })
-        
-        # 去重（基于下载链接）
-        seen_links = set()
-        unique_competitions = []
-        for comp in competitions:
-            if comp['download_link'] not in seen_links:
-                seen_links.add(comp['download_link'])
-                unique_competitions.append(comp)
+        # 方法2: 表格之外的成绩文件和比赛页面链接
+        for link in soup.find_all('a', href=True):
+            link_text = link.get_text(strip=True)
+            found = self.frontier.discover(link['href'], link_text, base=page_url, kinds=COMPETITION_KINDS)
+            if found:
+                competitions.append({
+                    'year': year,
+                    'competition_name': link_text or found[0],
+                    'download_link': found[0]
+                })
         
-        return unique_competitions
+        return competitions
 
     def scrape_all(self) -> List[Dict[str, str]]:
         """抓取所有数据"""
         print(f"正在访问主页面: {self.results_page_url}")
+        self.frontier.begin()
+        self.frontier.mark_seen(self.results_page_url)
         
         # 1. 获取主页面
         main_soup = self.fetch_page(self.results_page_url)
@@ -181,68 +193,182 @@ class ResultsPageScraper:
         
         print(f"找到 {len(year_links)} 个年份链接\n")
         
-        # 3. 遍历每个年份页面
+        # 3. 并发获取年份页面（速率和并发由调度器控制），按原顺序处理
         all_results = []
-        for idx, year_info in enumerate(year_links, 1):
-            year = year_info['year']
-            year_url = year_info['url']
-            
-            print(f"[{idx}/{len(year_links)}] 正在处理年份: {year}")
-            print(f"  访问链接: {year_url}")
-            
-            # 获取年份页面
-            year_soup = self.fetch_page(year_url)
-            if not year_soup:
-                print(f"  警告：无法访问年份页面 {year}，跳过")
-                continue
-            
-            # 查找该年份的所有比赛
-            competitions = self.find_competition_links(year_soup, year)
-            print(f"  找到 {len(competitions)} 个比赛/文件链接")
-            
-            all_results.extend(competitions)
-            
-            # 添加延迟，避免对服务器造成过大压力
-            time.sleep(1)
+        with ThreadPoolExecutor(max_workers=self.scheduler.max_concurrency) as executor:
+            year_soups = executor.map(self.fetch_page, [year_info['url'] for year_info in year_links])
+            for idx, (year_info, year_soup) in enumerate(zip(year_links, year_soups), 1):
+                year = year_info['year']
+                
+                print(f"[{idx}/{len(year_links)}] 正在处理年份: {year}")
+                print(f"  访问链接: {year_info['url']}")
+                
+                if not year_soup:
+                    print(f"  警告：无法访问年份页面 {year}，跳过")
+                    continue
+                
+                # 查找该年份的所有比赛
+                competitions = self.find_competition_links(year_soup, year, year_info['url'])
+                print(f"  找到 {len(competitions)} 个比赛/文件链接")
+                
+                all_results.extend(competitions)
         
+        self.frontier.commit()
         return all_results
 
-    def save_to_csv(self, results: List[Dict[str, str]], filename: str = "swimming_results.csv"):
-        """将结果保存到CSV文件"""
+    def scrape_incremental(self, checkpoint: CrawlCheckpoint,
+                           on_competitions: Callable[[List[Dict[str, str]]], None],
+                           recent_years: Optional[int] = None) -> Dict:
+        """增量抓取：每个年份页面处理完即写入检查点，中断后再次调用会继续未完成的一轮。
+        内容哈希未变化的年份页面直接跳过；其余页面中新增或变化的比赛先交给 on_competitions（例如追加到 CSV），
+        再写入检查点。recent_years 指定时，以前已完成的年份页面只重新检查最新的 recent_years 个。"""
+        started = time.perf_counter()
+        run_id, resumed = checkpoint.start_run()
+        report = {'run': run_id, 'resumed': resumed, 'year_pages': 0, 'fetched': 0, 'unchanged': 0,
+                  'skipped': 0, 'failed': 0, 'new_or_changed': 0}
+        print(f"{'继续' if resumed else '开始'}第 {run_id} 轮增量抓取: {self.results_page_url}")
+        self.frontier.begin()
+        self.frontier.mark_seen(self.results_page_url)
+        
+        main_soup = self.fetch_page(self.results_page_url)
+        if not main_soup:
+            print("错误：无法访问主页面")
+            report['failed'] += 1
+            return report
+        year_links = self.find_year_links(main_soup)
+        report['year_pages'] = len(year_links)
+        
+        # 跳过本轮已完成的页面（继续中断的运行时）以及不在最新 recent_years 个之内、以前已完成的页面
+        completed = checkpoint.completed_pages(run_id)
+        pending = []
+        for idx, year_info in enumerate(year_links):
+            if year_info['url'] in completed or (
+                    recent_years is not None and idx >= recent_years
+                    and checkpoint.page_hash(year_info['url']) is not None):
+                report['skipped'] += 1
+                continue
+            pending.append(year_info)
+        print(f"找到 {len(year_links)} 个年份页面，需要检查 {len(pending)} 个")
+        
+        executor = ThreadPoolExecutor(max_workers=self.scheduler.max_concurrency)
+        try:
+            contents = executor.map(lambda info: self.fetch_content(info['url']), pending)
+            for idx, (year_info, content) in enumerate(zip(pending, contents), 1):
+                year, url = year_info['year'], year_info['url']
+                if content is None:
+                    print(f"[{idx}/{len(pending)}] 警告：无法访问年份页面 {year}，跳过")
+                    report['failed'] += 1
+                    continue
+                
+                page_hash = content_hash(content)
+                if page_hash == checkpoint.page_hash(url):
+                    checkpoint.complete_page(run_id, url, year, page_hash, [])
+                    report['unchanged'] += 1
+                    continue
+                
+                competitions = self.find_competition_links(self.parse_page(content), year, url)
+                changed = checkpoint.changed_competitions(competitions)
+                print(f"[{idx}/{len(pending)}] {year}: {len(competitions)} 个比赛/文件链接，"
+                      f"其中新增或变化 {len(changed)} 个")
+                # 先输出再记录检查点：在两者之间中断时重新运行会再次输出（CSV 读取时按链接去重）
+                if changed:
+                    on_competitions(changed)
+                checkpoint.complete_page(run_id, url, year, page_hash, changed)
+                report['fetched'] += 1
+                report['new_or_changed'] += len(changed)
+        finally:
+            # Ctrl+C 时不再等待排队中的页面
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        checkpoint.finish_run(run_id)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    def save_to_csv(self, results: List[Dict[str, str]], filename: str = "swimming_results.csv",
+                    append: bool = False):
+        """将结果保存到CSV文件（append 为 True 时追加到已有文件）"""
         if not results:
             print("警告：没有数据可保存")
             return
         
         try:
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['year', 'competition_name', 'download_link']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for result in results:
-                    writer.writerow(result)
-            
+            write_csv(filename, results, append)
             print(f"\n成功！共保存 {len(results)} 条记录到 {filename}")
         except Exception as e:
             print(f"错误：保存CSV文件时发生错误: {e}")
             sys.exit(1)
 
 
+def write_csv(filename: str, results: List[Dict[str, str]], append: bool = False):
+    """写入 CSV；追加时文件为空才写表头，并在返回前落盘"""
+    write_header = not (append and os.path.exists(filename) and os.path.getsize(filename) > 0)
+    with open(filename, 'a' if append else 'w', newline='',
+              encoding='utf-8-sig' if write_header else 'utf-8') as csvfile:
+        fieldnames = ['year', 'competition_name', 'download_link']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        
+        if write_header:
+            writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+        if append:
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="抓取 results.html 中各年份的比赛和成绩文件链接")
+    parser.add_argument('--output', default='swimming_results.csv', help="输出 CSV 文件")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--frontier', default=None,
+                      help="已发现链接的 SQLite 文件；指定后只输出新发现的链接并追加到 CSV")
+    mode.add_argument('--checkpoint', default=None,
+                      help="增量模式的检查点文件：可中断后继续，跳过内容未变的年份页面，只追加新增或变化的比赛")
+    parser.add_argument('--recent-years', type=int, default=None,
+                        help="增量模式下只重新检查最新的几个年份页面（例如 1 表示当前赛季）")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Swimming NZ Archive Results Page Scraper")
     print("=" * 60)
     
-    scraper = ResultsPageScraper()
+    base_url = "https://archive.swimming.org.nz"
+    frontier = CrawlFrontier([urlparse(base_url).netloc], state_path=args.frontier)
+    scraper = ResultsPageScraper(base_url, http_cache=HttpCache(), frontier=frontier)
+    
+    if args.checkpoint:
+        checkpoint = CrawlCheckpoint(args.checkpoint)
+        try:
+            report = scraper.scrape_incremental(
+                checkpoint, lambda rows: write_csv(args.output, rows, append=True), args.recent_years)
+        except KeyboardInterrupt:
+            print("\n\n用户中断程序，进度已保存，再次运行将继续")
+            sys.exit(130)
+        print(f"\n年份页面 {report['year_pages']} 个：检查 {report['fetched']} 个，内容未变 {report['unchanged']} 个，"
+              f"跳过 {report['skipped']} 个，失败 {report['failed']} 个；"
+              f"追加 {report['new_or_changed']} 条新增或变化的比赛到 {args.output}，用时 {report.get('seconds')}s")
+        sys.exit(1 if report['failed'] and not report['fetched'] + report['unchanged'] else 0)
     
     try:
         # 抓取所有数据
         results = scraper.scrape_all()
         
+        frontier_stats = frontier.stats()
+        print(f"链接：{frontier_stats.get('result_file', 0)} 个新成绩文件，{frontier_stats.get('meet_page', 0)} 个新比赛页面，"
+              f"跳过站外 {frontier_stats.get('skipped_off_site', 0)} 个、其他 {frontier_stats.get('skipped_other', 0)} 个、"
+              f"重复 {frontier_stats.get('duplicates', 0)} 个、之前已发现 {frontier_stats.get('previously_seen', 0)} 个")
+        
         # 保存到CSV
         if results:
-            scraper.save_to_csv(results, "swimming_results.csv")
+            scraper.save_to_csv(results, args.output, append=bool(args.frontier))
+            stats = scraper.http_cache.stats()
+            print(f"缓存命中 {stats['hits']} 次，未命中 {stats['misses']} 次，节省 {stats['bytes_saved']} 字节")
+            for host, host_stats in scraper.scheduler.stats()['hosts'].items():
+                print(f"{host}: {host_stats['requests']} 个请求，实际 {host_stats['effective_rps']} 请求/秒，"
+                      f"重试 {host_stats['retries']} 次")
+        elif args.frontier and frontier_stats.get('previously_seen'):
+            print("\n没有新发现的链接")
         else:
             print("\n警告：未抓取到任何数据，请检查网络连接或网页结构")
             sys.exit(1)
@@ -4,30 +4,240 @@ Swimming NZ Archive Scraper
 """
 import requests
 from bs4 import BeautifulSoup
+import contextlib
+import contextvars
+import functools
+import hashlib
 import json
 import re
-from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Dict, Optional, Tuple, Iterator, Iterable, NamedTuple
+from urllib.parse import urlparse
+
+from http_cache import HttpCache
+from crawl_scheduler import CrawlScheduler
+from crawl_frontier import CrawlFrontier, YEAR_PAGE, MEET_PAGE
+from parse_cache import ParsedTableCache
+from refresher import BackgroundRefresher
+import fast_parser
+import metrics
+import time_codec
+
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+# 流式提取时每次读取的字节数
+STREAM_CHUNK_BYTES = 64 * 1024
+# 实时搜索访问的 results.html 链接类型
+RESULT_LINK_KINDS = (YEAR_PAGE, MEET_PAGE)
+
+ROWS_EXTRACTED = metrics.registry.counter('scraper_rows_extracted_total', 'Result rows extracted from tables')
+TABLES_EXTRACTED = metrics.registry.counter('scraper_tables_extracted_total', 'Results tables extracted')
+
+
+class ColumnSchema(NamedTuple):
+    """表头对应的列位置"""
+    name_idx: int
+    event_idx: int
+    time_idx: int
+    splits_idx: Optional[int]
+    club_idx: Optional[int]
+    date_idx: Optional[int]
+    min_cells: int
+    # 表头中是否有项目列；是否同时识别出姓名列和成绩列（即结果表格）
+    has_event: bool
+    detected: bool
+
+
+@functools.lru_cache(maxsize=1024)
+def column_schema(headers: Tuple[str, ...]) -> ColumnSchema:
+    """根据表头确定各列位置；相同的表头布局只计算一次"""
+    name_idx = None
+    event_idx = None
+    time_idx = None
+    splits_idx = None
+    club_idx = None
+    date_idx = None
+    
+    for i, header in enumerate(headers):
+        if 'name' in header or 'swimmer' in header or 'athlete' in header:
+            name_idx = i
+        elif 'event' in header or 'race' in header:
+            event_idx = i
+        elif 'time' in header or 'result' in header:
+            time_idx = i
+        elif 'split' in header:
+            splits_idx = i
+        elif 'club' in header or 'team' in header:
+            club_idx = i
+        elif 'date' in header or 'meet' in header:
+            date_idx = i
+    
+    detected = name_idx is not None and time_idx is not None
+    has_event = event_idx is not None
+    # 如果找不到表头，尝试推断（假设第一列是姓名，第二列是项目等）
+    if name_idx is None:
+        name_idx = 0
+    if event_idx is None:
+        event_idx = 1
+    if time_idx is None:
+        time_idx = 2
+    
+    min_cells = max(filter(None, [name_idx, event_idx, time_idx])) + 1
+    return ColumnSchema(name_idx, event_idx, time_idx, splits_idx, club_idx, date_idx,
+                        min_cells, has_event, detected)
+
+
+def extraction_stats() -> Dict:
+    """累计提取的表格数、成绩行数、提取速度和表头布局缓存命中"""
+    seconds, _ = metrics.STAGE_SECONDS.snapshot('extract')
+    rows = ROWS_EXTRACTED.value()
+    cache = column_schema.cache_info()
+    return {
+        'tables': int(TABLES_EXTRACTED.value()),
+        'rows': int(rows),
+        'extract_seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else None,
+        'schema_cache_hits': cache.hits,
+        'schema_cache_misses': cache.misses,
+    }
+
+
+class ResultRowBuilder:
+    """按表头把一个表格的数据行逐行转换为成绩行（build_results 和流式提取共用）"""
+
+    def __init__(self, scraper: 'SwimmingArchiveScraper', headers: List[str],
+                 heading: Optional[str] = None, sections: bool = False):
+        self.scraper = scraper
+        self.schema = column_schema(tuple(headers))
+        self.carry_event = sections and not self.schema.has_event
+        self.current_event = heading if self.carry_event else None
+
+    def add(self, cells: List[Tuple[str, int]]) -> Optional[Dict]:
+        """转换一行单元格 (文本, colspan)；项目标题行、空行或表头行返回 None，time_hundredths 由调用方填写"""
+        name_idx, event_idx, time_idx, splits_idx, club_idx, date_idx, min_cells, _, _ = self.schema
+        if self.carry_event:
+            texts = [text for text, _ in cells if text]
+            if len(texts) == 1:
+                section = self.scraper.parse_event(texts[0])
+                if section['distance'] and section['stroke']:
+                    self.current_event = texts[0]
+                    return None
+        if len(cells) < min_cells:
+            return None
+        
+        # 处理 colspan
+        actual_cells = []
+        for cell_text, colspan in cells:
+            actual_cells.extend([cell_text] * colspan)
+        
+        if len(actual_cells) < min_cells:
+            return None
+        
+        # 提取数据
+        name = actual_cells[name_idx] if name_idx < len(actual_cells) else ''
+        if self.current_event is not None:
+            event = self.current_event
+        else:
+            event = actual_cells[event_idx] if event_idx < len(actual_cells) else ''
+        time = actual_cells[time_idx] if time_idx < len(actual_cells) else ''
+        splits = actual_cells[splits_idx] if splits_idx and splits_idx < len(actual_cells) else ''
+        club = actual_cells[club_idx] if club_idx and club_idx < len(actual_cells) else ''
+        date = actual_cells[date_idx] if date_idx and date_idx < len(actual_cells) else ''
+        
+        # 跳过空行或表头行
+        if not name or not time:
+            return None
+        
+        # 解析项目信息
+        event_info = self.scraper.parse_event(event)
+        
+        return {
+            'name': name,
+            'event': event_info['event'],
+            'distance': event_info['distance'],
+            'stroke': event_info['stroke'],
+            'course': event_info['course'],
+            'time': self.scraper.parse_time(time),
+            'time_hundredths': None,
+            'splits': splits,
+            'club': club,
+            'date': date
+        }
 
 
 class SwimmingArchiveScraper:
-    def __init__(self, base_url: str = "https://archive.swimming.org.nz"):
+    def __init__(self, base_url: str = "https://archive.swimming.org.nz",
+                 max_workers: int = 8, per_host_limit: int = 4,
+                 deadline: Optional[float] = None,
+                 http_cache: Optional[HttpCache] = None,
+                 parse_cache: Optional[ParsedTableCache] = None,
+                 parser_engine: str = 'bs4',
+                 scheduler: Optional[CrawlScheduler] = None,
+                 refresher: Optional[BackgroundRefresher] = None,
+                 stream_threshold: Optional[int] = None):
         self.base_url = base_url
+        self.http_cache = http_cache
+        self.parse_cache = parse_cache
+        # 解析引擎：'bs4'（BeautifulSoup 完整文档树）或 'lxml'（fast_parser 直接读取表格结构）
+        if parser_engine not in ('bs4', 'lxml'):
+            raise ValueError(f"Unknown parser engine: {parser_engine}")
+        self.parser_engine = parser_engine
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # 并发抓取配置：线程数、单个主机的最大并发数、整次搜索的截止时间（秒）
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.deadline = deadline
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+        # 爬取调度器（限速、退避重试、自适应并发），可与 ResultsPageScraper 共用；为空时直接请求
+        self.scheduler = scheduler
+        self.http = scheduler.wrap(self.session) if scheduler else self.session
+        # 后台刷新器：搜索时使用其中保持更新的 results.html 链接列表，不再每次请求主页面
+        self.refresher = refresher
+        # 流式提取：不为空时，Content-Length 未知或不小于该字节数的结果页面边下载边提取，
+        # 不保留整个页面和文档树（这些页面不经过 HTTP 缓存和解析缓存）
+        self.stream_threshold = stream_threshold
 
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """获取并解析 HTML 页面"""
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """获取 URL 所在主机的并发信号量"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+    def fetch_content(self, url: str) -> Optional[bytes]:
+        """下载页面内容（受单主机并发限制）"""
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'lxml')
+            with self._host_semaphore(url), metrics.stage('fetch'):
+                if self.http_cache:
+                    content = self.http_cache.fetch(self.http, url, timeout=10)
+                else:
+                    response = self.http.get(url, timeout=10)
+                    response.raise_for_status()
+                    content = response.content
+            metrics.PAGE_BYTES.observe(len(content))
+            return content
         except Exception as e:
+            metrics.FETCH_ERRORS.inc()
             print(f"Error fetching page: {e}")
             return None
 
+    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """获取并解析 HTML 页面"""
+        content = self.fetch_content(url)
+        if content is None:
+            return None
+        with metrics.stage('parse'):
+            return BeautifulSoup(content, 'lxml')
+
     def find_results_table(self, soup: BeautifulSoup) -> Optional:
         """查找结果表格"""
         # 尝试多种可能的表格选择器
@@ -51,40 +261,69 @@ class SwimmingArchiveScraper:
         
         return None
 
+    def find_results_tables(self, soup: BeautifulSoup) -> List[Tuple[Optional[str], object]]:
+        """按文档顺序返回页面中所有不含嵌套表格的表格及其标题：(标题, 表格)
+
+        标题取表格的 <caption>，否则取表格之前最近的 h1-h6。
+        """
+        tables = []
+        heading = None
+        for element in soup.find_all(['table', *HEADING_TAGS]):
+            if element.name != 'table':
+                heading = element.get_text(' ', strip=True) or heading
+                continue
+            if element.find('table') is not None:
+                continue
+            caption = element.find('caption')
+            caption_text = caption.get_text(' ', strip=True) if caption else ''
+            tables.append((caption_text or heading, element))
+        return tables
+
+    def extract_tables(self, tables: Iterable[Tuple[Optional[str], object]], headers_of, cells_of
+                       ) -> Optional[List[Dict]]:
+        """一次遍历提取所有结果表格（表头中能识别出姓名列和成绩列的表格）的成绩行
+
+        headers_of / cells_of 为解析引擎读取表头和数据行的函数；没有结果表格时返回 None。
+        """
+        results = None
+        for heading, table in tables:
+            headers = headers_of(table)
+            if not column_schema(tuple(headers)).detected:
+                continue
+            if results is None:
+                results = []
+            with metrics.stage('extract'):
+                results.extend(self.build_results(headers, cells_of(table), heading=heading, sections=True))
+        return results
+
+    def extract_results(self, soup: BeautifulSoup) -> Optional[List[Dict]]:
+        """提取页面中全部结果表格的成绩行；没有可识别的结果表格时退回行数最多的表格，页面没有表格时返回 None"""
+        results = self.extract_tables(self.find_results_tables(soup), self._table_headers, self._table_cells)
+        if results is not None:
+            return results
+        table = self.find_results_table(soup)
+        return self.extract_table_data(table) if table else None
+
+    @staticmethod
+    def _table_headers(table) -> List[str]:
+        first_row = table.find('tr')
+        if first_row is None:
+            return []
+        return [th.get_text(strip=True).lower() for th in first_row.find_all(['th', 'td'])]
+
+    @staticmethod
+    def _table_cells(table) -> List[List[Tuple[str, int]]]:
+        return [[(cell.get_text(strip=True), int(cell.get('colspan', 1))) for cell in row.find_all(['td', 'th'])]
+                for row in table.find_all('tr')[1:]]
+
     def parse_time(self, time_str: str) -> Optional[str]:
         """解析时间格式，统一为 MM:SS.hh 或 SS.hh"""
-        if not time_str:
-            return None
-        
-        # 清理字符串
-        time_str = time_str.strip().replace(' ', '')
-        
-        # 匹配各种时间格式
-        # 格式1: MM:SS.hh (如 1:02.15)
-        pattern1 = r'(\d+):(\d{2})\.(\d{2})'
-        match1 = re.match(pattern1, time_str)
-        if match1:
-            return time_str
-        
-        # 格式2: SS.hh (如 58.45)
-        pattern2 = r'(\d+)\.(\d{2})'
-        match2 = re.match(pattern2, time_str)
-        if match2:
-            return time_str
-        
-        # 格式3: MM:SS:hh (如 1:02:15)
-        pattern3 = r'(\d+):(\d{2}):(\d{2})'
-        match3 = re.match(pattern3, time_str)
-        if match3:
-            minutes, seconds, hundredths = match3.groups()
-            return f"{minutes}:{seconds}.{hundredths}"
-        
-        return time_str
+        return time_codec.normalize_time(time_str)
 
     def parse_event(self, event_str: str) -> Dict[str, str]:
         """解析项目名称，提取距离、泳姿和课程类型"""
         if not event_str:
-            return {'distance': '', 'stroke': '', 'course': 'SCM'}
+            return {'distance': '', 'stroke': '', 'course': 'SCM', 'event': ''}
         
         event_str = event_str.strip()
         
@@ -130,193 +369,539 @@ class SwimmingArchiveScraper:
 
     def extract_table_data(self, table) -> List[Dict]:
         """从表格中提取数据"""
-        results = []
-        
         if not table:
-            return results
+            return []
         
         rows = table.find_all('tr')
         if not rows:
-            return results
-        
-        # 查找表头，确定列索引
-        header_row = rows[0]
-        headers = []
-        for th in header_row.find_all(['th', 'td']):
-            header_text = th.get_text(strip=True).lower()
-            headers.append(header_text)
+            return []
         
-        # 确定各列的索引
-        name_idx = None
-        event_idx = None
-        time_idx = None
-        splits_idx = None
-        club_idx = None
-        date_idx = None
+        # 表头文本
+        headers = [th.get_text(strip=True).lower() for th in rows[0].find_all(['th', 'td'])]
         
-        for i, header in enumerate(headers):
-            if 'name' in header or 'swimmer' in header or 'athlete' in header:
-                name_idx = i
-            elif 'event' in header or 'race' in header:
-                event_idx = i
-            elif 'time' in header or 'result' in header:
-                time_idx = i
-            elif 'split' in header:
-                splits_idx = i
-            elif 'club' in header or 'team' in header:
-                club_idx = i
-            elif 'date' in header or 'meet' in header:
-                date_idx = i
+        with metrics.stage('extract'):
+            # 数据行：每个单元格为 (文本, colspan)
+            data_rows = []
+            for row in rows[1:]:  # 跳过表头
+                cells = row.find_all(['td', 'th'])
+                data_rows.append([(cell.get_text(strip=True), int(cell.get('colspan', 1))) for cell in cells])
+            
+            return self.build_results(headers, data_rows)
+
+    def build_results(self, headers: List[str], data_rows: List[List[Tuple[str, int]]],
+                      heading: Optional[str] = None, sections: bool = False) -> List[Dict]:
+        """根据表头和单元格文本生成成绩行（与具体解析引擎无关）
+
+        sections 为 True 且表头中没有项目列时（每个项目一个表格的页面），项目取自表格标题 heading，
+        表格中只有一个非空单元格、且能识别出距离和泳姿的行视为新的项目标题。
+        """
+        builder = ResultRowBuilder(self, headers, heading, sections)
+        results = [result for result in map(builder.add, data_rows) if result is not None]
         
-        # 如果找不到表头，尝试推断（假设第一列是姓名，第二列是项目等）
-        if name_idx is None:
-            name_idx = 0
-        if event_idx is None:
-            event_idx = 1
-        if time_idx is None:
-            time_idx = 2
+        # 整列批量转换为百分之一秒，之后的比较只比较整数
+        for result, hundredths in zip(results, time_codec.encode_times(r['time'] for r in results)):
+            result['time_hundredths'] = hundredths
         
-        # 遍历数据行
-        for row in rows[1:]:  # 跳过表头
-            cells = row.find_all(['td', 'th'])
-            if len(cells) < max(filter(None, [name_idx, event_idx, time_idx])) + 1:
-                continue
-            
-            # 处理 colspan
-            actual_cells = []
-            for cell in cells:
-                colspan = int(cell.get('colspan', 1))
-                cell_text = cell.get_text(strip=True)
-                actual_cells.extend([cell_text] * colspan)
-            
-            if len(actual_cells) <= max(filter(None, [name_idx, event_idx, time_idx])):
+        metrics.PAGE_ROWS.observe(len(results))
+        TABLES_EXTRACTED.inc()
+        ROWS_EXTRACTED.inc(len(results))
+        return results
+
+    def find_result_links(self, main_page: BeautifulSoup,
+                          kinds: Tuple[str, ...] = RESULT_LINK_KINDS) -> List[str]:
+        """在 results.html 中查找所有比赛结果页面链接"""
+        links = [(link['href'], link.get_text(strip=True)) for link in main_page.find_all('a', href=True)]
+        return self.filter_result_links(links, kinds)
+
+    def filter_result_links(self, links: List[Tuple[str, str]],
+                            kinds: Tuple[str, ...] = RESULT_LINK_KINDS) -> List[str]:
+        """从 (原始链接, 链接文本) 中筛选本站的结果页面并转换为规范化的完整 URL
+
+        默认保留年份页面和比赛页面（与原先按 'result' / 'meet' 匹配链接时访问的页面一致），
+        跳过成绩文件、导航链接、站外链接和重复链接。
+        """
+        main_url = f"{self.base_url}/results.html"
+        frontier = CrawlFrontier([urlparse(self.base_url).netloc])
+        frontier.mark_seen(main_url)
+        results_links = []
+        for href, text in links:
+            found = frontier.discover(href, text, base=main_url, kinds=kinds)
+            if found:
+                results_links.append(found[0])
+        return results_links
+
+    def fetch_result_links(self) -> Optional[List[str]]:
+        """获取 results.html 并返回全部结果页面链接（主页面无法访问时返回 None）"""
+        content = self.fetch_content(f"{self.base_url}/results.html")
+        if content is None:
+            return None
+        if self.parser_engine == 'lxml':
+            return self.filter_result_links(fast_parser.extract_links(fast_parser.parse_document(content)))
+        return self.find_result_links(BeautifulSoup(content, 'lxml'))
+
+    def result_links(self) -> Optional[List[str]]:
+        """全部结果页面链接；配置了后台刷新器时直接返回缓存的列表，由后台保持更新"""
+        if self.refresher is None:
+            return self.fetch_result_links()
+        links, _, _ = self.refresher.get(('result_links', self.base_url), self.fetch_result_links, pinned=True)
+        return links
+
+    def fetch_page_results(self, url: str, row_filter: Optional[Callable[[Dict], bool]] = None
+                           ) -> Optional[List[Dict]]:
+        """获取单个结果页面并提取成绩行（页面获取失败时返回 None）
+
+        row_filter 不为空时只返回通过筛选的行；流式提取时其余行不会保留在内存中。
+        """
+        if self.stream_threshold is not None:
+            return self.stream_page_results(url, row_filter)
+        content = self.fetch_content(url)
+        if content is None:
+            return None
+        rows = self.parse_results(url, content)
+        return rows if row_filter is None else [row for row in rows if row_filter(row)]
+
+    def stream_page_results(self, url: str, row_filter: Optional[Callable[[Dict], bool]] = None
+                            ) -> Optional[List[Dict]]:
+        """流式获取单个结果页面，只保留通过 row_filter 的行
+
+        配置了 HTTP 缓存时先发送条件请求，新鲜缓存或 304 直接使用缓存的页面（先查解析缓存）；
+        只有缓存未命中时才下载。Content-Length 小于 stream_threshold 的页面照常整体解析，其余页面边下载边提取
+        （见 stream_rows），下载的内容同时写入 HTTP 缓存，全部成绩行写入解析缓存。
+        """
+        content = None
+        rows = None
+        streamed = False
+        try:
+            with self._host_semaphore(url):
+                with metrics.stage('fetch'):
+                    if self.http_cache:
+                        content, response = self.http_cache.open(self.http, url, timeout=10, stream=True)
+                    else:
+                        response = self.http.get(url, timeout=10, stream=True)
+                if response is not None:
+                    with contextlib.closing(response):
+                        response.raise_for_status()
+                        if self.http_cache:
+                            chunks = self.http_cache.iter_store(url, response, STREAM_CHUNK_BYTES)
+                        else:
+                            chunks = response.iter_content(STREAM_CHUNK_BYTES)
+                        length = response.headers.get('Content-Length', '')
+                        if length.isdigit() and int(length) < self.stream_threshold:
+                            content = b''.join(chunks)
+                        else:
+                            streamed = True
+                            rows = self.stream_rows(url, chunks, row_filter)
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc()
+            print(f"Error streaming page: {e}")
+            return None
+        if rows is not None:
+            return rows
+        if streamed:
+            # 无法在流式读取中确定退回的表格（罕见）：整体解析。HTTP 缓存刚保存了该页面时不会再次下载
+            content = self.fetch_content(url)
+            if content is None:
+                return None
+        else:
+            metrics.PAGE_BYTES.observe(len(content))
+
+        if len(content) >= self.stream_threshold and not streamed and not self._parse_cached(url, content):
+            # 缓存中的大页面同样流式提取，不构建完整文档树
+            rows = self.stream_rows(url, (content[i:i + STREAM_CHUNK_BYTES]
+                                          for i in range(0, len(content), STREAM_CHUNK_BYTES)),
+                                    row_filter, observe_bytes=False)
+            if rows is not None:
+                return rows
+        rows = self.parse_results(url, content)
+        return rows if row_filter is None else [row for row in rows if row_filter(row)]
+
+    def _parse_cached(self, url: str, content: bytes) -> bool:
+        return bool(self.parse_cache) and self.parse_cache.get(self.parse_cache.make_key(url, content)) is not None
+
+    def stream_rows(self, url: str, chunks: Iterable[bytes], row_filter: Optional[Callable[[Dict], bool]] = None,
+                    observe_bytes: bool = True) -> Optional[List[Dict]]:
+        """边读取边提取页面的成绩行，返回通过 row_filter 的行；无法在流式读取中确定退回的表格时返回 None
+
+        配置了解析缓存时保留全部成绩行并按内容哈希写入解析缓存（与 parse_results 的缓存键相同），
+        否则只保留通过筛选的行。
+        """
+        digest = hashlib.sha256()
+        received = 0
+
+        def read():
+            nonlocal received
+            for chunk in chunks:
+                received += len(chunk)
+                digest.update(chunk)
+                yield chunk
+
+        keep_all = bool(self.parse_cache)
+        rows = []
+        results = self.iter_stream_results(read())
+        while True:
+            try:
+                row = next(results)
+            except StopIteration as done:
+                tables = done.value
+                break
+            if keep_all or row_filter is None or row_filter(row):
+                rows.append(row)
+        if observe_bytes:
+            metrics.PAGE_BYTES.observe(received)
+        if tables is None:
+            return None
+        if keep_all:
+            self.parse_cache.put(self.parse_cache.key_for_digest(url, digest.digest()), rows)
+            if row_filter is not None:
+                rows = [row for row in rows if row_filter(row)]
+        return rows
+
+    def iter_stream_results(self, chunks: Iterable[bytes]) -> Iterator[Dict]:
+        """流式提取：逐行产出页面中全部结果表格的成绩行，内存占用与页面大小无关
+
+        输出与 extract_results 相同（表格中出现嵌套表格后的行被跳过）。页面没有可识别表头的结果表格时，
+        按 find_results_table 的规则退回的表格在读取过程中缓存，页面结束后输出。
+        下载、解析和提取的耗时合计记录为 stream 阶段（不含调用方处理时间）。
+        生成器的返回值为提取的表格数；退回的表格含嵌套表格、无法在流式读取中确定时为 None，调用方需要整体解析。
+        """
+        elapsed = 0.0
+        tables = rows = 0
+        current = None
+        builder = None
+        started = time.perf_counter()
+        stream = fast_parser.iter_table_rows(
+            chunks, is_results_header=lambda headers: column_schema(tuple(headers)).detected)
+        while True:
+            try:
+                number, heading, headers, cells = next(stream)
+            except StopIteration as done:
+                fallback = done.value
+                break
+            if number != current:
+                current = number
+                builder = None
+                if column_schema(tuple(headers)).detected:
+                    builder = ResultRowBuilder(self, headers, heading, sections=True)
+                    tables += 1
+            if builder is None:
                 continue
-            
-            # 提取数据
-            name = actual_cells[name_idx] if name_idx < len(actual_cells) else ''
-            event = actual_cells[event_idx] if event_idx < len(actual_cells) else ''
-            time = actual_cells[time_idx] if time_idx < len(actual_cells) else ''
-            splits = actual_cells[splits_idx] if splits_idx and splits_idx < len(actual_cells) else ''
-            club = actual_cells[club_idx] if club_idx and club_idx < len(actual_cells) else ''
-            date = actual_cells[date_idx] if date_idx and date_idx < len(actual_cells) else ''
-            
-            # 跳过空行或表头行
-            if not name or not time:
+            result = builder.add(cells)
+            if result is None:
                 continue
-            
-            # 解析项目信息
-            event_info = self.parse_event(event)
-            
-            # 解析时间
-            parsed_time = self.parse_time(time)
-            
-            result = {
-                'name': name,
-                'event': event_info['event'],
-                'distance': event_info['distance'],
-                'stroke': event_info['stroke'],
-                'course': event_info['course'],
-                'time': parsed_time,
-                'splits': splits,
-                'club': club,
-                'date': date
+            result['time_hundredths'] = time_codec.time_to_hundredths(result['time'])
+            rows += 1
+            elapsed += time.perf_counter() - started
+            yield result
+            started = time.perf_counter()
+        if fallback is fast_parser.FALLBACK_UNAVAILABLE:
+            tables = None
+        elif fallback is not None:
+            headers, data_rows = fallback
+            results = self.build_results(headers, data_rows)
+            tables = 1
+            rows += len(results)
+            elapsed += time.perf_counter() - started
+            yield from results
+            started = time.perf_counter()
+        metrics.record_stage('stream', elapsed + time.perf_counter() - started)
+        TABLES_EXTRACTED.inc(tables or 0)
+        ROWS_EXTRACTED.inc(rows)
+        return tables
+
+    def parse_results(self, url: str, content: bytes) -> List[Dict]:
+        """解析页面内容中的成绩行，相同 URL 和内容的页面只解析一次"""
+        key = None
+        if self.parse_cache:
+            key = self.parse_cache.make_key(url, content)
+            cached = self.parse_cache.get(key)
+            if cached is not None:
+                return cached
+
+        rows = self.parse_results_with_engine(content, self.parser_engine)
+
+        if self.parse_cache:
+            self.parse_cache.put(key, rows)
+        return rows
+
+    def parse_results_with_engine(self, content: bytes, engine: str) -> List[Dict]:
+        """使用指定引擎解析成绩行，两种引擎的输出相同"""
+        if engine == 'lxml':
+            with metrics.stage('parse'):
+                document = fast_parser.parse_document(content)
+            if document is None:
+                return []
+            results = self.extract_tables(fast_parser.results_tables(document),
+                                          fast_parser.header_cells, fast_parser.data_cells)
+            if results is not None:
+                return results
+            table = fast_parser.find_results_table(document)
+            if table is None:
+                return []
+            with metrics.stage('extract'):
+                headers, data_rows = fast_parser.table_cells(table)
+                return self.build_results(headers, data_rows)
+
+        with metrics.stage('parse'):
+            soup = BeautifulSoup(content, 'lxml')
+        return self.extract_results(soup) or []
+
+    def iter_fetch_pages(self, urls: List[str], deadline: Optional[float] = None,
+                         heartbeat_interval: Optional[float] = None,
+                         row_filter: Optional[Callable[[Dict], bool]] = None
+                         ) -> Iterator[Tuple[Optional[str], Optional[List[Dict]]]]:
+        """并发抓取并解析多个页面，按完成顺序逐个产出 (URL, 成绩行)
+
+        页面获取失败时成绩行为 None；row_filter 不为空时只产出通过筛选的行；设置 heartbeat_interval 时，若该时间内没有页面完成，
+        产出 (None, None) 作为心跳。到达截止时间后停止，未产出的页面即为被跳过的页面。
+        """
+        if not urls:
+            return
+
+        end_time = time.monotonic() + deadline if deadline else None
+
+        if self.max_workers <= 1:
+            # 串行模式
+            for url in urls:
+                if end_time is not None and time.monotonic() >= end_time:
+                    return
+                yield url, self.fetch_page_results(url, row_filter)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        try:
+            # 每个任务在调用方上下文的副本中执行，阶段耗时累计到同一个请求
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.fetch_page_results, url, row_filter): url
+                for url in urls
             }
-            
-            results.append(result)
-        
-        return results
+            pending = set(futures)
+            while pending:
+                timeout = heartbeat_interval
+                if end_time is not None:
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    timeout = min(timeout, remaining) if timeout else remaining
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done and heartbeat_interval:
+                    yield None, None
+                for future in done:
+                    url = futures[future]
+                    try:
+                        rows = future.result()
+                    except Exception as e:
+                        print(f"Error parsing page {url}: {e}")
+                        rows = None
+                    yield url, rows
+        finally:
+            # 截止时间已到或调用方提前结束时，不等待仍在运行的线程
+            executor.shutdown(wait=False, cancel_futures=True)
 
-    def search_athlete(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
-        """搜索特定运动员的成绩"""
-        # 首先访问主页面
-        main_page = self.fetch_page(f"{self.base_url}/results.html")
-        if not main_page:
-            return []
-        
-        # 查找所有结果链接
-        results_links = []
-        for link in main_page.find_all('a', href=True):
-            href = link['href']
-            if 'result' in href.lower() or 'meet' in href.lower():
-                full_url = urljoin(self.base_url, href)
-                results_links.append(full_url)
+    def fetch_pages_concurrently(self, urls: List[str], deadline: Optional[float] = None,
+                                 row_filter: Optional[Callable[[Dict], bool]] = None
+                                 ) -> Tuple[Dict[str, List[Dict]], List[str], List[str]]:
+        """并发抓取并解析多个页面
+
+        返回 (按 URL 的成绩行, 截止时间内未完成而跳过的页面, 获取失败的页面)。
+        到达截止时间时返回已收集的结果，不再等待剩余页面。
+        """
+        pages: Dict[str, List[Dict]] = {}
+        failed: List[str] = []
+        for url, rows in self.iter_fetch_pages(urls, deadline, row_filter=row_filter):
+            if rows is None:
+                failed.append(url)
+            else:
+                pages[url] = rows
+        skipped = [url for url in urls if url not in pages and url not in failed]
+        return pages, skipped, failed
+
+    def match_athlete(self, result: Dict, athlete_name: str, club: Optional[str] = None) -> bool:
+        """判断成绩行是否属于指定运动员"""
+        name_match = athlete_name.lower() in result['name'].lower()
+        club_match = not club or (club and club.lower() in result['club'].lower())
+        return bool(name_match and club_match)
+
+    def search_athlete_detailed(self, athlete_name: str, club: Optional[str] = None,
+                                max_pages: Optional[int] = None,
+                                deadline: Optional[float] = None) -> Dict:
+        """搜索特定运动员的成绩，并返回抓取情况（跳过/失败的页面）"""
+        report = self.search_athletes_detailed([(athlete_name, club)], max_pages, deadline)
+        report['results'] = report['results'][0]
+        return report
+
+    def search_athletes_detailed(self, athletes: List[Tuple[str, Optional[str]]],
+                                 max_pages: Optional[int] = None,
+                                 deadline: Optional[float] = None) -> Dict:
+        """一次遍历结果页面，同时搜索多个运动员
+
+        athletes 为 (姓名, 俱乐部) 列表；返回的 results 与 athletes 一一对应，每项为该运动员的成绩列表。
+        每个页面只下载、解析一次，每行成绩只转换一次小写。
+        """
+        report = {
+            'results': [[] for _ in athletes],
+            'pages_total': 0,
+            'pages_fetched': 0,
+            'skipped_pages': [],
+            'failed_pages': [],
+        }
+
+        # 首先访问主页面，查找所有结果链接
+        results_links = self.result_links()
+        if results_links is None:
+            return report
         
-        all_results = []
+        if max_pages is not None:
+            results_links = results_links[:max_pages]
+        report['pages_total'] = len(results_links)
+
+        needles = [(name.lower(), club.lower() if club else None) for name, club in athletes]
+
+        def matches_any(result: Dict) -> bool:
+            row_name = result['name'].lower()
+            return any(name in row_name and (not club or club in result['club'].lower())
+                       for name, club in needles)
+
+        # 并发遍历结果页面，每个页面只保留可能匹配的行
+        pages, skipped, failed = self.fetch_pages_concurrently(
+            results_links, deadline if deadline is not None else self.deadline, matches_any
+        )
+        report['pages_fetched'] = len(pages)
+        report['skipped_pages'] = skipped
+        report['failed_pages'] = failed
+
+        # 按页面顺序过滤匹配的运动员（与 match_athlete 相同的子串匹配）
+        for url in results_links:
+            for result in pages.get(url, []):
+                row_name = result['name'].lower()
+                row_club = None
+                for i, (name, club) in enumerate(needles):
+                    if name not in row_name:
+                        continue
+                    if club:
+                        if row_club is None:
+                            row_club = result['club'].lower()
+                        if club not in row_club:
+                            continue
+                    report['results'][i].append(result)
         
-        # 遍历结果页面
-        for url in results_links[:10]:  # 限制前10个页面以避免过载
-            soup = self.fetch_page(url)
-            if not soup:
-                continue
-            
-            table = self.find_results_table(soup)
-            if not table:
+        return report
+
+    def search_athlete(self, athlete_name: str, club: Optional[str] = None,
+                       max_pages: Optional[int] = None,
+                       deadline: Optional[float] = None) -> List[Dict]:
+        """搜索特定运动员的成绩（max_pages 为空时遍历全部结果页面）"""
+        return self.search_athlete_detailed(athlete_name, club, max_pages, deadline)['results']
+
+    def iter_search_athlete(self, athlete_name: str, club: Optional[str] = None,
+                            max_pages: Optional[int] = None,
+                            deadline: Optional[float] = None,
+                            heartbeat_interval: float = 5) -> Iterator[Dict]:
+        """逐页搜索运动员成绩的生成器版本，每个页面解析完成后立即产出
+
+        产出的记录：
+            {'type': 'start', 'pages_total': n}
+            {'type': 'result', 'result': {...}}        每条匹配的成绩
+            {'type': 'progress', 'url': ..., 'pages_done': k, 'pages_total': n}
+            {'type': 'heartbeat', 'elapsed': 秒}       一段时间内没有页面完成时
+            {'type': 'summary', 'count': ..., 'pages_fetched': ..., 'skipped_pages': [...],
+             'failed_pages': [...], 'elapsed': 秒}
+        """
+        started = time.monotonic()
+
+        results_links = self.result_links()
+        if results_links is None:
+            results_links = []
+        if max_pages is not None:
+            results_links = results_links[:max_pages]
+        yield {'type': 'start', 'pages_total': len(results_links)}
+
+        count = 0
+        finished = set()
+        fetched = 0
+        failed = []
+        for url, rows in self.iter_fetch_pages(
+                results_links, deadline if deadline is not None else self.deadline, heartbeat_interval,
+                lambda result: self.match_athlete(result, athlete_name, club)):
+            if url is None:
+                yield {'type': 'heartbeat', 'elapsed': round(time.monotonic() - started, 3)}
                 continue
-            
-            results = self.extract_table_data(table)
-            
-            # 过滤匹配的运动员
-            for result in results:
-                name_match = athlete_name.lower() in result['name'].lower()
-                club_match = not club or (club and club.lower() in result['club'].lower())
-                
-                if name_match and club_match:
-                    all_results.append(result)
-        
-        return all_results
+
+            finished.add(url)
+            if rows is None:
+                failed.append(url)
+            else:
+                fetched += 1
+                for result in rows:
+                    if self.match_athlete(result, athlete_name, club):
+                        count += 1
+                        yield {'type': 'result', 'result': result}
+            yield {
+                'type': 'progress',
+                'url': url,
+                'pages_done': len(finished),
+                'pages_total': len(results_links),
+            }
+
+        yield {
+            'type': 'summary',
+            'count': count,
+            'pages_total': len(results_links),
+            'pages_fetched': fetched,
+            'skipped_pages': [url for url in results_links if url not in finished],
+            'failed_pages': failed,
+            'elapsed': round(time.monotonic() - started, 3),
+        }
 
     def get_personal_bests(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
         """获取运动员的个人最佳成绩（PB）"""
         all_results = self.search_athlete(athlete_name, club)
-        
+        return self.reduce_personal_bests(all_results)
+
+    def get_personal_bests_batch(self, athletes: List[Tuple[str, Optional[str]]],
+                                 max_pages: Optional[int] = None) -> List[List[Dict]]:
+        """一次遍历结果页面获取多个运动员的 PB，返回与 athletes 对应的 PB 列表"""
+        report = self.search_athletes_detailed(athletes, max_pages)
+        return [self.reduce_personal_bests(results) for results in report['results']]
+
+    def reduce_personal_bests(self, all_results: List[Dict]) -> List[Dict]:
+        """按项目分组，找出每个项目的最佳成绩"""
         if not all_results:
             return []
         
-        # 按项目分组，找出每个项目的最佳成绩
+        with metrics.stage('pb_reduce'):
+            return self._reduce_personal_bests(all_results)
+
+    def _reduce_personal_bests(self, all_results: List[Dict]) -> List[Dict]:
         pb_dict = {}
+        best_times = {}
         
         for result in all_results:
-            key = f"{result['distance']}_{result['stroke']}_{result['course']}"
+            key = (result['distance'], result['stroke'], result['course'])
+            current = self.result_hundredths(result)
             
             if key not in pb_dict:
                 pb_dict[key] = result
-            else:
-                # 比较时间，保留更快的
-                current_time = self.parse_time(result['time'])
-                best_time = self.parse_time(pb_dict[key]['time'])
-                
-                if current_time and best_time:
-                    # 转换为秒数进行比较
-                    current_seconds = self.time_to_seconds(current_time)
-                    best_seconds = self.time_to_seconds(best_time)
-                    
-                    if current_seconds and best_seconds and current_seconds < best_seconds:
-                        pb_dict[key] = result
+                best_times[key] = current
+            elif current is not None and best_times[key] is not None and current < best_times[key]:
+                # 保留更快的成绩（整数比较）
+                pb_dict[key] = result
+                best_times[key] = current
         
         return list(pb_dict.values())
 
+    def result_hundredths(self, result: Dict) -> Optional[int]:
+        """成绩行的百分之一秒时间（旧数据没有该字段时即时计算）"""
+        hundredths = result.get('time_hundredths')
+        if hundredths is None:
+            hundredths = time_codec.time_to_hundredths(result.get('time'))
+        return hundredths
+
     def time_to_seconds(self, time_str: str) -> Optional[float]:
         """将时间字符串转换为秒数"""
-        if not time_str:
-            return None
-        
-        try:
-            if ':' in time_str:
-                # MM:SS.hh 格式
-                parts = time_str.split(':')
-                minutes = int(parts[0])
-                seconds_parts = parts[1].split('.')
-                seconds = int(seconds_parts[0])
-                hundredths = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-                return minutes * 60 + seconds + hundredths / 100
-            else:
-                # SS.hh 格式
-                parts = time_str.split('.')
-                seconds = int(parts[0])
-                hundredths = int(parts[1]) if len(parts) > 1 else 0
-                return seconds + hundredths / 100
-        except:
+        hundredths = time_codec.time_to_hundredths(time_str)
+        if hundredths is None:
             return None
+        return hundredths / 100
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+"""
+分片多进程爬取
+把整站爬取和导入拆成任务放进持久化工作队列（work_queue.py），由 N 个工作进程（或共享目录的多台机器）并行处理：
+
+    index（results.html） -> year_page（年份页面） -> result_file（成绩文件）
+                          -> meet_page（比赛结果页面）
+
+每种任务复用 ResultsPageScraper / SwimmingArchiveScraper / result_files 的解析，输出保存在队列中，
+最后由 load 单进程写入成绩索引（SQLite 只有一个写入者）并追加比赛列表 CSV。
+所有进程的请求共用一个按主机的令牌桶（--rate），总请求速率不随工作进程数增加。
+
+用法：
+    python sharded_crawl.py run --workers 8 --rate 5 --db results.db
+    # 多台机器共享目录：一台执行 seed，每台执行 work（可用 --shard i --shards N 分片），最后执行 load
+    python sharded_crawl.py seed --queue /shared/crawl_queue.db
+    python sharded_crawl.py work --queue /shared/crawl_queue.db --processes 4
+    python sharded_crawl.py load --queue /shared/crawl_queue.db --db results.db
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from scraper import SwimmingArchiveScraper
+from scrape_results_page import ResultsPageScraper, write_csv
+from crawl_scheduler import CrawlScheduler, RETRY_STATUS
+from results_store import ResultsStore
+from work_queue import WorkQueue, SharedRateLimiter, shard_key
+import metrics
+import result_files
+
+
+INDEX = 'index'
+YEAR_PAGE = 'year_page'
+MEET_PAGE = 'meet_page'
+RESULT_FILE = 'result_file'
+
+# 先处理能发现新任务的页面
+PRIORITY = {INDEX: 0, YEAR_PAGE: 1, MEET_PAGE: 2, RESULT_FILE: 3}
+
+
+class PermanentError(Exception):
+    """不需要重试的失败（例如无法识别的文件格式）"""
+
+
+def make_task(url: str, kind: str, year: str = '', shard_by: str = 'url', **meta) -> Dict:
+    """shard_by='year' 时同一年份的页面和文件分到同一分片"""
+    key = int(year) if shard_by == 'year' and year.isdigit() else shard_key(url)
+    return {'url': url, 'kind': kind, 'priority': PRIORITY[kind], 'shard_key': key,
+            'meta': {'year': year, 'shard_by': shard_by, **meta}}
+
+
+class CrawlWorker:
+    def __init__(self, queue: WorkQueue, base_url: str, scheduler: CrawlScheduler,
+                 worker_id: Optional[str] = None, engine: str = 'lxml'):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.page_scraper = ResultsPageScraper(base_url, scheduler=scheduler, parser='lxml')
+        self.archive_scraper = SwimmingArchiveScraper(base_url, parser_engine=engine, scheduler=scheduler)
+        self.processed: Dict[str, int] = {}
+        self.failed = 0
+        self.lost_leases = 0
+
+    def _fetch(self, url: str) -> bytes:
+        """下载内容；4xx 不再重试，其他错误由队列退避后重试"""
+        with metrics.stage('fetch'):
+            response = self.archive_scraper.http.get(url, timeout=30)
+        if 400 <= response.status_code < 500 and response.status_code not in RETRY_STATUS:
+            raise PermanentError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        metrics.PAGE_BYTES.observe(len(response.content))
+        return response.content
+
+    def handle(self, task: Dict) -> Tuple[object, List[Dict]]:
+        """执行一个任务，返回 (输出, 子任务)"""
+        url, kind, meta = task['url'], task['kind'], task['meta']
+        shard_by = meta.get('shard_by', 'url')
+        # 每个任务使用新的去重集合（重试的任务不能被上一次的结果去重掉）
+        self.page_scraper.frontier.begin()
+
+        if kind == INDEX:
+            self.page_scraper.frontier.mark_seen(url)
+            soup = self.page_scraper.parse_page(self._fetch(url))
+            year_links = self.page_scraper.find_year_links(soup)
+            meet_links = self.archive_scraper.find_result_links(soup, kinds=(MEET_PAGE,))
+            children = [make_task(link['url'], YEAR_PAGE, link['year'], shard_by) for link in year_links]
+            children += [make_task(link, MEET_PAGE, shard_by=shard_by) for link in meet_links]
+            return {'year_pages': len(year_links), 'meet_pages': len(meet_links)}, children
+
+        if kind == YEAR_PAGE:
+            soup = self.page_scraper.parse_page(self._fetch(url))
+            competitions = self.page_scraper.find_competition_links(soup, meta['year'], url)
+            children = [make_task(comp['download_link'],
+                                  RESULT_FILE if result_files.is_result_file(comp['download_link']) else MEET_PAGE,
+                                  meta['year'], shard_by, competition_name=comp['competition_name'])
+                        for comp in competitions]
+            return competitions, children
+
+        if kind == MEET_PAGE:
+            return self.archive_scraper.parse_results(url, self._fetch(url)), []
+
+        if kind == RESULT_FILE:
+            content = self._fetch(url)
+            try:
+                fmt = result_files.detect_format(url, content)
+            except result_files.UnsupportedFormat as e:
+                raise PermanentError(str(e))
+            return result_files.parse_result_file(fmt, content, meta.get('year', '')), []
+
+        raise PermanentError(f"unknown task kind: {kind}")
+
+    def run(self, shard: Optional[int] = None, shards: Optional[int] = None,
+            poll_interval: float = 0.2, max_idle: Optional[float] = None) -> Dict:
+        """领取并处理任务，直到队列中没有未完成的任务（或空闲超过 max_idle 秒）"""
+        idle_since = None
+        try:
+            while True:
+                tasks = self.queue.lease(self.worker_id, limit=1, shard=shard, shards=shards)
+                if not tasks:
+                    # 其他进程租用中的任务可能失败后重新排队，等全部完成再退出
+                    if self.queue.outstanding() == 0:
+                        break
+                    idle_since = idle_since or time.monotonic()
+                    if max_idle is not None and time.monotonic() - idle_since > max_idle:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                idle_since = None
+
+                task = tasks[0]
+                try:
+                    payload, children = self.handle(task)
+                except PermanentError as e:
+                    self.failed += 1
+                    self.queue.fail(task, self.worker_id, str(e), retry=False)
+                    continue
+                except Exception as e:
+                    self.failed += 1
+                    self.queue.fail(task, self.worker_id, f"{type(e).__name__}: {e}")
+                    continue
+                if self.queue.complete(task, self.worker_id, payload, children):
+                    self.processed[task['kind']] = self.processed.get(task['kind'], 0) + 1
+                else:
+                    # 租约已过期并被其他进程接管，本次输出丢弃
+                    self.lost_leases += 1
+        finally:
+            self.queue.release(self.worker_id)
+        return {'worker': self.worker_id, 'processed': self.processed, 'failed': self.failed,
+                'lost_leases': self.lost_leases}
+
+
+def seed(queue: WorkQueue, base_url: str, shard_by: str = 'url') -> int:
+    """添加入口任务（results.html）"""
+    return queue.enqueue([make_task(f"{base_url}/results.html", INDEX, shard_by=shard_by)])
+
+
+def load(queue: WorkQueue, store: ResultsStore, csv_path: Optional[str] = None) -> Dict:
+    """把尚未导入的输出写入成绩索引，年份页面中的比赛追加到 CSV"""
+    report = {'pages': 0, 'rows': 0, 'competitions': 0}
+    batch: List[str] = []
+    for output in queue.unloaded_outputs():
+        kind, payload = output['kind'], output['payload']
+        if kind in (MEET_PAGE, RESULT_FILE):
+            report['rows'] += store.replace_page(output['url'], payload)
+            report['pages'] += 1
+        elif kind == YEAR_PAGE and payload and csv_path:
+            write_csv(csv_path, payload, append=True)
+            report['competitions'] += len(payload)
+        batch.append(output['url'])
+        if len(batch) >= 100:
+            queue.mark_loaded(batch)
+            batch = []
+    if batch:
+        queue.mark_loaded(batch)
+    return report
+
+
+def _work(args: argparse.Namespace, index: int) -> Dict:
+    """单个工作进程（在子进程中创建自己的 SQLite 连接和 HTTP 会话）"""
+    wal = not args.no_wal
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts, wal=wal)
+    budget = SharedRateLimiter(args.queue, rate=args.rate, burst=args.burst, wal=wal)
+    # 单个进程内不再限速，速率由共享预算控制；并发仍按延迟和错误率自适应
+    scheduler = CrawlScheduler(rate=0, max_concurrency=args.per_host_limit, budget=budget)
+    worker = CrawlWorker(queue, args.base_url, scheduler, engine=args.engine,
+                         worker_id=f"{socket.gethostname()}-{os.getpid()}-{index}")
+    return worker.run(shard=args.shard, shards=args.shards, max_idle=args.max_idle)
+
+
+def work(args: argparse.Namespace) -> List[Dict]:
+    """启动 args.processes 个工作进程并等待全部结束"""
+    if args.processes <= 1:
+        return [_work(args, 0)]
+    with multiprocessing.Pool(args.processes) as pool:
+        return pool.starmap(_work, [(args, i) for i in range(args.processes)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片多进程爬取与导入")
+    parser.add_argument('command', choices=['run', 'seed', 'work', 'load', 'status'])
+    parser.add_argument('--queue', default='crawl_queue.db', help="工作队列 SQLite 文件")
+    parser.add_argument('--base-url', default='https://archive.swimming.org.nz')
+    parser.add_argument('--workers', '--processes', dest='processes', type=int, default=4, help="工作进程数")
+    parser.add_argument('--shard', type=int, default=None, help="只处理该分片（配合 --shards）")
+    parser.add_argument('--shards', type=int, default=None, help="分片总数")
+    parser.add_argument('--shard-by', default='url', choices=['url', 'year'], help="按 URL 哈希或年份分片")
+    parser.add_argument('--rate', type=float, default=5, help="所有进程合计每个主机每秒最多的请求数")
+    parser.add_argument('--burst', type=float, default=5)
+    parser.add_argument('--per-host-limit', type=int, default=4, help="每个进程对单个主机的最大并发")
+    parser.add_argument('--engine', default='lxml', choices=['bs4', 'lxml'], help="比赛页面的解析引擎")
+    parser.add_argument('--lease-seconds', type=float, default=300)
+    parser.add_argument('--max-attempts', type=int, default=3)
+    parser.add_argument('--max-idle', type=float, default=None, help="没有可领取任务时最多等待的秒数")
+    parser.add_argument('--no-wal', action='store_true', help="共享目录在网络文件系统上时关闭 WAL")
+    parser.add_argument('--db', default='results.db', help="成绩索引 SQLite 文件")
+    parser.add_argument('--csv', default=None, help="追加比赛列表的 CSV（可选）")
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出统计")
+    args = parser.parse_args()
+    if (args.shard is None) != (args.shards is None):
+        parser.error("--shard 和 --shards 需要同时指定")
+
+    queue = WorkQueue(args.queue, max_attempts=args.max_attempts, wal=not args.no_wal)
+    report: Dict = {}
+    started = time.perf_counter()
+    try:
+        if args.command in ('run', 'seed'):
+            report['seeded'] = seed(queue, args.base_url, args.shard_by)
+        if args.command in ('run', 'work'):
+            report['workers'] = work(args)
+        if args.command in ('run', 'load'):
+            report['load'] = load(queue, ResultsStore(args.db), args.csv)
+    except KeyboardInterrupt:
+        print("\n\n用户中断程序，队列状态已保存，再次运行 work 将继续")
+        sys.exit(130)
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    report['queue'] = queue.stats()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for worker in report.get('workers', []):
+        print(f"{worker['worker']}: 完成 {worker['processed']}，失败 {worker['failed']} 次，"
+              f"租约被接管 {worker['lost_leases']} 次")
+    if 'load' in report:
+        load_report = report['load']
+        print(f"导入 {load_report['pages']} 个页面 / 文件，{load_report['rows']} 条成绩，"
+              f"{load_report['competitions']} 个比赛")
+    for kind, counts in report['queue']['tasks'].items():
+        print(f"{kind}: {counts}")
+    for error in report['queue']['errors']:
+        print(f"  失败 {error['url']}: {error['error']}")
+    print(f"用时 {report['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+相同请求合并（singleflight）
+多个线程同时发起相同 key 的查询时，只有第一个（leader）真正执行，其余线程等待并共享结果。
+leader 失败时等待中的线程立即收到同样的异常；等待超时抛出 CoalescedTimeout。
+AsyncSingleFlight 为异步服务（asgi_app.py）中的协程版本；leader 协程被取消（如客户端断开）时由等待方接替执行。
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class CoalescedTimeout(Exception):
+    """等待 leader 结果超时"""
+
+
+class _LeaderCancelled(Exception):
+    """异步 leader 被取消（例如客户端断开），等待方应重新发起调用"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按 key 合并并发调用"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """执行 fn 或等待正在进行的相同调用，返回 (结果, 是否为共享结果)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise CoalescedTimeout(f"Timed out after {timeout}s waiting for an in-flight request")
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            # 先移除 key 再唤醒，之后的新请求会重新执行而不是拿到旧结果
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def stats(self) -> Dict:
+        """返回合并统计"""
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'in_flight': len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """SingleFlight 的 asyncio 版本，在同一个事件循环内合并相同 key 的协程调用"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, 'asyncio.Future'] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.takeovers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """执行协程函数 fn 或等待正在进行的相同调用，返回 (结果, 是否为共享结果)
+
+        leader 被取消时不会连带取消等待方：第一个醒来的等待方接替 leader 重新执行，其余等待方改为等待它。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        took_over = False
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            if not took_over:
+                self.coalesced += 1
+            remaining = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                # shield：等待方超时不会取消 leader 的调用
+                return await asyncio.wait_for(asyncio.shield(future), remaining), True
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise CoalescedTimeout(f"Timed out after {timeout}s waiting for an in-flight request")
+            except _LeaderCancelled:
+                took_over = True
+
+        future = loop.create_future()
+        self._calls[key] = future
+        if took_over:
+            self.takeovers += 1
+        else:
+            self.leaders += 1
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            # 只取消 leader 自己；等待方收到 _LeaderCancelled 后接替执行
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            self.errors += 1
+            if not future.done():
+                future.set_exception(e)
+                # 没有等待方时避免 "exception was never retrieved" 警告
+                future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            self._calls.pop(key, None)
+
+    def stats(self) -> Dict:
+        """返回合并统计"""
+        return {
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'takeovers': self.takeovers,
+            'in_flight': len(self._calls),
+        }
@@ -0,0 +1,490 @@
+"""
+列式二进制快照
+把成绩索引（results 表）和比赛列表（swimming_results.csv）保存为只读的列式文件，通过 mmap 打开：
+打开时只读取末尾的 JSON 目录，各列直接映射为 memoryview，不解析、不复制，常驻内存只包含实际访问过的页面。
+
+文件结构（小端，按 8 字节对齐）：
+    b'GSWSNAP1' | 目录偏移 uint64 | 目录长度 uint64 | 列数据 ... | JSON 目录
+列类型：
+    dict  字典编码的字符串：每行一个 uint32 编码 + 字典（uint64 偏移数组 + UTF-8 数据）
+    int32 / int64 / float64  定长数值，int32 中 -1 表示空值（time_hundredths）
+results 表按 (name_norm, 原始 id) 排序，name_norm 字典有序，并保存每个姓名对应的行范围，
+按姓名查询是一次二分查找；姓名子串匹配直接在映射的字典数据上用 mmap.find 查找。
+
+用法：
+    python snapshot.py build --db results.db --competitions swimming_results.csv --output results.snap
+    python snapshot.py info results.snap [--search "Michael"]
+    python snapshot.py export results.snap --table results --format csv --output results.csv
+"""
+import argparse
+import csv
+import io
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from results_store import RESULT_COLUMNS, PB_COLUMNS, normalize_text
+
+
+MAGIC = b'GSWSNAP1'
+HEADER = len(MAGIC) + 16
+ALIGN = 8
+VERSION = 1
+# 数值列的空值
+MISSING = -1
+
+# results 表的列：(列名, 类型)
+RESULTS_SCHEMA = [
+    ('name_norm', 'dict'), ('name', 'dict'), ('event', 'dict'), ('distance', 'dict'), ('stroke', 'dict'),
+    ('course', 'dict'), ('time', 'dict'), ('time_hundredths', 'int32'), ('splits', 'dict'),
+    ('club', 'dict'), ('club_norm', 'dict'), ('date', 'dict'), ('source_url', 'dict'), ('row_id', 'int64'),
+]
+COMPETITIONS_SCHEMA = [('year', 'dict'), ('competition_name', 'dict'), ('download_link', 'dict')]
+COMPETITION_COLUMNS = [name for name, _ in COMPETITIONS_SCHEMA]
+
+ARRAY_CODES = {'int32': 'i', 'int64': 'q', 'float64': 'd'}
+
+
+class _DictBuilder:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.codes = array('I')
+
+    def append(self, value: Optional[str]):
+        value = value or ''
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.index)
+        self.codes.append(code)
+
+
+class TableBuilder:
+    """逐行追加，build_snapshot 时写入文件；sorted_column 的值必须按 UTF-8 字节序追加"""
+
+    def __init__(self, schema: List[Tuple[str, str]], sorted_column: Optional[str] = None):
+        self.schema = schema
+        self.sorted_column = sorted_column
+        self.rows = 0
+        self.columns = {name: _DictBuilder() if kind == 'dict' else array(ARRAY_CODES[kind])
+                        for name, kind in schema}
+        # 附加在字典上的数值（例如 source_url -> 导入时间），按字典编码保存
+        self.extras: Dict[str, Dict[str, float]] = {}
+
+    def append(self, row: Dict):
+        for name, kind in self.schema:
+            value = row.get(name)
+            if kind == 'dict':
+                self.columns[name].append(value)
+            else:
+                self.columns[name].append(MISSING if value is None else value)
+        self.rows += 1
+
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+
+    def blob(self, data) -> List[int]:
+        """写入一段数据（bytes 或 array），返回 [偏移, 长度]"""
+        position = self.f.tell()
+        padding = -position % ALIGN
+        if padding:
+            self.f.write(b'\0' * padding)
+            position += padding
+        raw = data.tobytes() if isinstance(data, array) else data
+        self.f.write(raw)
+        return [position, len(raw)]
+
+
+def _write_table(writer: _Writer, table: TableBuilder) -> Dict:
+    spec = {'rows': table.rows, 'columns': {}}
+    for name, kind in table.schema:
+        column = table.columns[name]
+        if kind != 'dict':
+            spec['columns'][name] = {'type': kind, 'values': writer.blob(column)}
+            continue
+        offsets = array('Q', [0])
+        data = io.BytesIO()
+        for value in column.index:
+            data.write(value.encode('utf-8'))
+            offsets.append(data.tell())
+        column_spec = {
+            'type': 'dict',
+            'size': len(column.index),
+            'sorted': name == table.sorted_column,
+            'codes': writer.blob(column.codes),
+            'offsets': writer.blob(offsets),
+            'data': writer.blob(data.getvalue()),
+        }
+        if name == table.sorted_column:
+            # 每个字典值对应的行范围 [starts[code], starts[code + 1])
+            starts = array('Q', [0] * (len(column.index) + 1))
+            for code in column.codes:
+                starts[code + 1] += 1
+            for code in range(len(column.index)):
+                starts[code + 1] += starts[code]
+            column_spec['starts'] = writer.blob(starts)
+        for extra_name, values in table.extras.get(name, {}).items():
+            column_spec.setdefault('extras', {})[extra_name] = writer.blob(
+                array('d', [values.get(value, 0.0) for value in column.index]))
+        spec['columns'][name] = column_spec
+    return spec
+
+
+def build_snapshot(path: str, tables: Dict[str, TableBuilder], meta: Optional[Dict] = None):
+    """写入快照（先写临时文件再替换，已打开旧快照的进程不受影响）"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + b'\0' * 16)
+        writer = _Writer(f)
+        directory = {
+            'version': VERSION,
+            'byteorder': sys.byteorder,
+            'created_at': time.time(),
+            'meta': meta or {},
+            'tables': {name: _write_table(writer, table) for name, table in tables.items()},
+        }
+        raw = json.dumps(directory).encode('utf-8')
+        directory_offset = f.tell()
+        f.write(raw)
+        f.seek(len(MAGIC))
+        f.write(directory_offset.to_bytes(8, 'little') + len(raw).to_bytes(8, 'little'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def results_table_from_store(db_path: str) -> TableBuilder:
+    """从 SQLite 成绩索引按 (name_norm, id) 顺序读取全部成绩"""
+    table = TableBuilder(RESULTS_SCHEMA, sorted_column='name_norm')
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        table.extras['source_url'] = {'ingested_at': dict(conn.execute('SELECT url, ingested_at FROM pages'))}
+        cursor = conn.execute('SELECT id AS row_id, * FROM results ORDER BY name_norm, id')
+        while True:
+            batch = cursor.fetchmany(10000)
+            if not batch:
+                break
+            for row in batch:
+                table.append(dict(row))
+    finally:
+        conn.close()
+    return table
+
+
+def competitions_table_from_csv(csv_path: str) -> TableBuilder:
+    """读取 scrape_results_page.py 生成的 CSV（同一链接以最后一行为准）"""
+    rows: Dict[str, Dict] = {}
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            link = (row.get('download_link') or '').strip()
+            if link:
+                rows[link] = row
+    table = TableBuilder(COMPETITIONS_SCHEMA)
+    for row in rows.values():
+        table.append(row)
+    return table
+
+
+class DictColumn:
+    def __init__(self, buffer: mmap.mmap, view: memoryview, spec: Dict):
+        self.buffer = buffer
+        self.size = spec['size']
+        self.sorted = spec['sorted']
+        self.codes = _slice(view, spec['codes']).cast('I')
+        self.offsets = _slice(view, spec['offsets']).cast('Q')
+        self.data_start, data_length = spec['data']
+        self.data_end = self.data_start + data_length
+        self.starts = _slice(view, spec['starts']).cast('Q') if 'starts' in spec else None
+        self.extras = {name: _slice(view, extra).cast('d') for name, extra in spec.get('extras', {}).items()}
+
+    def raw(self, code: int) -> bytes:
+        return self.buffer[self.data_start + self.offsets[code]:self.data_start + self.offsets[code + 1]]
+
+    def value(self, code: int) -> str:
+        return self.raw(code).decode('utf-8')
+
+    def __getitem__(self, row: int) -> str:
+        return self.value(self.codes[row])
+
+    def lookup(self, value: str) -> Optional[int]:
+        """有序字典中精确查找，返回编码"""
+        target = value.encode('utf-8')
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.raw(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.size and self.raw(low) == target else None
+
+    def search(self, needle: str) -> List[int]:
+        """包含 needle 的字典值的编码（在映射的字典数据上直接查找）"""
+        target = needle.encode('utf-8')
+        codes = []
+        position = self.buffer.find(target, self.data_start, self.data_end)
+        while position != -1:
+            relative = position - self.data_start
+            code = bisect_right(self.offsets, relative, 0, self.size) - 1
+            end = self.offsets[code + 1]
+            if relative + len(target) <= end:
+                codes.append(code)
+                # 同一个值中的其他匹配不再重复
+                position = self.buffer.find(target, self.data_start + end, self.data_end)
+            else:
+                position = self.buffer.find(target, position + 1, self.data_end)
+        return codes
+
+    def row_range(self, code: int) -> range:
+        return range(self.starts[code], self.starts[code + 1])
+
+
+def _slice(view: memoryview, location: List[int]) -> memoryview:
+    offset, length = location
+    return view[offset:offset + length]
+
+
+class SnapshotTable:
+    def __init__(self, buffer: mmap.mmap, view: memoryview, spec: Dict):
+        self.rows = spec['rows']
+        self.columns: Dict[str, object] = {}
+        for name, column_spec in spec['columns'].items():
+            if column_spec['type'] == 'dict':
+                self.columns[name] = DictColumn(buffer, view, column_spec)
+            else:
+                self.columns[name] = _slice(view, column_spec['values']).cast(ARRAY_CODES[column_spec['type']])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def value(self, column: str, row: int):
+        value = self.columns[column][row]
+        if isinstance(value, int) and value == MISSING:
+            return None
+        return value
+
+    def row(self, row: int, columns: Optional[List[str]] = None) -> Dict:
+        return {column: self.value(column, row) for column in (columns or self.columns)}
+
+    def iter_rows(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        for row in range(self.rows):
+            yield self.row(row, columns)
+
+
+class Snapshot:
+    """通过 mmap 打开的只读快照"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} 不是成绩快照文件")
+        directory_offset = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], 'little')
+        directory_length = int.from_bytes(self._mmap[len(MAGIC) + 8:HEADER], 'little')
+        self.directory = json.loads(self._mmap[directory_offset:directory_offset + directory_length])
+        if self.directory['version'] != VERSION or self.directory['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path}: 不支持的快照版本或字节序")
+        self._view = memoryview(self._mmap)
+        self.tables = {name: SnapshotTable(self._mmap, self._view, spec)
+                       for name, spec in self.directory['tables'].items()}
+
+    @property
+    def created_at(self) -> float:
+        return self.directory['created_at']
+
+    def close(self):
+        # 释放所有 memoryview 之后才能关闭 mmap
+        self.tables = {}
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+class ResultsSnapshot:
+    """基于快照的只读成绩查询，接口与 ResultsStore 的查询方法相同"""
+
+    def __init__(self, path: str):
+        self.snapshot = Snapshot(path)
+        self.results = self.snapshot.tables.get('results')
+
+    def has_data(self) -> bool:
+        return self.results is not None and len(self.results) > 0
+
+    def last_ingested_at(self) -> Optional[float]:
+        """快照中最近一次写入页面的时间"""
+        if self.results is None:
+            return None
+        ingested_at = self.results.columns['source_url'].extras.get('ingested_at')
+        return max(ingested_at, default=None) if ingested_at else self.snapshot.created_at
+
+    def _matching_name_codes(self, name_norm: str) -> List[int]:
+        return self.results.columns['name_norm'].search(name_norm)
+
+    def _rows_for_names(self, codes: Iterable[int], club: Optional[str]) -> List[int]:
+        name_column = self.results.columns['name_norm']
+        rows = [row for code in codes for row in name_column.row_range(code)]
+        if club:
+            club_norm = normalize_text(club)
+            club_column = self.results.columns['club_norm']
+            rows = [row for row in rows if club_norm in club_column[row]]
+        return rows
+
+    def _result(self, row: int) -> Dict:
+        result = {column: self.results.value(column, row) or '' for column in RESULT_COLUMNS}
+        result['time_hundredths'] = self.results.value('time_hundredths', row)
+        return result
+
+    def search(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
+        name_norm = normalize_text(athlete_name)
+        if not name_norm or not self.has_data():
+            return []
+        rows = self._rows_for_names(self._matching_name_codes(name_norm), club)
+        # 与 ResultsStore 相同，按原始导入顺序返回
+        row_ids = self.results.columns['row_id']
+        return [self._result(row) for row in sorted(rows, key=row_ids.__getitem__)]
+
+    def search_by_names(self, name_norms: List[str], club: Optional[str] = None) -> List[Dict]:
+        if not self.has_data():
+            return []
+        name_column = self.results.columns['name_norm']
+        codes = [code for code in (name_column.lookup(name) for name in name_norms) if code is not None]
+        rows = self._rows_for_names(codes, club)
+        row_ids = self.results.columns['row_id']
+        return [self._result(row) for row in sorted(rows, key=row_ids.__getitem__)]
+
+    def personal_bests(self, athlete_name: str, club: Optional[str] = None) -> List[Dict]:
+        """姓名按子串匹配（与 search 相同）；每个项目保留最快的成绩"""
+        name_norm = normalize_text(athlete_name)
+        if not name_norm or not self.has_data():
+            return []
+        rows = self._rows_for_names(self._matching_name_codes(name_norm), club)
+
+        times = self.results.columns['time_hundredths']
+        best: Dict[Tuple, int] = {}
+        for row in rows:
+            hundredths = times[row]
+            if hundredths == MISSING:
+                continue
+            key = (self.results.value('distance', row), self.results.value('stroke', row),
+                   self.results.value('course', row))
+            if key not in best or hundredths < times[best[key]]:
+                best[key] = row
+        source_column = self.results.columns['source_url']
+        ingested_at = source_column.extras.get('ingested_at')
+        pbs = []
+        for row in best.values():
+            pb = {column: self.results.value(column, row) for column in PB_COLUMNS if column != 'updated_at'}
+            pb['updated_at'] = ingested_at[source_column.codes[row]] if ingested_at else self.snapshot.created_at
+            pbs.append(pb)
+        return pbs
+
+    def athletes(self) -> Iterator[Tuple[str, str]]:
+        """所有不重复的 (姓名, 俱乐部)"""
+        if not self.has_data():
+            return iter([])
+        names, clubs = self.results.columns['name'], self.results.columns['club']
+        pairs = dict.fromkeys(zip(names.codes, clubs.codes))
+        return ((names.value(name), clubs.value(club)) for name, club in pairs)
+
+    def stats(self) -> Dict:
+        return {
+            'snapshot': self.snapshot.path,
+            'results': len(self.results) if self.results is not None else 0,
+            'created_at': self.snapshot.created_at,
+        }
+
+
+def export_table(snapshot: Snapshot, table_name: str, fmt: str, out) -> int:
+    """导出为 CSV（与 save_to_csv / 成绩索引的列相同）或 JSON 数组，返回行数"""
+    table = snapshot.tables[table_name]
+    if table_name == 'competitions':
+        columns = COMPETITION_COLUMNS
+    else:
+        columns = ['source_url'] + RESULT_COLUMNS + ['time_hundredths']
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        for row in table.iter_rows(columns):
+            writer.writerow(row)
+    else:
+        out.write('[')
+        for index, row in enumerate(table.iter_rows(columns)):
+            out.write((',\n' if index else '\n') + json.dumps(row, ensure_ascii=False))
+        out.write('\n]\n')
+    return len(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="成绩快照：生成、查看、导出")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="从成绩索引和比赛列表 CSV 生成快照")
+    build.add_argument('--db', default=None, help="SQLite 成绩索引")
+    build.add_argument('--competitions', default=None, help="scrape_results_page.py 生成的 CSV")
+    build.add_argument('--output', default='results.snap')
+    info = sub.add_parser('info', help="查看快照（打开耗时、行数、大小）")
+    info.add_argument('path')
+    info.add_argument('--search', default=None, help="测试一次姓名查询")
+    export = sub.add_parser('export', help="导出为 CSV / JSON")
+    export.add_argument('path')
+    export.add_argument('--table', default='results', choices=['results', 'competitions'])
+    export.add_argument('--format', default='csv', choices=['csv', 'json'])
+    export.add_argument('--output', default=None, help="输出文件（默认标准输出）")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not args.db and not args.competitions:
+            parser.error("至少需要 --db 或 --competitions")
+        started = time.perf_counter()
+        tables = {}
+        if args.db:
+            tables['results'] = results_table_from_store(args.db)
+        if args.competitions:
+            tables['competitions'] = competitions_table_from_csv(args.competitions)
+        build_snapshot(args.output, tables, meta={'db': args.db, 'competitions': args.competitions})
+        counts = ', '.join(f"{name} {table.rows} 行" for name, table in tables.items())
+        print(f"已生成 {args.output}：{counts}，{os.path.getsize(args.output) / 1e6:.1f} MB，"
+              f"用时 {time.perf_counter() - started:.2f}s")
+
+    elif args.command == 'info':
+        started = time.perf_counter()
+        snapshot = ResultsSnapshot(args.path)
+        opened = (time.perf_counter() - started) * 1000
+        print(f"{args.path}: {os.path.getsize(args.path) / 1e6:.1f} MB，打开用时 {opened:.2f} ms")
+        for name, table in snapshot.snapshot.tables.items():
+            sizes = ', '.join(f"{column} {spec['size']}" for column, spec in
+                              snapshot.snapshot.directory['tables'][name]['columns'].items() if spec['type'] == 'dict')
+            print(f"  {name}: {len(table)} 行；字典大小：{sizes}")
+        if args.search:
+            started = time.perf_counter()
+            results = snapshot.search(args.search)
+            print(f"  搜索 {args.search!r}: {len(results)} 条，用时 {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    elif args.command == 'export':
+        snapshot = Snapshot(args.path)
+        if args.output:
+            with open(args.output, 'w', newline='',
+                      encoding='utf-8-sig' if args.format == 'csv' else 'utf-8') as out:
+                count = export_table(snapshot, args.table, args.format, out)
+            print(f"已导出 {count} 行到 {args.output}")
+        else:
+            export_table(snapshot, args.table, args.format, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+达标标准与纪录比较
+启动时一次性载入 ASA 达标时间（前端 data/asaStandards.ts）和奥克兰短池纪录（services/recordDataService.ts），
+两者由 export_standards.py 导出到 standards.json。每个年龄的适用标准预先展开为按 (性别, 年龄, 泳池, 距离, 泳姿) 索引的查找表，
+时间统一为整数百分之一秒；compare 把运动员全部 PB 与所有对应的标准和纪录一次性比较（安装 NumPy 时向量化）。
+"""
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from time_codec import time_to_hundredths, format_hundredths
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standards.json')
+
+# 展开查找表的年龄范围；更大的年龄按 MAX_AGE 处理（只有 “xx 岁及以上” 的标准适用）
+MIN_AGE, MAX_AGE = 5, 30
+
+GENDERS = {
+    'f': 'F', 'female': 'F', 'girl': 'F', 'girls': 'F', 'w': 'F', 'women': 'F',
+    'm': 'M', 'male': 'M', 'boy': 'M', 'boys': 'M', 'men': 'M',
+}
+STROKES = {
+    'freestyle': 'Freestyle', 'free': 'Freestyle', 'fr': 'Freestyle',
+    'backstroke': 'Backstroke', 'back': 'Backstroke', 'bk': 'Backstroke',
+    'breaststroke': 'Breaststroke', 'breast': 'Breaststroke', 'br': 'Breaststroke',
+    'butterfly': 'Butterfly', 'fly': 'Butterfly',
+    'im': 'IM', 'medley': 'IM', 'individual medley': 'IM',
+}
+EVENT_PATTERN = re.compile(r'^\s*(\d+)\s*m?\s+(.+?)\s*$', re.IGNORECASE)
+DISTANCE_PATTERN = re.compile(r'\d+')
+
+
+def normalize_gender(value: Optional[str]) -> Optional[str]:
+    return GENDERS.get((value or '').strip().lower())
+
+
+def normalize_stroke(value: Optional[str]) -> Optional[str]:
+    return STROKES.get(' '.join((value or '').lower().split()))
+
+
+def parse_distance(value) -> Optional[int]:
+    match = DISTANCE_PATTERN.search(str(value or ''))
+    return int(match.group(0)) if match else None
+
+
+def format_difference(hundredths: int) -> str:
+    """与前端 formatDifference 相同：更快为负数，更慢带 +"""
+    sign = '-' if hundredths < 0 else ('+' if hundredths > 0 else '')
+    seconds, remainder = divmod(abs(hundredths), 100)
+    return f"{sign}{seconds}.{remainder:02d}"
+
+
+class StandardsTable:
+    """预先展开的标准 / 纪录查找表（只读，可在线程间共享）"""
+
+    def __init__(self, data: Dict):
+        # 所有目标按下标保存在平行数组中；查找表的值是目标下标列表
+        self.kinds: List[str] = []
+        self.names: List[str] = []
+        self.times: List[str] = []
+        self.hundredths: List[int] = []
+        self.details: List[Dict] = []
+        self.lookup: Dict[Tuple[str, int, str, int, str], List[int]] = {}
+        self._load_standards(data.get('asa_standards') or {})
+        for records in data.get('records') or []:
+            self._load_records(records)
+        self.hundredths_array = np.array(self.hundredths, dtype=np.int64) if np is not None else None
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> 'StandardsTable':
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _add_target(self, kind: str, name: str, time: str, details: Dict) -> Optional[int]:
+        hundredths = time_to_hundredths(time)
+        if hundredths is None:
+            print(f"Skipping unparseable {kind} time {time!r} ({name})")
+            return None
+        self.kinds.append(kind)
+        self.names.append(name)
+        self.times.append(format_hundredths(hundredths))
+        self.hundredths.append(hundredths)
+        self.details.append(details)
+        return len(self.kinds) - 1
+
+    def _index(self, gender: str, age: int, course: str, distance: int, stroke: str, target: int):
+        self.lookup.setdefault((gender, age, course, distance, stroke), []).append(target)
+
+    @staticmethod
+    def _parse_event(event: str) -> Tuple[Optional[int], Optional[str]]:
+        match = EVENT_PATTERN.match(event)
+        if not match:
+            return None, None
+        return int(match.group(1)), normalize_stroke(match.group(2))
+
+    def _load_standards(self, section: Dict):
+        genders = section.get('gender', {})
+        for gender_name, levels in (section.get('standards') or {}).items():
+            gender = genders.get(gender_name) or normalize_gender(gender_name)
+            for level, courses in levels.items():
+                for course, events in courses.items():
+                    for event, bands in events.items():
+                        distance, stroke = self._parse_event(event)
+                        if distance is None or stroke is None:
+                            continue
+                        for band in bands:
+                            low = band.get('min_age', MIN_AGE)
+                            high = band.get('max_age', MAX_AGE)
+                            target = self._add_target('standard', level, band['time'], {
+                                'age_group': (f"{low}-{high}" if 'min_age' in band and 'max_age' in band
+                                              else f"{high}/U" if 'max_age' in band else f"{low}/O"),
+                            })
+                            if target is None:
+                                continue
+                            for age in range(max(low, MIN_AGE), min(high, MAX_AGE) + 1):
+                                self._index(gender, age, course, distance, stroke, target)
+
+    def _load_records(self, section: Dict):
+        genders = section.get('gender', {})
+        course = section['course']
+        youngest = section.get('youngest_age', MIN_AGE)
+        for gender_name, ages in section['records'].items():
+            gender = genders.get(gender_name) or normalize_gender(gender_name)
+            for age_key, events in ages.items():
+                age = int(age_key)
+                for event, record in events.items():
+                    distance, stroke = self._parse_event(event)
+                    if distance is None or stroke is None:
+                        continue
+                    target = self._add_target('record', section['name'], record['time'], {
+                        'holder': record.get('holder', ''),
+                        'date': record.get('date', ''),
+                        'age_group': f"{age}&U" if age == youngest else str(age),
+                    })
+                    if target is None:
+                        continue
+                    # 最小年龄组的纪录同样适用于更小的运动员
+                    for record_age in range(MIN_AGE if age == youngest else age, age + 1):
+                        self._index(gender, record_age, course, distance, stroke, target)
+
+    def targets_for(self, gender: str, age: int, course: str, distance: int, stroke: str) -> List[int]:
+        age = min(max(age, MIN_AGE), MAX_AGE)
+        return self.lookup.get((gender, age, course, distance, stroke), [])
+
+    def compare(self, pbs: List[Dict], gender: str, age: int) -> List[Dict]:
+        """把 PB 列表与适用的全部标准和纪录比较，返回每个 PB 的比较结果
+
+        difference_hundredths 为 PB 减去目标时间，≤ 0 表示已达标 / 打破纪录。
+        """
+        pb_indexes: List[int] = []
+        target_indexes: List[int] = []
+        pb_times: List[int] = []
+        for i, pb in enumerate(pbs):
+            hundredths = pb.get('time_hundredths')
+            if hundredths is None:
+                hundredths = time_to_hundredths(pb.get('time'))
+            distance, stroke = parse_distance(pb.get('distance')), normalize_stroke(pb.get('stroke'))
+            if hundredths is None or distance is None or stroke is None:
+                pb_times.append(-1)
+                continue
+            pb_times.append(hundredths)
+            for target in self.targets_for(gender, age, (pb.get('course') or '').upper(), distance, stroke):
+                pb_indexes.append(i)
+                target_indexes.append(target)
+
+        # 一次计算所有 (PB, 目标) 对的差值
+        if np is not None and pb_indexes:
+            differences = (np.array(pb_times, dtype=np.int64)[pb_indexes]
+                           - self.hundredths_array[target_indexes]).tolist()
+        else:
+            differences = [pb_times[i] - self.hundredths[t] for i, t in zip(pb_indexes, target_indexes)]
+
+        comparisons: List[List[Dict]] = [[] for _ in pbs]
+        for i, target, difference in zip(pb_indexes, target_indexes, differences):
+            comparisons[i].append({
+                'type': self.kinds[target],
+                'name': self.names[target],
+                'time': self.times[target],
+                'time_hundredths': self.hundredths[target],
+                'difference_hundredths': difference,
+                'difference': format_difference(difference),
+                'achieved': difference <= 0,
+                **self.details[target],
+            })
+
+        return [{
+            'event': pb.get('event', ''),
+            'distance': pb.get('distance', ''),
+            'stroke': pb.get('stroke', ''),
+            'course': pb.get('course', ''),
+            'time': pb.get('time', ''),
+            'time_hundredths': pb_times[i] if pb_times[i] >= 0 else None,
+            'date': pb.get('date', ''),
+            'comparisons': comparisons[i],
+        } for i, pb in enumerate(pbs)]
+
+    def stats(self) -> Dict:
+        return {
+            'standards': self.kinds.count('standard'),
+            'records': self.kinds.count('record'),
+            'lookup_keys': len(self.lookup),
+        }
@@ -0,0 +1,101 @@
+"""
+成绩时间编解码
+将时间字符串统一转换为整数（百分之一秒），比较和排序只比较整数，避免浮点误差。
+支持整列批量转换；安装了 NumPy 时可直接输出数组。
+"""
+import re
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
+
+
+# parse_time 使用的格式（与原实现相同，均为前缀匹配）
+MINUTES_PATTERN = re.compile(r'(\d+):(\d{2})\.(\d{2})')
+SECONDS_PATTERN = re.compile(r'(\d+)\.(\d{2})')
+COLON_HUNDREDTHS_PATTERN = re.compile(r'(\d+):(\d{2}):(\d{2})')
+
+# 规范化后的时间：[分钟:]秒[.小数]，允许后缀标记（如 1:02.15Q）
+TIME_VALUE_PATTERN = re.compile(r'(?:(\d+):)?(\d+)(?:\.(\d{1,2}))?(?![\d.:])')
+
+# 批量转换时 NumPy 数组中表示无法解析的值
+MISSING = -1
+
+
+def normalize_time(time_str: Optional[str]) -> Optional[str]:
+    """解析时间格式，统一为 MM:SS.hh 或 SS.hh"""
+    if not time_str:
+        return None
+
+    time_str = time_str.strip().replace(' ', '')
+
+    if MINUTES_PATTERN.match(time_str) or SECONDS_PATTERN.match(time_str):
+        return time_str
+
+    match = COLON_HUNDREDTHS_PATTERN.match(time_str)
+    if match:
+        minutes, seconds, hundredths = match.groups()
+        return f"{minutes}:{seconds}.{hundredths}"
+
+    return time_str
+
+
+def time_to_hundredths(time_str: Optional[str]) -> Optional[int]:
+    """将时间字符串转换为百分之一秒（整数），无法解析时返回 None"""
+    time_str = normalize_time(time_str)
+    if not time_str:
+        return None
+
+    match = TIME_VALUE_PATTERN.match(time_str)
+    if not match:
+        return None
+
+    minutes, seconds, fraction = match.groups()
+    if minutes is not None and len(seconds) > 2:
+        return None
+
+    value = int(seconds) * 100
+    if minutes:
+        value += int(minutes) * 6000
+    if fraction:
+        # 一位小数表示十分之一秒
+        value += int(fraction) * (10 if len(fraction) == 1 else 1)
+    return value
+
+
+def format_hundredths(value: Optional[int]) -> str:
+    """将百分之一秒格式化为 MM:SS.hh 或 SS.hh"""
+    if value is None or value < 0:
+        return ''
+    minutes, remainder = divmod(value, 6000)
+    seconds, hundredths = divmod(remainder, 100)
+    if minutes:
+        return f"{minutes}:{seconds:02d}.{hundredths:02d}"
+    return f"{seconds}.{hundredths:02d}"
+
+
+def encode_times(values: Iterable[Optional[str]]) -> List[Optional[int]]:
+    """批量转换一列时间字符串；重复的字符串只解析一次"""
+    cache = {}
+    encoded = []
+    for value in values:
+        if value in cache:
+            encoded.append(cache[value])
+        else:
+            result = time_to_hundredths(value)
+            cache[value] = result
+            encoded.append(result)
+    return encoded
+
+
+def encode_times_array(values: Iterable[Optional[str]]):
+    """批量转换为 NumPy int64 数组（紧凑存储，便于向量化比较），无法解析的值为 MISSING；需要安装 NumPy"""
+    if np is None:
+        raise RuntimeError("NumPy is required for encode_times_array")
+
+    return np.fromiter(
+        (MISSING if value is None else value for value in encode_times(values)),
+        dtype=np.int64,
+    )
@@ -0,0 +1,218 @@
+"""
+持久化工作队列（SQLite）
+多个工作进程（或共享目录的多台机器）通过同一个 SQLite 文件协调：
+- 任务按 URL 唯一；工作进程租用（lease）任务，租约过期后任务可被其他进程重新领取
+- 失败的任务按指数退避重试，超过最大次数记为 failed
+- 完成任务时只有仍持有租约的进程才能写入输出，输出、子任务与完成状态在同一事务中提交，每个 URL 至多输出一次
+- SharedRateLimiter：所有进程共用的按主机令牌桶（全局礼貌限制）
+"""
+import json
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    shard_key INTEGER NOT NULL,
+    meta TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, priority, available_at);
+CREATE TABLE IF NOT EXISTS outputs (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    loaded INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budget (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def shard_key(value: str) -> int:
+    """稳定的分片键（不受 PYTHONHASHSEED 影响）"""
+    return zlib.crc32(value.encode('utf-8'))
+
+
+def _connect(path: str, wal: bool) -> sqlite3.Connection:
+    # isolation_level=None：事务由 BEGIN IMMEDIATE 显式控制
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    conn.execute('PRAGMA busy_timeout=60000')
+    return conn
+
+
+class WorkQueue:
+    """每个进程创建自己的 WorkQueue（SQLite 连接不能跨进程共享）
+
+    wal=False 用于网络文件系统（NFS 等不支持 WAL 的共享内存）上的共享目录。
+    """
+
+    def __init__(self, path: str = "crawl_queue.db", lease_seconds: float = 300,
+                 max_attempts: int = 3, retry_backoff: float = 5.0, wal: bool = True):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_backoff = retry_backoff
+        self.conn = _connect(path, wal)
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, tasks: Iterable[Dict], conn: Optional[sqlite3.Connection] = None) -> int:
+        """添加任务 {url, kind, priority, shard_key, meta}；已存在的 URL 被忽略，返回新增数量"""
+        now = time.time()
+        rows = [(task['url'], task['kind'], task.get('priority', 0),
+                 task.get('shard_key', shard_key(task['url'])), json.dumps(task.get('meta') or {}), now)
+                for task in tasks]
+        cursor = (conn or self.conn).executemany(
+            'INSERT OR IGNORE INTO tasks (url, kind, priority, shard_key, meta, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return cursor.rowcount
+
+    def lease(self, worker: str, limit: int = 1, shard: Optional[int] = None,
+              shards: Optional[int] = None) -> List[Dict]:
+        """租用最多 limit 个可执行的任务（shards 指定时只领取 shard_key % shards == shard 的任务）"""
+        now = time.time()
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 租约过期且已无重试次数的任务记为失败
+            conn.execute("UPDATE tasks SET status = 'failed', lease_owner = NULL, updated_at = ?, "
+                         "last_error = COALESCE(last_error, 'lease expired') "
+                         "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                         (now, now, self.max_attempts))
+            query = ("SELECT url, kind, meta, attempts FROM tasks "
+                     "WHERE ((status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?))")
+            params: list = [now, now]
+            if shards:
+                query += ' AND shard_key % ? = ?'
+                params += [shards, shard]
+            query += ' ORDER BY priority, rowid LIMIT ?'
+            params.append(limit)
+            rows = conn.execute(query, params).fetchall()
+            conn.executemany("UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                             "attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                             [(worker, now + self.lease_seconds, now, row[0]) for row in rows])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return [{'url': url, 'kind': kind, 'meta': json.loads(meta), 'attempt': attempts + 1}
+                for url, kind, meta, attempts in rows]
+
+    def complete(self, task: Dict, worker: str, payload, children: Iterable[Dict] = ()) -> bool:
+        """提交任务输出和子任务；租约已被其他进程接管时丢弃输出并返回 False"""
+        now = time.time()
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute("UPDATE tasks SET status = 'done', lease_owner = NULL, last_error = NULL, "
+                                  "updated_at = ? WHERE url = ? AND status = 'leased' AND lease_owner = ?",
+                                  (now, task['url'], worker))
+            if cursor.rowcount != 1:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute('INSERT OR IGNORE INTO outputs (url, kind, worker, payload, created_at) '
+                         'VALUES (?, ?, ?, ?, ?)',
+                         (task['url'], task['kind'], worker, json.dumps(payload, ensure_ascii=False), now))
+            self.enqueue(children, conn)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def fail(self, task: Dict, worker: str, error: str, retry: bool = True):
+        """任务失败：可重试且未超过次数时退避后重新排队，否则记为 failed"""
+        now = time.time()
+        give_up = not retry or task['attempt'] >= self.max_attempts
+        delay = self.retry_backoff * (2 ** (task['attempt'] - 1))
+        self.conn.execute("UPDATE tasks SET status = ?, lease_owner = NULL, available_at = ?, last_error = ?, "
+                          "updated_at = ? WHERE url = ? AND lease_owner = ?",
+                          ('failed' if give_up else 'pending', now + delay, error[:500], now, task['url'], worker))
+
+    def release(self, worker: str):
+        """工作进程退出时归还未完成的租约"""
+        self.conn.execute("UPDATE tasks SET status = 'pending', lease_owner = NULL, attempts = MAX(attempts - 1, 0), "
+                          "updated_at = ? WHERE status = 'leased' AND lease_owner = ?", (time.time(), worker))
+
+    def outstanding(self) -> int:
+        """未完成（等待或租用中）的任务数"""
+        return self.conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def unloaded_outputs(self, batch: int = 500) -> Iterable[Dict]:
+        """尚未导入的输出"""
+        last_url = ''
+        while True:
+            rows = self.conn.execute('SELECT url, kind, payload FROM outputs WHERE loaded = 0 AND url > ? '
+                                     'ORDER BY url LIMIT ?', (last_url, batch)).fetchall()
+            if not rows:
+                return
+            for url, kind, payload in rows:
+                yield {'url': url, 'kind': kind, 'payload': json.loads(payload)}
+            last_url = rows[-1][0]
+
+    def mark_loaded(self, urls: List[str]):
+        self.conn.executemany('UPDATE outputs SET loaded = 1 WHERE url = ?', [(url,) for url in urls])
+
+    def stats(self) -> Dict:
+        by_status: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in self.conn.execute(
+                'SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status'):
+            by_status.setdefault(kind, {})[status] = count
+        return {
+            'tasks': by_status,
+            'outputs': self.conn.execute('SELECT COUNT(*) FROM outputs').fetchone()[0],
+            'errors': [{'url': url, 'error': error} for url, error in self.conn.execute(
+                "SELECT url, last_error FROM tasks WHERE status = 'failed' ORDER BY updated_at DESC LIMIT 20")],
+        }
+
+
+class SharedRateLimiter:
+    """保存在 SQLite 中的按主机令牌桶，所有工作进程合计每秒最多 rate 个请求（跨机器使用时各机器时钟需同步）"""
+
+    def __init__(self, path: str, rate: float, burst: float = 1, wal: bool = True):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.conn = _connect(path, wal)
+        self.conn.executescript(SCHEMA)
+
+    def acquire(self, host: str):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.time()
+            conn = self.conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated_at FROM budget WHERE host = ?', (host,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute('INSERT OR REPLACE INTO budget (host, tokens, updated_at) VALUES (?, ?, ?)',
+                             (host, tokens, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            if not wait:
+                return
+            time.sleep(wait)
@@ -12,8 +12,16 @@ export interface PersonalBest {
   stroke: string;
   course: 'SCM' | 'LCM';
   time: string;
+  time_hundredths?: number | null; // 百分之一秒，用于比较和排序
   club?: string;
   date?: string;
+  source_url?: string; // PB 所在比赛页面
+  updated_at?: number; // PB 最近更新时间（Unix 时间戳，秒）
+}
+
+export interface PersonalBestChanges {
+  changes: PersonalBest[];
+  nextSince: number;
 }
 
 /**
@@ -48,6 +56,136 @@ export const getPersonalBestsFromBackend = async (
   }
 };
 
+export interface AthleteRef {
+  name: string;
+  club?: string;
+}
+
+export interface AthletePersonalBests extends AthleteRef {
+  personal_bests: PersonalBest[];
+}
+
+/**
+ * 批量获取整个队伍的 PB（后端只遍历一次结果页面），返回顺序与 athletes 相同
+ */
+export const getPersonalBestsBatchFromBackend = async (
+  athletes: AthleteRef[]
+): Promise<AthletePersonalBests[]> => {
+  if (athletes.length === 0) {
+    return [];
+  }
+
+  const response = await fetch(`${BACKEND_API_URL}/api/personal-bests/batch`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ athletes }),
+  });
+  if (!response.ok) {
+    throw new Error(`API error: ${response.status}`);
+  }
+
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.error || 'Failed to get personal bests');
+  }
+  return (data.athletes || []).map((athlete: any) => ({
+    name: athlete.name,
+    club: athlete.club ?? undefined,
+    personal_bests: athlete.personal_bests || [],
+  }));
+};
+
+/**
+ * 获取某个时间之后更新过的 PB（轮询用），下次调用时传入返回的 nextSince
+ */
+export const getPersonalBestChangesFromBackend = async (
+  since: number,
+  athleteName?: string,
+  club?: string
+): Promise<PersonalBestChanges> => {
+  const params = new URLSearchParams({ since: String(since) });
+  if (athleteName) {
+    params.append('name', athleteName);
+  }
+  if (club) {
+    params.append('club', club);
+  }
+
+  const response = await fetch(`${BACKEND_API_URL}/api/personal-bests/changes?${params}`);
+  if (!response.ok) {
+    throw new Error(`API error: ${response.status}`);
+  }
+
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.error || 'Failed to get personal best changes');
+  }
+  return { changes: data.changes || [], nextSince: data.next_since ?? since };
+};
+
+export type SearchStreamEvent =
+  | { type: 'start'; pages_total: number }
+  | { type: 'result'; result: PersonalBest & { splits?: string } }
+  | { type: 'progress'; url: string; pages_done: number; pages_total: number }
+  | { type: 'heartbeat'; elapsed: number }
+  | {
+      type: 'summary';
+      count: number;
+      pages_total: number;
+      pages_fetched: number;
+      skipped_pages: string[];
+      failed_pages: string[];
+      elapsed: number;
+    }
+  | { type: 'error'; error: string };
+
+/**
+ * 流式搜索运动员成绩（NDJSON），每解析完一个页面就回调一次结果
+ */
+export const streamSearchFromBackend = async (
+  athleteName: string,
+  club: string | undefined,
+  onEvent: (event: SearchStreamEvent) => void,
+  signal?: AbortSignal
+): Promise<void> => {
+  const params = new URLSearchParams({ name: athleteName, stream: '1' });
+  if (club) {
+    params.append('club', club);
+  }
+
+  const response = await fetch(`${BACKEND_API_URL}/api/search?${params}`, { signal });
+  if (!response.ok || !response.body) {
+    throw new Error(`API error: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let newlineIndex = buffer.indexOf('\n');
+    while (newlineIndex >= 0) {
+      const line = buffer.slice(0, newlineIndex).trim();
+      buffer = buffer.slice(newlineIndex + 1);
+      if (line) {
+        onEvent(JSON.parse(line) as SearchStreamEvent);
+      }
+      newlineIndex = buffer.indexOf('\n');
+    }
+  }
+
+  const rest = buffer.trim();
+  if (rest) {
+    onEvent(JSON.parse(rest) as SearchStreamEvent);
+  }
+};
+
 /**
  * 检查后端服务是否可用
  */